@@ -9,15 +9,17 @@ import sys
 import re
 from pathlib import Path
 from typing import Dict, List, Optional
-from ollama import Client as OllamaClient
 import os
-from dotenv import load_dotenv
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-load_dotenv()
+from core_v3.llm_client import LLMClient
 from core_v3.svo_extractor import AttackSVO
 from core_v3.caldera_client import CalderaClient
+from core_v3.clients import get_caldera_client, get_llm_client, get_settings
+from core_v3.command_validator import CommandValidator
+from core_v3.fix_store import get_default_fix_store
+from core_v3.streaming import StopWhen, command_complete
 
 
 class AbilityGenerator:
@@ -30,11 +32,14 @@ class AbilityGenerator:
         "darwin": "sh",       # macOS sh
     }
 
-    def __init__(self):
-        llm_host = os.getenv("OLLAMA_HOST", "http://192.168.50.252:11434")
-        self.llm_client = OllamaClient(host=llm_host)
-        self.model = os.getenv("LLM_MODEL", "gpt-oss:120b")
-        self.caldera = CalderaClient()
+    def __init__(self, llm_client: Optional[LLMClient] = None, caldera: Optional[CalderaClient] = None):
+        self.llm_client = llm_client or get_llm_client()
+        self.model = get_settings().llm_model
+        self.caldera = caldera or get_caldera_client()
+        self.validator = CommandValidator()
+        self.validation_mode = os.getenv("COMMAND_VALIDATION", "reprompt").lower()   # reprompt | strict | off
+        self.validation_retries = int(os.getenv("COMMAND_VALIDATION_RETRIES", "1"))
+        self.fix_store = get_default_fix_store()
 
     def generate_command(self, svo: AttackSVO, platform: str = "windows",
                          env_context: Dict = None) -> Optional[str]:
@@ -127,44 +132,83 @@ Tactic: {svo.tactic}
 
 Output ONLY the command:"""
 
-        try:
-            response = self.llm_client.chat(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                options={"temperature": 0.0}
-            )
-
-            command = response["message"]["content"].strip()
-
-            # 마크다운 코드 블록 제거
-            command = re.sub(r"```(?:powershell|bash|sh|cmd)?\s*", "", command)
-            command = re.sub(r"```\s*$", "", command)
-            command = command.strip()
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ]
 
-            # 빈 명령어 검증
-            if not command or len(command) < 3:
-                print(f"  [!] Generated command too short: '{command}'")
-                return None
-
-            # 모델 거부 응답 감지 — 재시도 낭비 방지
-            _refusal_patterns = [
-                "i'm sorry", "i cannot", "i can't", "i apologize",
-                "not able to help", "unable to help", "can't assist",
-                "cannot assist", "not appropriate", "i won't"
-            ]
-            if any(p in command.lower() for p in _refusal_patterns):
-                print(f"  [!] Model refused to generate command — skipping")
+        try:
+            for check_round in range(self.validation_retries + 1):
+                # command 줄이 끝나면 스트리밍 조기 종료 (뒤따르는 설명/코드 펜스 생성 생략)
+                response = self.llm_client.chat(
+                    model=self.model,
+                    messages=messages,
+                    options={"temperature": 0.0},
+                    stop_when=StopWhen("ability_command", command_complete)
+                )
+
+                command = self._clean_command(response["message"]["content"])
+                if not command:
+                    return None
+                if self.validation_mode == "off":
+                    return command
+
+                # ── 정적 검사 (실패 시 문제 목록으로 재프롬프트) ─────────
+                check = self.validator.validate(command, executor)
+                if check.ok:
+                    if check_round:
+                        self.validator.stats["repaired"] += 1
+                        print(f"  ✓ Command repaired after static validation feedback")
+                    return command
+
+                print(f"  [!] Static validation failed: {', '.join(i.code for i in check.errors)}")
+                if check_round < self.validation_retries:
+                    self.validator.stats["reprompted"] += 1
+                    messages = messages + [
+                        {"role": "assistant", "content": command},
+                        {"role": "user", "content": (
+                            f"The command failed static validation:\n{check.feedback()}\n\n"
+                            f"Fix these problems and output ONLY the corrected single-line command:")},
+                    ]
+
+            if self.validation_mode == "strict":
+                self.validator.stats["rejected"] += 1
+                print(f"  [!] Rejecting command that failed static validation")
                 return None
-
+            print(f"  [!] Submitting command despite static validation errors")
             return command
 
         except Exception as e:
             print(f"  [!] Command generation error: {e}")
             return None
 
+    @staticmethod
+    def _clean_command(text: str) -> Optional[str]:
+        """LLM 응답 → command 문자열 (코드 블록 제거, 너무 짧거나 거부 응답이면 None)"""
+        command = text.strip()
+
+        # 마크다운 코드 블록 제거
+        command = re.sub(r"```(?:powershell|bash|sh|cmd)?\s*", "", command)
+        command = re.sub(r"```\s*$", "", command)
+        command = command.strip()
+
+        # 빈 명령어 검증
+        if not command or len(command) < 3:
+            print(f"  [!] Generated command too short: '{command}'")
+            return None
+
+        # 모델 거부 응답 감지 — 재시도 낭비 방지
+        _refusal_patterns = [
+            "i'm sorry", "i cannot", "i can't", "i apologize",
+            "not able to help", "unable to help", "can't assist",
+            "cannot assist", "not appropriate", "i won't"
+        ]
+        if any(p in command.lower() for p in _refusal_patterns):
+            print(f"  [!] Model refused to generate command — skipping")
+            return None
+
+        return command
+
     def generate_ability(self, svo: AttackSVO, platform: str = "windows",
                          max_attempts: int = 3,
                          env_context: Dict = None) -> Optional[Dict]:
@@ -188,11 +232,20 @@ Output ONLY the command:"""
 
         executor = self.PLATFORM_EXECUTORS.get(platform, "psh")
 
+        # 이전 세션에서 같은 technique/SVO로 성공한 command가 있으면 첫 시도는 LLM 없이 재사용
+        known = self.fix_store.lookup(svo.technique_id, platform, svo.verb, svo.object)
+
         for attempt in range(1, max_attempts + 1):
             print(f"\n  [Attempt {attempt}/{max_attempts}]")
 
             # 1. 커맨드 생성
-            command = self.generate_command(svo, platform, env_context=env_context)
+            from_store = known is not None and attempt == 1
+            if from_store:
+                command = known["command"]
+                print(f"  ✓ Known-good command from fix store ({known['successes']} successes, "
+                      f"session {known['session']})")
+            else:
+                command = self.generate_command(svo, platform, env_context=env_context)
             if not command:
                 print(f"  [!] Command generation failed")
                 continue
@@ -228,7 +281,8 @@ Output ONLY the command:"""
                     "name": ability_name,
                     "command": command,
                     "svo": svo.to_dict(),
-                    "source": "generated",
+                    "source": "generated",          # 세션이 만든 ability — cleanup / checkpoint 추적 대상
+                    "from_fix_store": from_store,
                     "attempt": attempt,
                 }
 
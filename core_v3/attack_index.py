@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+ATT&CK Index
+로컬 enterprise-attack STIX 번들을 technique_id 인덱스로 압축해 pickle로 저장하고,
+LLM이 파싱한 technique(ID / 이름 / tactic)을 Caldera·LLM 호출 전에 오프라인으로 검증·보정한다.
+
+  인덱스: technique_id → {name, tactics, platforms, parent, subtechniques, deprecated}
+          + 이름 → ID, revoked ID → 대체 ID, tactic 이름/TA ID → shortname
+  보정:   ID 표기 정규화 (t1003-001, T1003/001 → T1003.001), revoked ID → 대체 ID,
+          존재하지 않는 ID → 이름으로 역조회, 이름 → 공식 이름, 자유 텍스트 tactic → shortname
+
+STIX 번들: https://github.com/mitre-attack/attack-stix-data (enterprise-attack/enterprise-attack.json)
+    python -m core_v3.attack_index build data/enterprise-attack.json
+    python -m core_v3.attack_index lookup T1003.001 "LSASS Memory"
+"""
+
+import json
+import os
+import pickle
+import re
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+
+ROOT = Path(__file__).parent.parent
+DEFAULT_BUNDLE_PATH = ROOT / "data" / "enterprise-attack.json"
+DEFAULT_INDEX_PATH = ROOT / ".cache" / "attack_index.pkl"
+INDEX_FORMAT = 1
+
+_TECHNIQUE_ID = re.compile(r"^\s*t?\s*(\d{4})(?:\s*[.\-/_ ]\s*(\d{3}))?\s*$", re.IGNORECASE)
+
+
+def normalize_technique_id(value: str) -> Optional[str]:
+    """'t1003-001' / 'T1003/001' / ' T1003 ' → 'T1003.001' / 'T1003' (형식이 아니면 None)"""
+    m = _TECHNIQUE_ID.match(str(value or ""))
+    if not m:
+        return None
+    return f"T{m.group(1)}" + (f".{m.group(2)}" if m.group(2) else "")
+
+
+def _norm_name(name: str) -> str:
+    return re.sub(r"[^a-z0-9]+", " ", (name or "").lower()).strip()
+
+
+class AttackIndex:
+    """technique_id 기준 ATT&CK 인덱스 (조회는 모두 dict 1회)"""
+
+    def __init__(self, techniques: Dict[str, Dict], names: Dict[str, str], revoked: Dict[str, str],
+                 tactics: Dict[str, str], source: Optional[Dict] = None):
+        self.techniques = techniques    # ID → entry
+        self.names = names              # 정규화된 이름 / "부모 이름 서브 이름" → ID
+        self.revoked = revoked          # revoked ID → 대체 ID
+        self.tactics = tactics          # 정규화된 tactic 이름 / shortname / TA ID → shortname
+        self.source = source or {}
+
+    # ==================== 구축 ====================
+
+    @classmethod
+    def from_stix(cls, bundle_path: Path) -> "AttackIndex":
+        """enterprise-attack STIX 번들(JSON) → 인덱스"""
+        bundle_path = Path(bundle_path)
+        with open(bundle_path, encoding="utf-8") as f:
+            objects = json.load(f).get("objects", [])
+
+        techniques: Dict[str, Dict] = {}
+        revoked_stix: Dict[str, str] = {}     # stix id → revoked technique ID
+        stix_to_tid: Dict[str, str] = {}
+        revoked_by: List[Tuple[str, str]] = []
+        tactics: Dict[str, str] = {}
+
+        for obj in objects:
+            kind = obj.get("type")
+            external_id = next((r.get("external_id") for r in obj.get("external_references", [])
+                                if r.get("source_name") == "mitre-attack"), None)
+            if kind == "x-mitre-tactic" and not obj.get("revoked"):
+                shortname = obj.get("x_mitre_shortname")
+                if shortname:
+                    for alias in (shortname, obj.get("name", ""), external_id or ""):
+                        if alias:
+                            tactics[_norm_name(alias)] = shortname
+            elif kind == "attack-pattern" and external_id:
+                if obj.get("revoked"):
+                    revoked_stix[obj["id"]] = external_id
+                    continue
+                stix_to_tid[obj["id"]] = external_id
+                techniques[external_id] = {
+                    "name": obj.get("name", ""),
+                    "tactics": [p["phase_name"] for p in obj.get("kill_chain_phases", [])
+                                if p.get("kill_chain_name") == "mitre-attack"],
+                    "platforms": obj.get("x_mitre_platforms", []),
+                    "parent": external_id.split(".")[0] if "." in external_id else None,
+                    "subtechniques": [],
+                    "deprecated": bool(obj.get("x_mitre_deprecated")),
+                }
+            elif kind == "relationship" and obj.get("relationship_type") == "revoked-by":
+                revoked_by.append((obj.get("source_ref"), obj.get("target_ref")))
+
+        for tid, entry in techniques.items():
+            parent = entry["parent"]
+            if parent in techniques:
+                techniques[parent]["subtechniques"].append(tid)
+        for entry in techniques.values():
+            entry["subtechniques"].sort()
+
+        revoked = {revoked_stix[src]: stix_to_tid[dst] for src, dst in revoked_by
+                   if src in revoked_stix and dst in stix_to_tid}
+
+        names: Dict[str, str] = {}
+        # deprecated보다 현행 technique, sub-technique 이름보다 부모 이름이 우선
+        for tid, entry in sorted(techniques.items(), key=lambda kv: (kv[1]["deprecated"], "." in kv[0])):
+            keys = [_norm_name(entry["name"])]
+            if entry["parent"] in techniques:
+                parent_name = techniques[entry["parent"]]["name"]
+                keys += [_norm_name(f"{parent_name} {entry['name']}")]
+            for key in keys:
+                names.setdefault(key, tid)
+
+        stat = bundle_path.stat()
+        source = {"bundle": str(bundle_path), "mtime": stat.st_mtime, "size": stat.st_size,
+                  "format": INDEX_FORMAT}
+        return cls(techniques, names, revoked, tactics, source)
+
+    def save(self, path: Path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "wb") as f:
+            pickle.dump({"techniques": self.techniques, "names": self.names, "revoked": self.revoked,
+                         "tactics": self.tactics, "source": self.source}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: Path) -> Optional["AttackIndex"]:
+        try:
+            with open(path, "rb") as f:
+                data = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+            return None
+        if data.get("source", {}).get("format") != INDEX_FORMAT:
+            return None
+        return cls(data["techniques"], data["names"], data["revoked"], data["tactics"], data["source"])
+
+    # ==================== 조회 ====================
+
+    def get(self, technique_id: str) -> Optional[Dict]:
+        return self.techniques.get(normalize_technique_id(technique_id) or "")
+
+    def find_by_name(self, name: str) -> Optional[str]:
+        """공식 이름 또는 'Parent: Sub' / 'Parent Sub' 형식 이름 → technique ID"""
+        return self.names.get(_norm_name(name))
+
+    def tactic(self, value: str) -> Optional[str]:
+        """'Credential Access' / 'credential_access' / 'TA0006' → 'credential-access'"""
+        return self.tactics.get(_norm_name(value))
+
+    def resolve(self, technique_id: str) -> Tuple[Optional[str], Optional[str]]:
+        """
+        ID → (현행 ID, 보정 사유)
+
+        Returns:
+            ("T1003.001", None) 그대로 유효 / ("T1547.001", "revoked") 대체 ID / (None, "unknown")
+        """
+        tid = normalize_technique_id(technique_id)
+        if tid is None:
+            return None, "malformed"
+        if tid in self.techniques:
+            return tid, None
+        if tid in self.revoked:
+            return self.revoked[tid], "revoked"
+        return None, "unknown"
+
+    # ==================== 검증 / 보정 ====================
+
+    def repair_technique(self, tech: Dict, repair: bool = True) -> Dict:
+        """
+        파싱된 technique 하나 검증 (repair=True이면 ID / 이름 / tactic 보정)
+
+        결과는 tech["attack_validation"] = {"status": valid | repaired | invalid | unknown,
+                                            "changes": [...], "warnings": [...]}
+        (repair=False이면 보정 대신 "invalid"로 표시만, deprecated technique은 warnings에만 기록)
+        """
+        changes = []
+        original_id = tech.get("technique_id", "")
+        tid, reason = self.resolve(original_id)
+        if tid is None:
+            by_name = self.find_by_name(tech.get("technique_name", ""))
+            if by_name:
+                tid, reason = by_name, f"{reason}_id_matched_by_name"
+        if tid is None:
+            tech["attack_validation"] = {"status": "unknown", "changes": [f"{original_id}: {reason}"],
+                                         "warnings": []}
+            return tech
+
+        entry = self.techniques[tid]
+        if tid != original_id:
+            changes.append(f"technique_id {original_id} → {tid}" + (f" ({reason})" if reason else ""))
+            if repair:
+                tech["technique_id"] = tid
+
+        name = tech.get("technique_name", "")
+        canonical = entry["name"]
+        if entry["parent"] in self.techniques:
+            canonical = f"{self.techniques[entry['parent']]['name']}: {entry['name']}"
+        if name != canonical and _norm_name(name) not in (_norm_name(canonical), _norm_name(entry["name"])):
+            changes.append(f"technique_name '{name}' → '{canonical}'")
+            if repair:
+                tech["technique_name"] = canonical
+
+        tactic = tech.get("tactic", "")
+        given = [tactic] if isinstance(tactic, str) else list(tactic or [])
+        normalized = [self.tactic(t) for t in given]
+        valid = [t for t in normalized if t in entry["tactics"]]
+        fixed_tactic = valid[0] if valid else (entry["tactics"][0] if entry["tactics"] else tactic)
+        if fixed_tactic != tactic:
+            changes.append(f"tactic '{tactic}' → '{fixed_tactic}'")
+            if repair:
+                tech["tactic"] = fixed_tactic
+
+        warnings = [f"{tid} is deprecated"] if entry["deprecated"] else []
+
+        tech["attack_platforms"] = entry["platforms"]
+        status = "valid" if not changes else ("repaired" if repair else "invalid")
+        tech["attack_validation"] = {"status": status, "changes": changes, "warnings": warnings}
+        return tech
+
+    def repair_techniques(self, techniques: List[Dict], repair: bool = True) -> Dict:
+        """
+        technique 목록 검증/보정 (in-place)
+
+        Returns:
+            {"total", "valid", "repaired", "invalid", "unknown"}
+        """
+        stats = {"total": len(techniques), "valid": 0, "repaired": 0, "invalid": 0, "unknown": 0}
+        for tech in techniques:
+            self.repair_technique(tech, repair=repair)
+            stats[tech["attack_validation"]["status"]] += 1
+        return stats
+
+
+_default_index: Optional[AttackIndex] = None
+_default_loaded = False
+_default_lock = threading.Lock()
+
+
+def get_default_attack_index() -> Optional[AttackIndex]:
+    """
+    프로세스 전역 인덱스 (ATTACK_INDEX_PATH pickle, 없거나 STIX 번들이 더 새로우면 ATTACK_STIX_PATH에서 재구축)
+
+    Returns:
+        AttackIndex 또는 None (번들/인덱스 모두 없음)
+    """
+    global _default_index, _default_loaded
+    with _default_lock:
+        if _default_loaded:
+            return _default_index
+        _default_loaded = True
+
+        index_path = Path(os.getenv("ATTACK_INDEX_PATH") or DEFAULT_INDEX_PATH)
+        bundle_path = Path(os.getenv("ATTACK_STIX_PATH") or DEFAULT_BUNDLE_PATH)
+
+        index = AttackIndex.load(index_path) if index_path.exists() else None
+        if bundle_path.exists():
+            stat = bundle_path.stat()
+            stale = index is None or (index.source.get("mtime"), index.source.get("size")) != \
+                (stat.st_mtime, stat.st_size)
+            if stale:
+                print(f"[*] Building ATT&CK index from {bundle_path}...")
+                index = AttackIndex.from_stix(bundle_path)
+                index.save(index_path)
+                print(f"  ✓ {len(index.techniques)} techniques → {index_path}")
+        _default_index = index
+        return _default_index
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Offline MITRE ATT&CK technique index")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="STIX 번들 → pickle 인덱스")
+    build.add_argument("bundle", nargs="?", default=None, help="enterprise-attack.json (기본: ATTACK_STIX_PATH)")
+    build.add_argument("--index", default=None, help="인덱스 경로 (기본: ATTACK_INDEX_PATH 또는 .cache/attack_index.pkl)")
+    lookup = sub.add_parser("lookup", help="technique ID 또는 이름 조회")
+    lookup.add_argument("queries", nargs="+")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        bundle = Path(args.bundle or os.getenv("ATTACK_STIX_PATH") or DEFAULT_BUNDLE_PATH)
+        target = Path(args.index or os.getenv("ATTACK_INDEX_PATH") or DEFAULT_INDEX_PATH)
+        started = time.perf_counter()
+        idx = AttackIndex.from_stix(bundle)
+        built = time.perf_counter() - started
+        idx.save(target)
+        started = time.perf_counter()
+        AttackIndex.load(target)
+        loaded = time.perf_counter() - started
+        print(f"[*] {len(idx.techniques)} techniques, {len(idx.revoked)} revoked, "
+              f"{len(set(idx.tactics.values()))} tactics → {target} ({target.stat().st_size / 1024:.0f} KB)")
+        print(f"    STIX parse {built:.2f}s, index load {loaded * 1000:.1f}ms")
+    else:
+        idx = get_default_attack_index()
+        if idx is None:
+            print("[!] No ATT&CK index — run: python -m core_v3.attack_index build <enterprise-attack.json>")
+            raise SystemExit(1)
+        for query in args.queries:
+            tid, reason = idx.resolve(query)
+            if tid is None:
+                tid, reason = idx.find_by_name(query), None
+            entry = idx.techniques.get(tid or "")
+            if not entry:
+                print(f"  ✗ {query}: not found")
+                continue
+            print(f"  ✓ {query} → {tid}{f' ({reason})' if reason else ''}: {entry['name']}")
+            print(f"      tactics={entry['tactics']} platforms={entry['platforms']}")
+            print(f"      parent={entry['parent']} subtechniques={entry['subtechniques']}")
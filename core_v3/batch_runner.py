@@ -0,0 +1,385 @@
+#!/usr/bin/env python3
+"""
+Batch Runner
+시나리오 × 반복 횟수 × 모드(svo / nosvo / force) 작업을 연결된 모든 Caldera agent에 분배해 실행한다.
+SVO 비결정성 측정처럼 같은 시나리오를 수십 번 돌리는 연구 workload용.
+
+  - 세션을 StagedExecutor의 stage(parse → svo → ability → operation → watch → fix) 단위로 진행
+    — LLM stage는 llm_workers개 슬롯 공유, agent stage는 agent당 세션 1개 (operation이 겹치지 않음)
+    — 한 세션이 agent에서 operation을 기다리는 동안 다른 세션의 LLM stage가 진행됨
+  - stage마다 별도 worker 프로세스에서 Pipeline.run(stop_after=<phase>) / resume_dir 실행,
+    stage 사이 상태는 session_dir/checkpoint.json으로 이어 붙임
+  - 결과: results/batch_<timestamp>/ 아래 session_* 디렉토리, logs/<job>.log, batch_index.json
+
+Usage:
+    python -m core_v3.batch_runner scenarios/APT29_scenario.md scenarios/APT3_scenario.md \\
+        --repeat 10 --modes svo nosvo force
+    (--repeat > 1이면 LLM 캐시와 fix store 자동 비활성화 — 반복 간 독립성 유지)
+"""
+
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from core_v3.staged_executor import Stage, StagedExecutor
+
+
+# 모드 → Pipeline.run 인자
+MODES = {
+    "svo": {"force_generate": False, "use_svo": True},
+    "nosvo": {"force_generate": False, "use_svo": False},
+    "force": {"force_generate": True, "use_svo": True},
+    "force-nosvo": {"force_generate": True, "use_svo": False},
+}
+
+
+@dataclass
+class BatchJob:
+    """배치 작업 하나 (= 세션 하나)"""
+    job_id: str
+    scenario: str
+    mode: str
+    repetition: int
+    agent: Optional[str] = None
+    session_dir: Optional[str] = None
+    operation_id: Optional[str] = None
+    status: str = "pending"         # pending | <마지막 완료 stage> | completed | failed | interrupted
+    error: Optional[str] = None
+    initial: Optional[Dict] = None  # {"success", "total"} — 06_operation_results.json
+    final: Optional[Dict] = None    # ReAct 마지막 라운드 (라운드가 없으면 initial)
+    stage_seconds: Dict[str, float] = field(default_factory=dict)
+    log: Optional[str] = None
+
+
+def _run_stage(stage: str, phase: Optional[str], job: Dict, output_dir: str,
+               rerun_mode: Optional[str], keep_objects: bool) -> Dict:
+    """
+    worker 프로세스에서 세션의 한 stage 실행 (출력은 작업별 로그 파일로)
+
+    session_dir가 없으면 새 세션, 있으면 checkpoint.json에서 이어서 phase까지 실행 (phase=None이면 끝까지)
+
+    Returns:
+        {"status", "session_dir", "operation_id", "error", "seconds"}
+    """
+    from core_v3.checkpoint import SessionCheckpoint
+    from core_v3.pipeline import Pipeline
+
+    started = time.time()
+    outcome = {"status": "failed", "session_dir": job.get("session_dir"), "operation_id": None, "error": None}
+    stdout, stderr = sys.stdout, sys.stderr
+    with open(job["log"], "a", encoding="utf-8", buffering=1) as log:
+        sys.stdout = sys.stderr = log
+        pipeline = None
+        cleanup = not keep_objects
+        try:
+            pipeline = Pipeline()
+            if job.get("session_dir"):
+                result = pipeline.run(job["scenario"], resume_dir=job["session_dir"],
+                                      agent_paw=job["agent"], stop_after=phase)
+            else:
+                result = pipeline.run(job["scenario"], output_dir=output_dir, rerun_mode=rerun_mode,
+                                      agent_paw=job["agent"], stop_after=phase, **MODES[job["mode"]])
+
+            if pipeline.session_dir is not None:
+                outcome["session_dir"] = str(pipeline.session_dir)
+            checkpoint = SessionCheckpoint.load(pipeline.session_dir) if pipeline.session_dir else None
+            if result and checkpoint and checkpoint.done(phase or "complete"):
+                outcome["status"] = stage if phase else "completed"
+                outcome["operation_id"] = result[1]
+                # 중간 stage가 만든 ability는 다음 stage가 사용
+                cleanup = cleanup and phase is None
+            else:
+                outcome["error"] = f"{stage} stage did not complete"
+        except BaseException as e:
+            # Ctrl-C / 예외: run.py와 같이 Caldera 객체를 남겨 두어 --resume 가능하게 함
+            traceback.print_exc()
+            cleanup = False
+            outcome["status"] = "interrupted" if isinstance(e, KeyboardInterrupt) else "failed"
+            outcome["error"] = repr(e)
+            if pipeline is not None and pipeline.session_dir is not None:
+                outcome["session_dir"] = str(pipeline.session_dir)
+        finally:
+            if cleanup and pipeline is not None:
+                pipeline.cleanup()
+            sys.stdout, sys.stderr = stdout, stderr
+    outcome["seconds"] = round(time.time() - started, 1)
+    return outcome
+
+
+class BatchRunner:
+    """StagedExecutor + stage 실행용 프로세스 풀"""
+
+    INDEX_FILENAME = "batch_index.json"
+
+    def __init__(self, output_dir: Optional[str] = None, agents: Optional[List[str]] = None,
+                 rerun_mode: Optional[str] = None, keep_objects: bool = False,
+                 llm_workers: int = 2, max_in_flight: Optional[int] = None):
+        if output_dir:
+            self.batch_dir = Path(output_dir)
+        else:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            self.batch_dir = Path(__file__).parent.parent / "results" / f"batch_{timestamp}"
+        self.requested_agents = agents
+        self.rerun_mode = rerun_mode
+        self.keep_objects = keep_objects
+        self.llm_workers = llm_workers
+        self.max_in_flight = max_in_flight
+        self.jobs: List[BatchJob] = []
+        self.agents: List[str] = []
+        self.executor: Optional[StagedExecutor] = None
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._started_at: Optional[str] = None
+
+    # ==================== 작업 계획 ====================
+
+    def plan(self, scenarios: List[str], repeat: int = 1, modes: Optional[List[str]] = None) -> List[BatchJob]:
+        """
+        시나리오 × 반복 × 모드 작업 목록
+
+        반복 회차가 바깥 루프 — 배치를 중간에 멈춰도 모든 (시나리오, 모드) 조합의 결과가 고르게 남는다.
+        """
+        modes = modes or ["svo"]
+        unknown = [m for m in modes if m not in MODES]
+        if unknown:
+            raise ValueError(f"Unknown mode(s): {', '.join(unknown)} (available: {', '.join(MODES)})")
+
+        self.jobs = []
+        for rep in range(1, repeat + 1):
+            for scenario in scenarios:
+                for mode in modes:
+                    self.jobs.append(BatchJob(
+                        job_id=f"{Path(scenario).stem}_{mode}_r{rep:02d}",
+                        scenario=scenario, mode=mode, repetition=rep,
+                    ))
+        return self.jobs
+
+    def _discover_agents(self) -> List[str]:
+        from core_v3.clients import get_caldera_client
+
+        connected = [a.get("paw") for a in get_caldera_client().get_agents() if a.get("paw")]
+        if self.requested_agents:
+            missing = [p for p in self.requested_agents if p not in connected]
+            if missing:
+                print(f"  [!] Agent(s) not connected, skipping: {', '.join(missing)}")
+            return [p for p in self.requested_agents if p in connected]
+        return connected
+
+    # ==================== 실행 ====================
+
+    def run(self) -> Optional[Path]:
+        """
+        계획된 작업 실행
+
+        Returns:
+            batch_index.json 경로 (연결된 agent가 없으면 None)
+        """
+        self.agents = self._discover_agents()
+        if not self.agents:
+            print("[!] No agents available for batch run")
+            return None
+
+        self.batch_dir.mkdir(parents=True, exist_ok=True)
+        (self.batch_dir / "logs").mkdir(exist_ok=True)
+        self._started_at = datetime.now().isoformat()
+
+        for job in self.jobs:
+            job.log = str(self.batch_dir / "logs" / f"{job.job_id}.log")
+
+        self.executor = StagedExecutor(self._execute_stage, self.agents, llm_workers=self.llm_workers,
+                                       max_in_flight=self.max_in_flight, on_finish=self._report)
+        print(f"[*] Batch: {len(self.jobs)} jobs on {len(self.agents)} agent(s), "
+              f"{self.executor.llm_workers} LLM slot(s), up to {self.executor.max_in_flight} sessions in flight "
+              f"→ {self.batch_dir}")
+        self._save_index()
+
+        # spawn: worker 프로세스마다 tracer / 캐시 / Caldera 세션을 새로 만든다
+        self._pool = ProcessPoolExecutor(max_workers=self.executor.llm_workers + len(self.agents),
+                                         mp_context=multiprocessing.get_context("spawn"))
+        try:
+            self.executor.run(self.jobs)
+        except KeyboardInterrupt:
+            print("\n[!] Interrupted — waiting for running stages to stop...")
+            self.executor.stop()
+        finally:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            index_path = self._save_index()
+
+        self._print_summary()
+        return index_path
+
+    def _execute_stage(self, stage: Stage, job: BatchJob) -> bool:
+        """StagedExecutor 콜백 — stage를 worker 프로세스에서 실행하고 결과 반영"""
+        future = self._pool.submit(_run_stage, stage.name, stage.phase, asdict(job), str(self.batch_dir),
+                                   self.rerun_mode, self.keep_objects)
+        try:
+            outcome = future.result()
+        except BaseException as e:
+            # worker 프로세스 비정상 종료 (BrokenProcessPool 등)
+            outcome = {"status": "failed", "error": repr(e), "seconds": 0.0}
+        self._update(job, stage, outcome)
+        return job.status not in ("failed", "interrupted")
+
+    def _update(self, job: BatchJob, stage: Stage, outcome: Dict):
+        with self._lock:
+            job.status = outcome.get("status", "failed")
+            job.error = outcome.get("error")
+            job.session_dir = outcome.get("session_dir") or job.session_dir
+            job.operation_id = outcome.get("operation_id") or job.operation_id
+            job.stage_seconds[stage.name] = outcome.get("seconds", 0.0)
+            if job.status == "completed" and job.session_dir:
+                job.initial, job.final = self._session_rates(Path(job.session_dir))
+            self._save_index()
+
+    @staticmethod
+    def _session_rates(session_dir: Path):
+        """06_operation_results.json / 07_react_summary.json → (initial, final) 성공 수"""
+        def load(name):
+            try:
+                return json.loads((session_dir / name).read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                return {}
+
+        summary = load("06_operation_results.json").get("summary", {})
+        initial = {"success": summary.get("success", 0), "total": summary.get("total", 0)}
+        final = dict(initial)
+        rounds = load("07_react_summary.json").get("rounds", [])
+        stats = rounds[-1].get("result_stats") if rounds else None
+        if stats:
+            final = {"success": stats.get("success", 0), "total": stats.get("total", 0)}
+        return initial, final
+
+    # ==================== 결과 ====================
+
+    def _report(self, job: BatchJob):
+        """StagedExecutor on_finish 콜백"""
+        with self._lock:
+            done = sum(1 for j in self.jobs if j.status in ("completed", "failed", "interrupted"))
+        if job.status == "completed":
+            timing = ", ".join(f"{name} {sec:.0f}s" for name, sec in job.stage_seconds.items())
+            print(f"  ✓ [{done}/{len(self.jobs)}] {job.job_id} on {job.agent}: "
+                  f"{job.initial['success']}/{job.initial['total']} → {job.final['success']}/{job.final['total']} "
+                  f"({timing})")
+        else:
+            print(f"  ✗ [{done}/{len(self.jobs)}] {job.job_id} on {job.agent or '-'}: {job.status} — {job.error} "
+                  f"(log: {job.log})")
+
+    def summary(self) -> Dict[str, Dict]:
+        """(시나리오, 모드)별 완료 세션 수와 평균 초기/최종 성공률"""
+        groups: Dict[str, Dict] = {}
+        for job in self.jobs:
+            key = f"{Path(job.scenario).stem}/{job.mode}"
+            group = groups.setdefault(key, {"jobs": 0, "completed": 0, "initial_rates": [], "final_rates": []})
+            group["jobs"] += 1
+            if job.status != "completed" or not job.initial or not job.initial["total"]:
+                continue
+            group["completed"] += 1
+            group["initial_rates"].append(job.initial["success"] / job.initial["total"])
+            group["final_rates"].append(job.final["success"] / max(job.final["total"], 1))
+
+        for group in groups.values():
+            for name in ("initial", "final"):
+                rates = group.pop(f"{name}_rates")
+                group[f"{name}_rate"] = round(sum(rates) / len(rates) * 100, 1) if rates else None
+                group[f"{name}_range"] = [round(min(rates) * 100, 1), round(max(rates) * 100, 1)] if rates else None
+        return groups
+
+    def _save_index(self) -> Path:
+        path = self.batch_dir / self.INDEX_FILENAME
+        index = {
+            "started_at": self._started_at,
+            "updated_at": datetime.now().isoformat(),
+            "agents": self.agents,
+            "rerun_mode": self.rerun_mode,
+            "summary": self.summary(),
+            "stages": self.executor.stats if self.executor else {},
+            "utilization": self.executor.utilization() if self.executor and self.executor.wall_seconds else None,
+            "jobs": [asdict(j) for j in self.jobs],
+        }
+        tmp = path.with_suffix(".json.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(index, f, indent=2, ensure_ascii=False)
+        os.replace(tmp, path)
+        return path
+
+    def _print_summary(self):
+        print(f"\n📊 Batch Summary ({self.batch_dir / self.INDEX_FILENAME}):")
+        if self.executor and self.executor.wall_seconds:
+            utilization = self.executor.utilization()
+            print(f"    Wall time {self.executor.wall_seconds:.0f}s — LLM slots busy {utilization['llm']:.0%}, "
+                  f"agents busy {utilization['agent']:.0%}")
+        for key, group in self.summary().items():
+            if group["completed"]:
+                print(f"    {key:<40} {group['completed']}/{group['jobs']} sessions  "
+                      f"initial {group['initial_rate']:.1f}%  final {group['final_rate']:.1f}%")
+            else:
+                print(f"    {key:<40} 0/{group['jobs']} sessions")
+        resumable = [j for j in self.jobs if j.status in ("failed", "interrupted") and j.session_dir]
+        if resumable:
+            print(f"\n[!] {len(resumable)} job(s) did not complete. Resume with:")
+            for job in resumable:
+                print(f"    python run.py --resume {job.session_dir}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    sys.path.insert(0, str(Path(__file__).parent.parent))
+
+    parser = argparse.ArgumentParser(description="Run scenarios × repetitions × modes across all Caldera agents")
+    parser.add_argument("scenarios", nargs="+", help="시나리오 파일 경로")
+    parser.add_argument("--repeat", type=int, default=1, help="(시나리오, 모드)별 반복 횟수")
+    parser.add_argument("--modes", nargs="+", default=["svo"], choices=sorted(MODES),
+                        help="svo=기본, nosvo=ReAct SVO 제약 제거, force=SVO 기반 강제 생성")
+    parser.add_argument("--agents", nargs="+", default=None, metavar="PAW",
+                        help="사용할 agent (기본: 연결된 모든 agent)")
+    parser.add_argument("--output-dir", default=None, help="배치 결과 디렉토리 (기본: results/batch_<timestamp>)")
+    parser.add_argument("--rerun-mode", choices=["full", "targeted"], default=None,
+                        help="ReAct 라운드 재실행 방식 (기본: REACT_RERUN_MODE)")
+    parser.add_argument("--llm-workers", type=int, default=2,
+                        help="동시에 실행할 LLM stage(parse / svo / ability) 수 (Ollama 동시 처리 수에 맞춤)")
+    parser.add_argument("--max-in-flight", type=int, default=None,
+                        help="동시에 진행 중인 세션 수 상한 (기본: agent 수 × 2)")
+    parser.add_argument("--keep-objects", action="store_true",
+                        help="작업이 끝나도 생성된 Caldera ability를 지우지 않음")
+    parser.add_argument("--no-llm-cache", action="store_true",
+                        help="LLM 응답 캐시를 사용하지 않음 (--repeat > 1이면 자동)")
+    parser.add_argument("--keep-llm-cache", action="store_true",
+                        help="--repeat > 1이어도 LLM 캐시 사용 (반복이 같은 응답을 재생 — 비결정성 측정 불가)")
+    parser.add_argument("--no-fix-store", action="store_true",
+                        help="이전 세션의 검증된 수정(fix store)을 조회/기록하지 않음 (--repeat > 1이면 자동)")
+    parser.add_argument("--keep-fix-store", action="store_true",
+                        help="--repeat > 1이어도 fix store 사용 (반복끼리 수정을 공유 — 독립 표본이 아님)")
+    args = parser.parse_args()
+
+    # worker 프로세스는 환경 변수를 상속
+    if args.no_llm_cache or (args.repeat > 1 and not args.keep_llm_cache):
+        # 반복 N이 반복 1의 캐시된 응답을 그대로 재생하면 비결정성을 측정할 수 없음
+        if not args.no_llm_cache:
+            print("[*] --repeat > 1 — LLM cache disabled so repetitions sample the model "
+                  "(use --keep-llm-cache to reuse responses)")
+        os.environ["LLM_CACHE_BYPASS"] = "true"
+    if args.no_fix_store or (args.repeat > 1 and not args.keep_fix_store):
+        # 반복 N이 반복 N-1(및 동시 세션)이 기록한 수정을 재사용하면 ReAct 결과가 독립 표본이 아님
+        if not args.no_fix_store:
+            print("[*] --repeat > 1 — fix store disabled so repetitions stay independent "
+                  "(use --keep-fix-store to share fixes)")
+        os.environ["FIX_STORE_BYPASS"] = "true"
+
+    runner = BatchRunner(output_dir=args.output_dir, agents=args.agents,
+                         rerun_mode=args.rerun_mode, keep_objects=args.keep_objects,
+                         llm_workers=args.llm_workers, max_in_flight=args.max_in_flight)
+    runner.plan(args.scenarios, repeat=args.repeat, modes=args.modes)
+    index_path = runner.run()
+    if index_path is None:
+        sys.exit(1)
+    print(f"\n[DONE] index={index_path}")
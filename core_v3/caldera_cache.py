@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+Caldera Cache
+Caldera 조회 결과를 메모리에 인덱싱하여 반복 API 호출을 줄인다.
+  - AbilityCatalog: /abilities 전체 목록을 1회 받아 technique/parent/ability_id/platform/executor로 인덱싱
+  - AgentRegistry:  paw → agent 레지스트리 (짧은 TTL + update 후 명시적 무효화)
+"""
+
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+
+class AbilityCatalog:
+    """
+    Ability 카탈로그 (TTL 기반 메모리 인덱스)
+
+    get_abilities(technique_id)마다 /abilities 전체를 다시 받는 대신
+    한 번 받아 인덱싱하고, TTL 만료 또는 ability 생성/삭제/수정 시에만 갱신한다.
+    """
+
+    def __init__(self, fetch: Callable[[], Optional[List[Dict]]], ttl: float = 300.0):
+        """
+        Args:
+            fetch: 전체 ability 목록을 반환하는 함수 (실패 시 None)
+            ttl: 캐시 유효 시간 (초, 0 이하면 매번 갱신)
+        """
+        self._fetch = fetch
+        self.ttl = ttl
+        self._lock = threading.RLock()
+        self._loaded_at: Optional[float] = None
+
+        self._abilities: Dict[str, Dict] = {}           # ability_id → ability
+        self._by_technique: Dict[str, List[str]] = {}   # technique_id → [ability_id]
+        self._by_parent: Dict[str, List[str]] = {}      # parent technique → [ability_id] (sub-technique 포함)
+        self._by_platform: Dict[str, List[str]] = {}    # platform → [ability_id]
+        self._by_executor: Dict[tuple, List[str]] = {}  # (platform, executor) → [ability_id]
+
+        self.stats = {"fetches": 0, "hits": 0, "invalidations": 0}
+
+    # ==================== 갱신 ====================
+
+    def is_fresh(self) -> bool:
+        if self._loaded_at is None:
+            return False
+        return self.ttl > 0 and (time.monotonic() - self._loaded_at) < self.ttl
+
+    def refresh(self) -> bool:
+        """Caldera에서 전체 목록을 다시 받아 인덱스 재구성"""
+        with self._lock:
+            abilities = self._fetch()
+            self.stats["fetches"] += 1
+            if not isinstance(abilities, list):
+                # 실패 시 기존 인덱스 유지 (만료 상태로 두어 다음 조회 때 재시도)
+                return False
+
+            self._abilities = {}
+            self._by_technique = {}
+            self._by_parent = {}
+            self._by_platform = {}
+            self._by_executor = {}
+            for ability in abilities:
+                self._index(ability)
+
+            self._loaded_at = time.monotonic()
+            return True
+
+    def invalidate(self):
+        """다음 조회 시 강제로 재로딩"""
+        with self._lock:
+            self._loaded_at = None
+            self.stats["invalidations"] += 1
+
+    def upsert(self, ability: Dict):
+        """생성/수정된 ability를 재로딩 없이 인덱스에 반영"""
+        ability_id = ability.get("ability_id")
+        if not ability_id:
+            return
+        with self._lock:
+            if ability_id in self._abilities:
+                self._unindex(ability_id)
+            self._index(ability)
+
+    def remove(self, ability_id: str):
+        """삭제된 ability를 인덱스에서 제거"""
+        with self._lock:
+            if ability_id in self._abilities:
+                self._unindex(ability_id)
+
+    def _ensure_loaded(self):
+        with self._lock:
+            if self.is_fresh():
+                self.stats["hits"] += 1
+                return
+            self.refresh()
+
+    # ==================== 조회 ====================
+
+    def all(self) -> List[Dict]:
+        self._ensure_loaded()
+        with self._lock:
+            return list(self._abilities.values())
+
+    def get(self, ability_id: str) -> Optional[Dict]:
+        self._ensure_loaded()
+        with self._lock:
+            return self._abilities.get(ability_id)
+
+    def by_technique(self, technique_id: str) -> List[Dict]:
+        """technique_id 정확 매칭"""
+        self._ensure_loaded()
+        with self._lock:
+            return [self._abilities[a] for a in self._by_technique.get(technique_id, [])]
+
+    def by_parent(self, parent_id: str) -> List[Dict]:
+        """parent technique 및 그 sub-technique 전체"""
+        self._ensure_loaded()
+        with self._lock:
+            return [self._abilities[a] for a in self._by_parent.get(parent_id, [])]
+
+    def find(self, technique_id: Optional[str] = None,
+             platform: Optional[str] = None,
+             executor: Optional[str] = None) -> List[Dict]:
+        """technique / platform / executor 조건 교집합 조회"""
+        self._ensure_loaded()
+        with self._lock:
+            candidates = None
+            if technique_id:
+                candidates = self._by_technique.get(technique_id, [])
+            if platform and executor:
+                ids = self._by_executor.get((platform, executor), [])
+            elif platform:
+                ids = self._by_platform.get(platform, [])
+            else:
+                ids = None
+
+            if candidates is None and ids is None:
+                return list(self._abilities.values())
+            if candidates is None:
+                return [self._abilities[a] for a in ids]
+            if ids is not None:
+                allowed = set(ids)
+                candidates = [a for a in candidates if a in allowed]
+            return [self._abilities[a] for a in candidates]
+
+    # ==================== 인덱스 관리 ====================
+
+    def _index_keys(self, ability: Dict) -> Dict[str, List]:
+        technique_id = ability.get("technique_id") or ""
+        platforms = []
+        executors = []
+        for ex in ability.get("executors", []) or []:
+            platform = ex.get("platform")
+            if platform:
+                platforms.append(platform)
+                executors.append((platform, ex.get("name")))
+        return {
+            "technique": [technique_id] if technique_id else [],
+            "parent": [technique_id.split(".")[0]] if technique_id else [],
+            "platform": sorted(set(platforms)),
+            "executor": sorted(set(executors), key=str),
+        }
+
+    def _index(self, ability: Dict):
+        ability_id = ability.get("ability_id")
+        if not ability_id:
+            return
+        self._abilities[ability_id] = ability
+        keys = self._index_keys(ability)
+        for k in keys["technique"]:
+            self._by_technique.setdefault(k, []).append(ability_id)
+        for k in keys["parent"]:
+            self._by_parent.setdefault(k, []).append(ability_id)
+        for k in keys["platform"]:
+            self._by_platform.setdefault(k, []).append(ability_id)
+        for k in keys["executor"]:
+            self._by_executor.setdefault(k, []).append(ability_id)
+
+    def _unindex(self, ability_id: str):
+        ability = self._abilities.pop(ability_id)
+        keys = self._index_keys(ability)
+        for index, names in ((self._by_technique, keys["technique"]),
+                             (self._by_parent, keys["parent"]),
+                             (self._by_platform, keys["platform"]),
+                             (self._by_executor, keys["executor"])):
+            for k in names:
+                ids = index.get(k, [])
+                if ability_id in ids:
+                    ids.remove(ability_id)
+                if not ids:
+                    index.pop(k, None)
+
+
+class AgentRegistry:
+    """
+    Agent 레지스트리 (paw 키, 짧은 TTL)
+
+    get_agent(paw)마다 전체 agent 목록을 받아 선형 탐색하는 대신
+    paw 인덱스에서 조회하고, 만료된 항목은 /agents/{paw} 단건 조회로 갱신한다.
+    """
+
+    def __init__(self, fetch_all: Callable[[], Optional[List[Dict]]],
+                 fetch_one: Callable[[str], Optional[Dict]],
+                 ttl: float = 15.0):
+        """
+        Args:
+            fetch_all: 전체 agent 목록 조회 함수 (실패 시 None)
+            fetch_one: paw 단건 조회 함수 (실패 시 None)
+            ttl: 항목 유효 시간 (초)
+        """
+        self._fetch_all = fetch_all
+        self._fetch_one = fetch_one
+        self.ttl = ttl
+        self._lock = threading.RLock()
+
+        self._agents: Dict[str, Dict] = {}         # paw → agent (Caldera 응답 순서 유지)
+        self._fetched_at: Dict[str, float] = {}    # paw → 갱신 시각
+        self._list_loaded_at: Optional[float] = None
+
+        self.stats = {"list_fetches": 0, "single_fetches": 0, "hits": 0, "invalidations": 0}
+
+    def _fresh(self, loaded_at: Optional[float]) -> bool:
+        return loaded_at is not None and (time.monotonic() - loaded_at) < self.ttl
+
+    def all(self) -> List[Dict]:
+        """전체 agent 목록 (TTL 내에서는 캐시 반환)"""
+        with self._lock:
+            if self._fresh(self._list_loaded_at):
+                self.stats["hits"] += 1
+                return list(self._agents.values())
+
+            agents = self._fetch_all()
+            self.stats["list_fetches"] += 1
+            if not isinstance(agents, list):
+                return list(self._agents.values())
+
+            now = time.monotonic()
+            self._agents = {}
+            self._fetched_at = {}
+            for agent in agents:
+                paw = agent.get("paw")
+                if paw:
+                    self._agents[paw] = agent
+                    self._fetched_at[paw] = now
+            self._list_loaded_at = now
+            return list(self._agents.values())
+
+    def get(self, paw: str) -> Optional[Dict]:
+        """paw로 단건 조회 (만료 시 /agents/{paw}로만 갱신)"""
+        with self._lock:
+            if paw in self._agents and self._fresh(self._fetched_at.get(paw)):
+                self.stats["hits"] += 1
+                return self._agents[paw]
+
+            agent = self._fetch_one(paw)
+            self.stats["single_fetches"] += 1
+            if isinstance(agent, dict) and agent.get("paw") == paw:
+                self._agents[paw] = agent
+                self._fetched_at[paw] = time.monotonic()
+                return agent
+
+        # 단건 endpoint 미지원/실패 → 전체 목록으로 fallback
+        self.invalidate()
+        for agent in self.all():
+            if agent.get("paw") == paw:
+                return agent
+        return None
+
+    def update(self, agent: Dict):
+        """PATCH 응답 등으로 받은 최신 agent 정보를 반영"""
+        paw = agent.get("paw")
+        if not paw:
+            return
+        with self._lock:
+            self._agents[paw] = agent
+            self._fetched_at[paw] = time.monotonic()
+
+    def invalidate(self, paw: Optional[str] = None):
+        """paw 지정 시 해당 항목만, 아니면 전체 무효화"""
+        with self._lock:
+            self.stats["invalidations"] += 1
+            if paw:
+                self._fetched_at.pop(paw, None)
+                self._list_loaded_at = None
+            else:
+                self._fetched_at = {}
+                self._list_loaded_at = None
@@ -5,6 +5,7 @@ Agent/Ability/Operation/Adversary 관리 + Operation 생성 및 결과 분석
 """
 
 import requests
+from requests.adapters import HTTPAdapter
 import json
 from datetime import datetime
 from typing import Dict, List, Optional
@@ -15,35 +16,130 @@ import os
 # 상위 디렉토리를 path에 추가
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from dotenv import load_dotenv
-
-load_dotenv()
+from core_v3.caldera_cache import AbilityCatalog, AgentRegistry
+from core_v3.clients import load_env
+from core_v3.recorder import Cassette, CassetteMiss, get_recorder
+from core_v3.tracing import get_tracer
 
 
 class CalderaClient:
     """Caldera REST API 클라이언트 — 모든 Caldera 상호작용 담당"""
 
     def __init__(self):
+        load_env()
         self.base_url = os.getenv("CALDERA_URL", "http://192.168.50.31:8888")
         self.api_key = os.getenv("CALDERA_API_KEY", "ADMIN123")
         self.timeout = int(os.getenv("CALDERA_TIMEOUT", "30"))
 
+        # Connection pool 설정 (poll/ReAct 라운드마다 TCP 핸드셰이크 반복 방지)
+        self.pool_connections = int(os.getenv("CALDERA_POOL_CONNECTIONS", "4"))   # host별 pool 캐시 개수
+        self.pool_maxsize = int(os.getenv("CALDERA_POOL_MAXSIZE", "8"))           # host당 최대 connection 수
+        self.pool_block = os.getenv("CALDERA_POOL_BLOCK", "true").lower() == "true"
+
         self.headers = {
             "KEY": self.api_key,
-            "Content-Type": "application/json"
+            "Content-Type": "application/json",
+            "Connection": "keep-alive",
+        }
+
+        self.session = self._build_session()
+        self._request_count = 0
+        self.recorder = get_recorder()
+        self.tracer = get_tracer()
+
+        # Ability 카탈로그 (TTL 동안 /abilities 재다운로드 없이 인덱스 조회)
+        self.catalog = AbilityCatalog(
+            fetch=lambda: self._request("GET", "abilities"),
+            ttl=float(os.getenv("CALDERA_CATALOG_TTL", "300")),
+        )
+
+        # Agent 레지스트리 (paw 인덱스, 짧은 TTL)
+        self.agents = AgentRegistry(
+            fetch_all=lambda: self._request("GET", "agents"),
+            fetch_one=lambda paw: self._request("GET", f"agents/{paw}"),
+            ttl=float(os.getenv("CALDERA_AGENT_TTL", "15")),
+        )
+
+        print(f"[*] Caldera client initialized: {self.base_url} "
+              f"(pool={self.pool_maxsize}/host, keep-alive)")
+
+    def _build_session(self) -> requests.Session:
+        """keep-alive + connection pool이 설정된 requests.Session 생성"""
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            pool_block=self.pool_block,
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        session.headers.update(self.headers)
+        return session
+
+    def get_connection_stats(self) -> Dict:
+        """
+        Connection 재사용 통계 (session_info.json 기록용)
+
+        Returns:
+            {"requests": int, "connections_opened": int, "connections_reused": int, "reuse_rate": float, ...}
+        """
+        opened = 0
+        pool_requests = 0
+        for adapter in set(self.session.adapters.values()):
+            pools = adapter.poolmanager.pools
+            for key in list(pools.keys()):
+                pool = pools.get(key)
+                if pool is None:
+                    continue
+                opened += pool.num_connections
+                pool_requests += pool.num_requests
+
+        reused = max(pool_requests - opened, 0)
+        return {
+            "requests": self._request_count,
+            "connections_opened": opened,
+            "connections_reused": reused,
+            "reuse_rate": round(reused / pool_requests * 100, 1) if pool_requests else 0.0,
+            "pool_connections": self.pool_connections,
+            "pool_maxsize": self.pool_maxsize,
+            "pool_block": self.pool_block,
         }
 
-        print(f"[*] Caldera client initialized: {self.base_url}")
+    def close(self):
+        """Connection pool 정리"""
+        self.session.close()
 
     def _request(self, method: str, endpoint: str, **kwargs) -> Optional[Dict]:
-        """API 요청 헬퍼"""
+        """API 요청 헬퍼 (pooled keep-alive session 사용, record/replay 지원)"""
+        with self.tracer.span(f"{method.upper()} {endpoint}", "http") as span:
+            if self.recorder.replaying:
+                span["source"] = "replay"
+                try:
+                    return self.recorder.replay("caldera", Cassette.caldera_key(method, endpoint))
+                except CassetteMiss as e:
+                    print(f"  [!] Replay miss: {e}")
+                    return None
+
+            result = self._send(method, endpoint, **kwargs)
+            span["ok"] = result is not None
+
+        if self.recorder.recording:
+            self.recorder.record(
+                "caldera", Cassette.caldera_key(method, endpoint),
+                {"method": method, "endpoint": endpoint, "json": kwargs.get("json")},
+                result,
+            )
+        return result
+
+    def _send(self, method: str, endpoint: str, **kwargs) -> Optional[Dict]:
+        """실제 HTTP 요청 (pooled session)"""
         url = f"{self.base_url}/api/v2/{endpoint}"
+        self._request_count += 1
 
         try:
-            resp = requests.request(
+            resp = self.session.request(
                 method,
                 url,
-                headers=self.headers,
                 timeout=self.timeout,
                 **kwargs
             )
@@ -88,22 +184,20 @@ class CalderaClient:
 
     # ==================== Agents ====================
     def get_agents(self) -> List[Dict]:
-        """모든 에이전트 목록"""
-        result = self._request("GET", "agents")
-        return result if isinstance(result, list) else []
+        """모든 에이전트 목록 (레지스트리 TTL 내에서는 캐시)"""
+        return self.agents.all()
 
     def get_agent(self, paw: str) -> Optional[Dict]:
-        """특정 에이전트 조회"""
-        agents = self.get_agents()
-        for agent in agents:
-            if agent.get("paw") == paw:
-                return agent
-        return None
+        """특정 에이전트 조회 (paw 인덱스)"""
+        return self.agents.get(paw)
 
     def update_agent(self, paw: str, data: Dict) -> bool:
         """에이전트 정보(sleep, group 등) 업데이트"""
         endpoint = f"agents/{paw}"
         result = self._request("PATCH", endpoint, json=data)
+        self.agents.invalidate(paw)
+        if isinstance(result, dict) and result.get("paw") == paw:
+            self.agents.update(result)
         return result is not None
 
     def list_agents(self) -> List[Dict]:
@@ -135,26 +229,14 @@ class CalderaClient:
     # ==================== Abilities ====================
 
     def get_abilities(self, technique_id: Optional[str] = None) -> List[Dict]:
-        """Ability 목록 조회"""
-        abilities = self._request("GET", "abilities")
-        if not isinstance(abilities, list):
-            return []
-
+        """Ability 목록 조회 (카탈로그 인덱스 사용)"""
         if technique_id:
-            abilities = [
-                a for a in abilities
-                if a.get("technique_id") == technique_id
-            ]
-
-        return abilities
+            return self.catalog.by_technique(technique_id)
+        return self.catalog.all()
 
     def get_ability(self, ability_id: str) -> Optional[Dict]:
         """특정 Ability 조회"""
-        abilities = self.get_abilities()
-        for ability in abilities:
-            if ability.get("ability_id") == ability_id:
-                return ability
-        return None
+        return self.catalog.get(ability_id)
 
     def get_abilities_with_fallback(self, technique_id: str, enable_fallback: bool = True) -> Dict:
         """Technique ID로 Ability 조회 (Parent Technique Fallback 지원)"""
@@ -277,6 +359,7 @@ class CalderaClient:
 
         if result and result.get("ability_id"):
             print(f"  ✓ Ability created: {result['ability_id']}")
+            self.catalog.upsert(result)
             return result
         else:
             print(f"  [!] Failed to create ability")
@@ -287,9 +370,21 @@ class CalderaClient:
         result = self._request("DELETE", f"abilities/{ability_id}")
         if result is not None:
             print(f"  ✓ Ability deleted: {ability_id}")
+            self.catalog.remove(ability_id)
             return True
         return False
 
+    def update_ability(self, ability_id: str, data: Dict) -> Optional[Dict]:
+        """Ability 부분 수정 (PATCH) — 카탈로그에도 반영"""
+        result = self._request("PATCH", f"abilities/{ability_id}", json=data)
+        if result is None:
+            return None
+        if isinstance(result, dict) and result.get("ability_id"):
+            self.catalog.upsert(result)
+        else:
+            self.catalog.invalidate()
+        return result
+
     def select_best_ability(self, abilities: List[Dict],
                            prefer_low_privilege: bool = True,
                            platform: Optional[str] = None,
@@ -410,8 +505,21 @@ class CalderaClient:
         """특정 오퍼레이션 조회"""
         return self._request("GET", f"operations/{operation_id}")
 
+    def get_operation_link_list(self, operation_id: str) -> Optional[List[Dict]]:
+        """
+        per-operation links endpoint 조회 (host_group/adversary/source 없이 link만 전송)
+
+        Returns:
+            link 목록 or None (endpoint 미지원/실패)
+        """
+        result = self._request("GET", f"operations/{operation_id}/links")
+        return result if isinstance(result, list) else None
+
     def get_operation_links(self, operation_id: str) -> List[Dict]:
         """오퍼레이션의 실행된 링크(명령) 목록"""
+        links = self.get_operation_link_list(operation_id)
+        if links is not None:
+            return links
         op = self.get_operation(operation_id)
         if op:
             return op.get("chain", [])
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Session Checkpoint
+Pipeline.run 세션의 phase 진행 상태를 session_dir/checkpoint.json에 기록해
+중단(crash, Ctrl-C) 후 --resume <session_dir>로 완료된 phase를 건너뛰고 이어서 실행한다.
+
+phase 산출물(01~07 JSON)은 그대로 재사용하고, checkpoint에는 산출물에 없는 실행 상태
+(선택된 agent, platform, operation ID, 생성한 Caldera 객체 목록 등)만 저장한다.
+
+"runs"에는 run(배치 stage / --resume)별 timing 요약과 LLM 캐시·structured output·스트리밍 카운터 증분을
+남겨, 마지막 run이 session_info.json / trace.json을 쓸 때 세션 전체 기준으로 합친다.
+"""
+
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+
+
+# 완료 순서 — mark(phase)는 해당 phase까지 끝났음을 의미
+PHASES = [
+    "started",      # 세션 디렉토리 생성
+    "parsed",       # Phase 1   → 01_parsed_scenario.json
+    "validated",    # Phase 2~2.5 → 02_validated_scenario.json (SVO 포함)
+    "abilities",    # Phase 3   → 03_ability_acquisition.json
+    "operation",    # Phase 4   → 04_attack_chain.json, 05_created_operation.json
+    "results",      # Phase 5   → 06_operation_results.json
+    "react",        # Phase 6   → 07_react_summary.json
+    "complete",     # session_info.json
+]
+
+
+def add_counters(base: Dict, other: Dict, sign: int = 1) -> Dict:
+    """중첩 dict의 숫자 카운터를 base + sign × other로 합침 (문자열/bool 값은 base 유지)"""
+    result = dict(base)
+    for key, value in other.items():
+        if isinstance(value, dict):
+            result[key] = add_counters(base.get(key) or {}, value, sign)
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            current = base.get(key, 0)
+            if isinstance(current, (int, float)) and not isinstance(current, bool):
+                result[key] = current + sign * value
+    return result
+
+
+class SessionCheckpoint:
+    """checkpoint.json 읽기/쓰기 (쓰기는 임시 파일 → rename으로 원자적)"""
+
+    FILENAME = "checkpoint.json"
+
+    def __init__(self, session_dir: Path, state: Optional[Dict] = None):
+        self.session_dir = Path(session_dir)
+        self.state = state or {"phase": None}
+
+    @classmethod
+    def load(cls, session_dir: Path) -> Optional["SessionCheckpoint"]:
+        path = Path(session_dir) / cls.FILENAME
+        if not path.exists():
+            return None
+        with open(path, encoding="utf-8") as f:
+            return cls(session_dir, json.load(f))
+
+    @property
+    def phase(self) -> Optional[str]:
+        return self.state.get("phase")
+
+    def done(self, phase: str) -> bool:
+        current = self.phase
+        return current is not None and PHASES.index(current) >= PHASES.index(phase)
+
+    def get(self, key: str, default=None):
+        return self.state.get(key, default)
+
+    def mark(self, phase: str, **state):
+        """phase 완료 기록 + 상태 갱신"""
+        self.state.update(state)
+        self.state["phase"] = phase
+        self.state["updated_at"] = datetime.now().isoformat()
+        self.save()
+
+    def rollback(self, phase: str):
+        """phase부터 다시 실행하도록 완료 표시를 되돌림"""
+        index = PHASES.index(phase)
+        if self.phase is not None and PHASES.index(self.phase) >= index:
+            self.state["phase"] = PHASES[index - 1]
+            self.save()
+
+    def artifact(self, filename: str) -> Optional[Dict]:
+        """세션 디렉토리의 phase 산출물 로드 (없거나 손상되면 None)"""
+        path = self.session_dir / filename
+        try:
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def save(self):
+        path = self.session_dir / self.FILENAME
+        tmp = path.with_suffix(".json.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.state, f, indent=2, ensure_ascii=False)
+        os.replace(tmp, path)
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Client Registry
+core_v3 컴포넌트가 공유하는 설정 / 클라이언트의 프로세스 전역 레지스트리 (첫 사용 시 생성).
+
+  - load_env / get_settings: .env는 한 번만 로드, OLLAMA_HOST / LLM_MODEL / CALDERA_AGENT_URL 일괄 조회
+  - get_caldera_client: CalderaClient 1개 — connection pool, AbilityCatalog, AgentRegistry를
+    ScenarioProcessor / AbilityGenerator / ReactAgent / Pipeline이 같이 사용
+    (한 컴포넌트가 ability를 생성/수정/삭제하면 다른 컴포넌트의 카탈로그 조회에도 바로 반영)
+  - get_llm_client: LLMClient(Ollama client + 응답 캐시) 1개
+
+환경 변수를 바꾼 뒤 새 클라이언트가 필요하면 reset_clients()
+"""
+
+import os
+import threading
+from dataclasses import dataclass
+from typing import Optional
+
+from dotenv import load_dotenv
+
+
+_lock = threading.RLock()
+_env_loaded = False
+_settings: Optional["Settings"] = None
+_caldera_client = None
+_llm_client = None
+
+
+@dataclass(frozen=True)
+class Settings:
+    llm_host: str
+    llm_model: str
+    caldera_url: str
+    caldera_agent_url: str      # agent가 접속하는 C2 주소 (ability 명령어에 삽입)
+
+
+def load_env():
+    """프로젝트 .env 로드 (프로세스당 1회)"""
+    global _env_loaded
+    with _lock:
+        if not _env_loaded:
+            load_dotenv()
+            _env_loaded = True
+
+
+def get_settings() -> Settings:
+    global _settings
+    with _lock:
+        if _settings is None:
+            load_env()
+            caldera_url = os.getenv("CALDERA_URL", "http://192.168.50.31:8888")
+            _settings = Settings(
+                llm_host=os.getenv("OLLAMA_HOST", "http://192.168.50.252:11434"),
+                llm_model=os.getenv("LLM_MODEL", "gpt-oss:120b"),
+                caldera_url=caldera_url,
+                caldera_agent_url=os.getenv("CALDERA_AGENT_URL", caldera_url),
+            )
+        return _settings
+
+
+def get_caldera_client():
+    """프로세스 전역 CalderaClient"""
+    global _caldera_client
+    with _lock:
+        if _caldera_client is None:
+            from core_v3.caldera_client import CalderaClient
+            load_env()
+            _caldera_client = CalderaClient()
+        return _caldera_client
+
+
+def get_llm_client():
+    """프로세스 전역 LLMClient"""
+    global _llm_client
+    with _lock:
+        if _llm_client is None:
+            from core_v3.llm_client import LLMClient
+            _llm_client = LLMClient(host=get_settings().llm_host)
+        return _llm_client
+
+
+def reset_clients():
+    """설정과 공유 클라이언트 폐기 (다음 get_* 호출 시 현재 환경 변수로 다시 생성)"""
+    global _settings, _caldera_client, _llm_client
+    with _lock:
+        if _caldera_client is not None:
+            _caldera_client.session.close()
+        _settings = None
+        _caldera_client = None
+        _llm_client = None
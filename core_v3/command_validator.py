@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Command Validator
+Caldera에 제출하기 전 psh / sh / cmd 명령어를 정적으로 검사하는 pre-flight validator.
+agent 왕복(30초+) 후에야 드러나는 quoting/문법 오류를 로컬에서 수 ms 안에 걸러낸다.
+
+검사 항목:
+  - 단일 라인 (Caldera는 실행 시 개행을 제거)
+  - 따옴표 / 괄호 균형 (executor별 escape 규칙 반영)
+  - Caldera 변수 문법: #{server}, #{paw} … (#{{server}}, #{ server }, 닫히지 않은 #{ 는 오류)
+  - 전역 변수가 아닌 fact 변수 (#{host.dir} 등 — operation fact source에 없으면 link가 생성되지 않음, 경고)
+  - 채워지지 않은 placeholder (<path>, <filename>)
+  - PowerShell 5.1 한정: && / || 구분자, 읽기 전용 자동 변수 대입($pid=), \" escape
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Iterable, List, Optional
+
+
+# Caldera가 link 생성 시 직접 채우는 전역 변수
+CALDERA_GLOBAL_VARIABLES = {"server", "paw", "group", "location", "exe_name",
+                            "upstream_dest", "origin_link_id"}
+
+# PowerShell 읽기 전용 / 상수 자동 변수 (대입 시 VariableNotWritable)
+PSH_READONLY_VARIABLES = {"pid", "host", "true", "false", "null", "shellid", "pshome"}
+
+_CALDERA_VAR = re.compile(r"#\{([^{}]*)\}")
+_PLACEHOLDER = re.compile(r"<(?:path|file|filename|file_?path|url|ip|host|user(?:name)?|password|domain|"
+                          r"target|payload|dir(?:ectory)?)>", re.IGNORECASE)
+
+
+@dataclass
+class ValidationIssue:
+    """검사 결과 항목"""
+    code: str
+    severity: str      # error | warning
+    message: str
+
+
+@dataclass
+class ValidationResult:
+    command: str
+    executor: str
+    issues: List[ValidationIssue] = field(default_factory=list)
+
+    @property
+    def errors(self) -> List[ValidationIssue]:
+        return [i for i in self.issues if i.severity == "error"]
+
+    @property
+    def warnings(self) -> List[ValidationIssue]:
+        return [i for i in self.issues if i.severity == "warning"]
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+    def feedback(self) -> str:
+        """LLM 재프롬프트용 문제 목록"""
+        return "\n".join(f"- [{i.severity}] {i.message}" for i in self.issues)
+
+    def to_dict(self) -> dict:
+        return {"ok": self.ok, "issues": [{"code": i.code, "severity": i.severity,
+                                           "message": i.message} for i in self.issues]}
+
+
+class CommandValidator:
+    """executor별 정적 명령어 검사기 (LLM/네트워크 호출 없음)"""
+
+    def __init__(self, allowed_variables: Optional[Iterable[str]] = None):
+        self.allowed_variables = set(CALDERA_GLOBAL_VARIABLES) | set(allowed_variables or [])
+        self.stats = {"checked": 0, "failed": 0, "reprompted": 0, "repaired": 0, "rejected": 0}
+
+    @staticmethod
+    def executor_for(platform: str) -> str:
+        return "psh" if platform == "windows" else "sh"
+
+    # ==================== 메인 ====================
+
+    def validate(self, command: str, executor: str = "psh") -> ValidationResult:
+        result = ValidationResult(command=command, executor=executor)
+        issues = result.issues
+        self.stats["checked"] += 1
+
+        if not command or not command.strip():
+            issues.append(ValidationIssue("empty", "error", "Command is empty"))
+            self.stats["failed"] += 1
+            return result
+
+        if "\n" in command or "\r" in command:
+            issues.append(ValidationIssue(
+                "multi_line", "error",
+                "Command spans multiple lines — Caldera strips newlines; chain statements with ';' on one line"))
+
+        issues.extend(self._check_caldera_variables(command))
+
+        if _PLACEHOLDER.search(command):
+            issues.append(ValidationIssue(
+                "placeholder", "error",
+                f"Unfilled placeholder '{_PLACEHOLDER.search(command).group(0)}' — replace it with a concrete value"))
+
+        # Caldera 변수는 실행 전에 치환되므로 quoting 검사에서는 일반 토큰으로 취급
+        body = _CALDERA_VAR.sub("CALDERAVAR", command)
+        issues.extend(self._check_balance(body, executor))
+
+        if executor == "psh":
+            issues.extend(self._check_powershell(body))
+
+        if not result.ok:
+            self.stats["failed"] += 1
+        return result
+
+    # ==================== Caldera 변수 ====================
+
+    def _check_caldera_variables(self, command: str) -> List[ValidationIssue]:
+        issues = []
+        if "#{{" in command:
+            issues.append(ValidationIssue(
+                "caldera_var_double_brace", "error",
+                "Caldera variables use single braces: write #{server}, not #{{server}}"))
+        for name in _CALDERA_VAR.findall(command.replace("#{{", "#{").replace("}}", "}")):
+            if name != name.strip() or not name.strip():
+                issues.append(ValidationIssue(
+                    "caldera_var_syntax", "error",
+                    f"Malformed Caldera variable '#{{{name}}}' — no spaces inside the braces"))
+            elif not re.fullmatch(r"[\w.\-]+", name):
+                issues.append(ValidationIssue(
+                    "caldera_var_syntax", "error", f"Malformed Caldera variable '#{{{name}}}'"))
+            elif name not in self.allowed_variables:
+                issues.append(ValidationIssue(
+                    "caldera_var_unknown", "warning",
+                    f"'#{{{name}}}' is not a Caldera global variable — unless the operation's fact source "
+                    f"provides it, Caldera will never create the link. Prefer #{{server}} / #{{paw}} or concrete values"))
+        stripped = _CALDERA_VAR.sub("", command.replace("#{{", "#{").replace("}}", "}"))
+        if "#{" in stripped:
+            issues.append(ValidationIssue(
+                "caldera_var_unclosed", "error", "Unclosed Caldera variable '#{' — missing '}'"))
+        return issues
+
+    # ==================== 따옴표 / 괄호 ====================
+
+    @staticmethod
+    def _check_balance(body: str, executor: str) -> List[ValidationIssue]:
+        """executor별 escape 규칙으로 따옴표 / 괄호 균형 검사 (따옴표 안의 괄호는 무시)"""
+        pairs = {")": "(", "]": "[", "}": "{"}
+        quotes = ('"',) if executor == "cmd" else ("'", '"')
+        stack = []
+        quote = None
+        i = 0
+        while i < len(body):
+            ch = body[i]
+            if quote:
+                if executor == "psh" and ch == "`" and quote == '"':
+                    i += 2
+                    continue
+                if executor == "psh" and ch == quote and body[i + 1:i + 2] == quote:
+                    i += 2      # '' / "" escape
+                    continue
+                if executor == "sh" and ch == "\\" and quote == '"':
+                    i += 2
+                    continue
+                if ch == quote:
+                    quote = None
+            else:
+                if executor == "sh" and ch == "\\":
+                    i += 2
+                    continue
+                if executor == "psh" and ch == "`":
+                    i += 2
+                    continue
+                if executor == "cmd" and ch == "^":
+                    i += 2
+                    continue
+                if ch in quotes:
+                    quote = ch
+                elif executor != "cmd" and ch in "([{":
+                    stack.append(ch)
+                elif executor != "cmd" and ch in pairs:
+                    if not stack or stack.pop() != pairs[ch]:
+                        return [ValidationIssue("unbalanced_bracket", "error",
+                                                f"Unmatched '{ch}' at position {i}")]
+            i += 1
+
+        issues = []
+        if quote:
+            issues.append(ValidationIssue(
+                "unterminated_string", "error",
+                f"The string is missing the terminator: {quote} — quotes are unbalanced"))
+        if stack:
+            issues.append(ValidationIssue(
+                "unbalanced_bracket", "error", f"Unclosed '{stack[-1]}' — brackets are unbalanced"))
+        return issues
+
+    # ==================== PowerShell ====================
+
+    @staticmethod
+    def _outside_quotes(body: str) -> str:
+        """따옴표 안의 내용을 지운 문자열 (구분자 / 대입 검사용)"""
+        return re.sub(r"'[^']*'|\"(?:`.|[^\"`])*\"", "''", body)
+
+    def _check_powershell(self, body: str) -> List[ValidationIssue]:
+        issues = []
+        bare = self._outside_quotes(body)
+
+        if re.search(r"&&|\|\|", bare):
+            issues.append(ValidationIssue(
+                "psh_chain_operator", "error",
+                "'&&' / '||' are not valid statement separators in Windows PowerShell 5.1 — use ';'"))
+
+        for name in re.findall(r"\$(\w+)\s*=(?!=)", bare):
+            if name.lower() in PSH_READONLY_VARIABLES:
+                issues.append(ValidationIssue(
+                    "psh_readonly_variable", "error",
+                    f"${name} is a read-only automatic variable — use a different variable name"))
+
+        if '\\"' in body:
+            issues.append(ValidationIssue(
+                "psh_backslash_escape", "warning",
+                "PowerShell does not escape quotes with '\\\"' — use `\" or '' inside strings, "
+                "or switch the outer quote type"))
+
+        for literal in re.findall(r"'([^']*)'", body):
+            if re.search(r"\$(env:)?\w+", literal) and "CALDERAVAR" not in literal:
+                issues.append(ValidationIssue(
+                    "psh_single_quote_variable", "warning",
+                    f"Variable inside single quotes is not expanded: '{literal[:60]}'"))
+                break
+
+        if re.search(r"\bpowershell(\.exe)?\b[^;|]*\s-(c|command)\s+[\"']", body, re.IGNORECASE):
+            issues.append(ValidationIssue(
+                "psh_nested_shell", "warning",
+                "Nested 'powershell -Command \"...\"' adds a quoting layer — the psh executor already runs PowerShell"))
+
+        if re.search(r"(^|;)\s*#(?!\{)", bare):
+            issues.append(ValidationIssue(
+                "psh_comment", "warning",
+                "'#' comment on a single-line command comments out everything after it"))
+        return issues
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Failure Classifier
+link stdout/stderr를 컴파일된 패턴으로 분류하는 규칙 기반 fast path (LLM 호출 없음).
+
+  - ReAct LLM 호출 전에 failure_type(verb/object/subject/syntax/env)을 미리 판정해 프롬프트에 주입
+  - 수정 불가로 알려진 유형(agent 프로세스 spawn 거부, 권한 에러 반복)은 LLM 호출 생략
+
+규칙은 우선순위 순서로 나열되며, 규칙별로 컴파일된 정규식을 순서대로 검사해 처음 매칭된 규칙을 고른다.
+(모든 규칙을 하나의 alternation 정규식으로 합친 1회 스캔은 벤치마크에서 오히려 느렸다 — 수치는 아래
+ 벤치마크가 두 방식을 함께 출력. 리터럴 prefix 최적화가 사라지고, 겹치는 매칭은 위치 순으로 가려져
+ 우선순위 처리도 복잡해진다)
+
+벤치마크 (기록된 link 출력 코퍼스):
+    python -m core_v3.failure_classifier results/session_*/
+"""
+
+import json
+import re
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+
+@dataclass
+class FailureRule:
+    name: str
+    failure_type: str    # verb_failure | object_failure | subject_failure | syntax_failure | env_failure
+    pattern: str
+    fixable: bool
+    hint: str
+
+
+@dataclass
+class Classification:
+    rule: str
+    failure_type: str
+    fixable: bool
+    hint: str
+    evidence: str        # 매칭된 출력 조각
+
+    def prompt_block(self) -> str:
+        """ReAct user prompt에 붙이는 사전 분류 블록"""
+        return (f"RULE-BASED PRE-CLASSIFICATION: {self.failure_type} ({self.rule}) — "
+                f"matched \"{self.evidence}\"\nHINT: {self.hint}")
+
+    def to_dict(self) -> Dict:
+        return {"rule": self.rule, "failure_type": self.failure_type,
+                "fixable": self.fixable, "evidence": self.evidence}
+
+
+# 우선순위 순 — 앞선 규칙이 이긴다 (예: fork/exec access denied는 일반 권한 에러보다 먼저)
+RULES = [
+    FailureRule(
+        "agent_spawn_denied", "env_failure",
+        r"fork/exec [^\n]*?: access is denied",
+        False, "The Caldera agent itself cannot spawn the executor process — no command change can fix this."),
+    FailureRule(
+        "psh_parse_error", "syntax_failure",
+        r"missing the terminator|missing closing '[)}\]]'|unexpected token|missing expression after|"
+        r"is not a valid statement separator|parsererror|incomplete string token",
+        True, "PowerShell could not parse the command — fix quoting/brackets, chain statements with ';', "
+              "avoid nested quotes."),
+    FailureRule(
+        "variable_not_writable", "syntax_failure",
+        r"cannot overwrite variable \w+ because|variablenotwritable",
+        True, "The command assigns to a read-only automatic variable (e.g. $pid) — rename the variable."),
+    FailureRule(
+        "invalid_arguments", "syntax_failure",
+        r"invalid syntax|no value specified for|a parameter cannot be found that matches parameter name|"
+        r"missing an argument for parameter|invalid argument/option|positional parameter cannot be found|"
+        r"cannot bind parameter|syntax error near unexpected token|unterminated quoted string",
+        True, "The tool rejected its arguments — check option names/values for this tool and platform."),
+    FailureRule(
+        "command_not_found", "verb_failure",
+        r"is not recognized as the name of a cmdlet|is not recognized as an internal or external command|"
+        r"commandnotfoundexception|: command not found|(?:^|\n)(?:ba|da|z)?sh: (?:\d+: )?\S+: not found",
+        True, "The tool/cmdlet does not exist on the target — use a built-in equivalent that performs the same verb."),
+    FailureRule(
+        "permission_denied", "subject_failure",
+        r"access (?:is )?denied|permission denied|operation not permitted|requires elevation|"
+        r"not have enough privilege|run as administrator|unauthorizedaccessexception|"
+        r"\(401\) unauthorized|\(403\) forbidden",
+        True, "The agent lacks privileges — target a user-accessible object or location instead of elevating."),
+    FailureRule(
+        "network_unreachable", "env_failure",
+        r"unable to connect to the remote server|no such host is known|could not resolve host|"
+        r"remote name could not be resolved|network path was not found|connection refused|"
+        r"actively refused|network is unreachable|no route to host",
+        True, "The target host/service is unreachable from the agent — check the host/URL/port in the command "
+              "and use an address reachable from the target (e.g. the C2 server from the environment context)."),
+    FailureRule(
+        "domain_unavailable", "object_failure",
+        r"domain (?:either )?does not exist or could not be contacted|"
+        r"specified domain either does not exist|not (?:joined|connected) to a domain",
+        True, "No domain is reachable — reduce the object scope to the local machine (e.g. local accounts/groups)."),
+    FailureRule(
+        "http_not_found", "object_failure",
+        r"\(404\) not found|404 not found|http(?:/1\.[01])? 404|status(?:code)?[\"']?\s*[:=]\s*404",
+        True, "The remote resource does not exist — for Caldera payloads use #{server}/file/download with the "
+              "file header, or a path the server actually serves."),
+    FailureRule(
+        "path_not_found", "object_failure",
+        r"cannot find path|cannot find the (?:file|path) specified|could not find (?:file|a part of the path)|"
+        r"itemnotfoundexception|no such file or directory|does not exist|cannot find a process with the name|"
+        r"could not find \S+",
+        True, "The target object is missing — create it inline first or pick an object that exists."),
+    FailureRule(
+        "missing_module", "env_failure",
+        r"module .* could not be loaded|is not installed|no module named|running scripts is disabled|"
+        r"requires a newer version|cannot load file or assembly|the specified module .* was not loaded",
+        True, "A required module/tool is unavailable — use built-in OS tools only."),
+    FailureRule(
+        "timeout", "env_failure",
+        r"timed out|timeout expired|operation has timed out|exit_code[\"']?\s*:\s*[\"']?124\b",
+        True, "The command did not finish — avoid interactive/GUI programs and long scans; narrow the scope."),
+]
+
+
+class FailureClassifier:
+    """우선순위 순 컴파일 정규식 기반 실패 분류기"""
+
+    MAX_SCAN_CHARS = 4000    # 긴 출력은 앞부분만 검사 (에러 메시지는 앞쪽에 위치)
+
+    def __init__(self, rules: List[FailureRule] = None):
+        self.rules = list(rules or RULES)
+        self._compiled = [re.compile(rule.pattern, re.IGNORECASE) for rule in self.rules]
+        self.stats = {"classified": 0, "unclassified": 0, "unfixable": 0, "skipped_llm": 0, "by_type": {}}
+
+    def classify(self, output: str, attempts: List = None) -> Optional[Classification]:
+        """
+        Args:
+            output: link 출력 (stdout/stderr JSON 문자열 포함)
+            attempts: 이전 FixAttempt 목록 — 권한 에러가 이미 한 번 subject_failure로 수정됐으면 수정 불가로 판정
+
+        Returns:
+            Classification or None (어떤 규칙에도 매칭되지 않음)
+        """
+        text = (output or "")[:self.MAX_SCAN_CHARS]
+        rule, match = None, None
+        for candidate, pattern in zip(self.rules, self._compiled):
+            match = pattern.search(text)
+            if match:
+                rule = candidate
+                break
+
+        if rule is None:
+            self.stats["unclassified"] += 1
+            return None
+
+        fixable, hint = rule.fixable, rule.hint
+        if rule.failure_type == "subject_failure" and any(
+                getattr(a, "failure_type", "") == "subject_failure" for a in attempts or []):
+            fixable = False
+            hint = "Permission error persists after a privilege-focused fix — needs an ability-level change."
+
+        self.stats["classified"] += 1
+        self.stats["by_type"][rule.failure_type] = self.stats["by_type"].get(rule.failure_type, 0) + 1
+        if not fixable:
+            self.stats["unfixable"] += 1
+        return Classification(rule=rule.name, failure_type=rule.failure_type, fixable=fixable,
+                              hint=hint, evidence=match.group(0)[:80])
+
+    def classify_combined(self, output: str) -> Optional[str]:
+        """단일 alternation 정규식 1회 스캔 (벤치마크 비교용) → 규칙 이름"""
+        if not hasattr(self, "_combined"):
+            self._combined = re.compile(
+                "|".join(f"(?P<r{i}>{rule.pattern})" for i, rule in enumerate(self.rules)),
+                re.IGNORECASE,
+            )
+        indexes = [int(m.lastgroup[1:]) for m in self._combined.finditer((output or "")[:self.MAX_SCAN_CHARS])]
+        return self.rules[min(indexes)].name if indexes else None
+
+
+# ==================== 벤치마크 ====================
+
+# 코퍼스가 없을 때 사용하는 기본 샘플 (연구 노트 / fake_caldera에 기록된 실제 link 출력, 기대 failure_type)
+SAMPLE_OUTPUTS = [
+    ("The term 'Invoke-Thing' is not recognized as the name of a cmdlet, function, script file, "
+     "or operable program.", "verb_failure"),
+    ("'sc' is not recognized as an internal or external command, operable program or batch file.", "verb_failure"),
+    ("Cannot find path 'C:\\Users\\Public\\data.txt' because it does not exist.", "object_failure"),
+    ("Could not find lsass.dmp", "object_failure"),
+    ("The system cannot find the file specified.", "object_failure"),
+    ("The remote server returned an error: (404) Not Found.", "object_failure"),
+    ("System error 1355 has occurred. The specified domain either does not exist or could not be contacted.",
+     "object_failure"),
+    ("The string is missing the terminator: \".", "syntax_failure"),
+    ("Missing closing '}' in statement block or type definition.", "syntax_failure"),
+    ("ERROR: Invalid syntax. Mandatory option 'sc' is missing.", "syntax_failure"),
+    ("ERROR: No value specified for /ST option.", "syntax_failure"),
+    ("Cannot overwrite variable PID because it is read-only or constant.", "syntax_failure"),
+    ("The token '&&' is not a valid statement separator in this version.", "syntax_failure"),
+    ("Access is denied.", "subject_failure"),
+    ("Copy-Item : Access to the path 'C:\\Windows\\System32\\config\\SAM' is denied. "
+     "UnauthorizedAccessException", "subject_failure"),
+    ("fork/exec C:\\Windows\\System32\\WindowsPowerShell\\v1.0\\powershell.exe: Access is denied. "
+     "exit_code: -1", "env_failure"),
+    ("Unable to connect to the remote server", "env_failure"),
+    ("Get-ChildItem : The network path was not found.", "env_failure"),
+    ("Import-Module : The specified module 'ActiveDirectory' was not loaded because no valid module file "
+     "was found in any module directory.", "env_failure"),
+    ("Timeout expired waiting for process mstsc.exe", "env_failure"),
+    ("sh: 1: ldapsearch: not found", "verb_failure"),
+    ("bash: line 1: nmap: command not found", "verb_failure"),
+    ("urllib.error.HTTPError: HTTP Error: Not Found", None),
+    ('{"stdout": "", "stderr": "", "exit_code": "1"}', None),
+]
+
+
+def _load_corpus(paths: List[str]) -> List[Tuple[str, Optional[str]]]:
+    """
+    세션 결과에서 실패 link 출력 수집
+
+    - 07_react_summary.json: fixes[].error (+ LLM이 분류한 failure_type을 기대값으로)
+    - 06_operation_results.json: status != 0 link의 output (기대값 없음)
+    """
+    corpus = []
+    files = []
+    for p in map(Path, paths):
+        if p.is_dir():
+            files += sorted(p.rglob("07_react_summary.json")) + sorted(p.rglob("06_operation_results.json"))
+        elif p.exists():
+            files.append(p)
+    for f in files:
+        try:
+            data = json.loads(f.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            continue
+        if "rounds" in data:
+            for rnd in data["rounds"]:
+                for fix in rnd.get("fixes", []):
+                    if fix.get("error"):
+                        label = fix.get("failure_type")
+                        corpus.append((fix["error"], label if label and label != "unknown" else None))
+        else:
+            for link in data.get("links", []):
+                output = link.get("output") or ""
+                if link.get("status") not in (0, None) and output not in ("", "True", "False"):
+                    corpus.append((output, None))
+    return corpus
+
+
+def benchmark(corpus: List[Tuple[str, Optional[str]]], repeat: int = 200) -> Dict:
+    classifier = FailureClassifier()
+    outputs = [o for o, _ in corpus]
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        results = [classifier.classify(o) for o in outputs]
+    per_rule_us = (time.perf_counter() - start) / (repeat * len(outputs)) * 1e6
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        combined = [classifier.classify_combined(o) for o in outputs]
+    combined_us = (time.perf_counter() - start) / (repeat * len(outputs)) * 1e6
+
+    labeled = [(r, label) for r, (_, label) in zip(results, corpus) if label]
+    by_type: Dict[str, int] = {}
+    for r in results:
+        key = r.failure_type if r else "unclassified"
+        by_type[key] = by_type.get(key, 0) + 1
+
+    return {
+        "outputs": len(outputs),
+        "classified": sum(1 for r in results if r),
+        "unfixable": sum(1 for r in results if r and not r.fixable),
+        "by_type": by_type,
+        "labeled": len(labeled),
+        "label_agreement": sum(1 for r, label in labeled if r and r.failure_type == label),
+        "rule_mismatch_vs_combined": sum(1 for r, c in zip(results, combined) if (r.rule if r else None) != c),
+        "per_rule_us": round(per_rule_us, 2),
+        "combined_us": round(combined_us, 2),
+    }
+
+
+if __name__ == "__main__":
+    corpus = _load_corpus(sys.argv[1:]) if len(sys.argv) > 1 else []
+    source = f"{len(corpus)} recorded link outputs" if corpus else "built-in sample outputs"
+    if not corpus:
+        corpus = SAMPLE_OUTPUTS
+
+    report = benchmark(corpus)
+    print(f"[*] Failure classifier benchmark — {source}")
+    print(f"  ✓ Classified:   {report['classified']}/{report['outputs']} "
+          f"({report['classified'] / max(report['outputs'], 1):.0%})")
+    print(f"  ✓ Unfixable:    {report['unfixable']} (LLM calls skipped)")
+    print(f"  ✓ By type:      {report['by_type']}")
+    if report["labeled"]:
+        print(f"  ✓ Agreement:    {report['label_agreement']}/{report['labeled']} with expected failure_type")
+    print(f"  ✓ Latency:      {report['per_rule_us']:.1f} µs/output (per-rule scan), "
+          f"{report['combined_us']:.1f} µs/output (single alternation regex)")
+    if report["rule_mismatch_vs_combined"]:
+        print(f"  [!] {report['rule_mismatch_vs_combined']} outputs resolved to a different rule "
+              f"with the single alternation regex")
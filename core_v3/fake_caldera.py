@@ -0,0 +1,490 @@
+#!/usr/bin/env python3
+"""
+Fake Caldera Server
+로컬에서 띄우는 Caldera v2 REST API 대역(stand-in). 실제 C2 서버/agent 없이
+CalderaClient와 Pipeline의 부하·규모 특성을 측정하기 위한 용도.
+
+지원 endpoint (/api/v2):
+  abilities, abilities/{id}, adversaries, adversaries/{id}, agents, agents/{paw},
+  operations, operations/{id}, operations/{id}/links, operations/{id}/links/{id}/result, payloads
+
+Agent 시뮬레이션:
+  - agent별 sleep(beacon 주기) 후 link 수집 → link_latency 동안 실행 → 성공/실패
+  - 실패 여부는 (seed, ability_id, command) 해시로 결정 → 같은 command는 항상 같은 결과,
+    ReAct가 command를 수정하면 결과가 바뀔 수 있음
+
+Usage:
+    python -m core_v3.fake_caldera --port 8888 --agents 200 --abilities 5000 --failure-rate 0.3
+    python -m core_v3.fake_caldera --error-outputs stderr_corpus.json   # 실패 link 출력 교체
+    CALDERA_URL=http://127.0.0.1:8888 python run.py scenarios/APT29_scenario.md
+"""
+
+import argparse
+import base64
+import hashlib
+import json
+import random
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+
+ERROR_OUTPUTS = [
+    "The term 'Invoke-Thing' is not recognized as the name of a cmdlet, function, script file, or operable program.",
+    "Cannot find path 'C:\\Users\\Public\\data.txt' because it does not exist.",
+    "The string is missing the terminator: \".",
+    "Access is denied.",
+    "Unable to connect to the remote server",
+    "The remote server returned an error: (404) Not Found.",
+    "Missing closing '}' in statement block or type definition.",
+]
+
+PLATFORM_EXECUTORS = {"windows": ["psh", "cmd"], "linux": ["sh"], "darwin": ["sh"]}
+
+TACTICS = ["discovery", "execution", "persistence", "privilege-escalation", "defense-evasion",
+           "credential-access", "collection", "lateral-movement", "exfiltration", "command-and-control"]
+
+
+@dataclass
+class FakeConfig:
+    agents: int = 1
+    abilities: int = 500
+    platform: str = "windows"
+    sleep_min: float = 3
+    sleep_max: float = 5
+    link_latency: float = 2.0
+    failure_rate: float = 0.3
+    speed: float = 1.0          # 시뮬레이션 시간 배속 (10이면 10배 빠름)
+    seed: int = 0
+    api_key: Optional[str] = None
+    error_outputs: List[str] = field(default_factory=lambda: list(ERROR_OUTPUTS))   # 실패 link 출력 후보
+
+
+def load_error_outputs(path: Path) -> List[str]:
+    """
+    실패 link 출력 corpus 로드 (분류기/fix store 실험용)
+    JSON 문자열 배열이면 항목별 (여러 줄 stderr 가능), 아니면 비어 있지 않은 줄마다 하나
+    """
+    text = Path(path).read_text(encoding="utf-8")
+    try:
+        data = json.loads(text)
+    except ValueError:
+        data = None
+    if isinstance(data, list) and all(isinstance(item, str) for item in data):
+        outputs = [item for item in data if item.strip()]
+    else:
+        outputs = [line.rstrip() for line in text.splitlines() if line.strip()]
+    if not outputs:
+        raise ValueError(f"No error outputs in {path}")
+    return outputs
+
+
+@dataclass
+class _Link:
+    id: str
+    paw: str
+    ability: Dict
+    command: str
+    collect_at: float
+    finish_at: float
+    exit_code: int
+    output: str
+
+
+@dataclass
+class _Operation:
+    id: str
+    name: str
+    adversary: Dict
+    group: str
+    created_at: float
+    host_group: List[Dict]
+    links: List[_Link] = field(default_factory=list)
+    finish_at: float = 0.0
+
+
+class FakeCaldera:
+    """Caldera 상태 + 시뮬레이션 (HTTP 계층과 분리)"""
+
+    def __init__(self, config: FakeConfig):
+        self.config = config
+        self.rng = random.Random(config.seed)
+        self.lock = threading.RLock()
+        self.started = time.monotonic()
+        self.wall_started = time.time()
+
+        self.abilities: Dict[str, Dict] = {}
+        self.adversaries: Dict[str, Dict] = {}
+        self.agents: Dict[str, Dict] = {}
+        self.operations: Dict[str, _Operation] = {}
+        self.payloads = [f"{i:06x}_payload{i}.{ext}" for i, ext in
+                         enumerate(["exe", "bat", "ps1", "dll", "txt"] * 4)]
+        self.request_count = 0
+
+        self._seed_agents()
+        self._seed_abilities()
+
+    # ==================== 시간 ====================
+
+    def now(self) -> float:
+        """시뮬레이션 시간 (초)"""
+        return (time.monotonic() - self.started) * self.config.speed
+
+    def _iso(self, sim_seconds: float) -> str:
+        """시뮬레이션 시각 → Caldera 형식 타임스탬프"""
+        wall = self.wall_started + sim_seconds / self.config.speed
+        return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(wall))
+
+    # ==================== 초기 데이터 ====================
+
+    def _seed_agents(self):
+        for i in range(self.config.agents):
+            paw = f"fake{i:04d}"
+            self.agents[paw] = {
+                "paw": paw,
+                "host": f"WS{i:04d}",
+                "platform": self.config.platform,
+                "privilege": "User",
+                "group": "red",
+                "sleep_min": self.config.sleep_min,
+                "sleep_max": self.config.sleep_max,
+                "executors": PLATFORM_EXECUTORS.get(self.config.platform, ["sh"]),
+                "trusted": True,
+                "last_seen": self._iso(0),
+            }
+
+    def _seed_abilities(self):
+        for i in range(self.config.abilities):
+            technique = f"T{1001 + i % 600}"
+            if i % 3:
+                technique += f".{(i % 7) + 1:03d}"
+            platform = self.config.platform if i % 4 else self.rng.choice(list(PLATFORM_EXECUTORS))
+            ability_id = str(uuid.UUID(int=self.rng.getrandbits(128)))
+            self.abilities[ability_id] = {
+                "ability_id": ability_id,
+                "name": f"Fake ability {i}",
+                "description": "Generated by fake_caldera",
+                "tactic": TACTICS[i % len(TACTICS)],
+                "technique_id": technique,
+                "technique_name": f"Fake Technique {technique}",
+                "privilege": "" if i % 5 else "Elevated",
+                "requirements": [],
+                "executors": [{
+                    "name": PLATFORM_EXECUTORS[platform][0],
+                    "platform": platform,
+                    "command": f"echo fake-{i}",
+                    "timeout": 60,
+                }],
+                "repeatable": False,
+                "singleton": False,
+            }
+
+    # ==================== Link 시뮬레이션 ====================
+
+    def _beacon(self, agent: Dict) -> float:
+        return self.rng.uniform(agent.get("sleep_min", 3), agent.get("sleep_max", 5))
+
+    def _exit_code(self, ability_id: str, command: str) -> Tuple[int, str]:
+        """(seed, ability, command) 해시로 결정되는 결과"""
+        digest = hashlib.sha256(f"{self.config.seed}|{ability_id}|{command}".encode()).digest()
+        roll = int.from_bytes(digest[:4], "big") / 2 ** 32
+        if roll < self.config.failure_rate:
+            outputs = self.config.error_outputs
+            return 1, outputs[digest[4] % len(outputs)]
+        return 0, f"fake output for {command[:60]}"
+
+    @staticmethod
+    def _command(ability: Dict, platform: str) -> Optional[str]:
+        for ex in ability.get("executors", []):
+            if ex.get("platform") == platform:
+                return ex.get("command", "")
+        return None
+
+    def _schedule(self, op: _Operation):
+        """atomic planner: agent별로 atomic_ordering 순서대로 link 1개씩 실행"""
+        end = op.created_at
+        for agent in op.host_group:
+            t = op.created_at + self._beacon(agent)
+            for ability_id in op.adversary.get("atomic_ordering", []):
+                ability = self.abilities.get(ability_id)
+                if not ability:
+                    continue
+                command = self._command(ability, agent["platform"])
+                if command is None:
+                    continue
+                exit_code, output = self._exit_code(ability_id, command)
+                finish = t + self.config.link_latency
+                op.links.append(_Link(
+                    id=str(uuid.UUID(int=self.rng.getrandbits(128))),
+                    paw=agent["paw"], ability=json.loads(json.dumps(ability)),
+                    command=command, collect_at=t, finish_at=finish,
+                    exit_code=exit_code, output=output,
+                ))
+                t = finish + self._beacon(agent)
+            end = max(end, t)
+        op.finish_at = end
+
+    def _link_json(self, link: _Link, now: float) -> Optional[Dict]:
+        if now < link.collect_at:
+            return None
+        done = now >= link.finish_at
+        return {
+            "id": link.id,
+            "paw": link.paw,
+            "ability": link.ability,
+            "command": base64.b64encode(link.command.encode()).decode(),
+            "status": link.exit_code if done else -3,
+            "output": "True" if done else "False",
+            "decide": self._iso(link.collect_at),
+            "collect": self._iso(link.collect_at),
+            "finish": self._iso(link.finish_at) if done else "",
+            "pid": 1000 + int(link.collect_at) % 9000,
+        }
+
+    def operation_json(self, op: _Operation, include_chain: bool = True) -> Dict:
+        now = self.now()
+        data = {
+            "id": op.id,
+            "name": op.name,
+            "state": "finished" if now >= op.finish_at else "running",
+            "adversary": op.adversary,
+            "group": op.group,
+            "host_group": op.host_group,
+            "planner": {"id": "atomic", "name": "atomic"},
+            "start": self._iso(op.created_at),
+            "autonomous": 1,
+            "source": {"id": "basic", "facts": []},
+        }
+        if include_chain:
+            data["chain"] = self.links_json(op)
+        return data
+
+    def links_json(self, op: _Operation) -> List[Dict]:
+        now = self.now()
+        links = [self._link_json(l, now) for l in op.links]
+        return [l for l in links if l is not None]
+
+    # ==================== API 처리 ====================
+
+    def handle(self, method: str, parts: List[str], body: Optional[Dict]) -> Tuple[int, object]:
+        """(status code, JSON 응답) 반환. parts는 /api/v2 이후 경로 조각"""
+        with self.lock:
+            self.request_count += 1
+            if not parts:
+                return 404, {"error": "not found"}
+            resource, rest = parts[0], parts[1:]
+            handler = getattr(self, f"_api_{resource}", None)
+            if handler is None:
+                return 404, {"error": f"unknown resource {resource}"}
+            return handler(method, rest, body or {})
+
+    def _api_payloads(self, method, rest, body):
+        return 200, list(self.payloads)
+
+    def _api_agents(self, method, rest, body):
+        if not rest:
+            return 200, list(self.agents.values())
+        agent = self.agents.get(rest[0])
+        if agent is None:
+            return 404, {"error": "agent not found"}
+        if method == "PATCH":
+            agent.update({k: v for k, v in body.items() if k in ("sleep_min", "sleep_max", "group", "trusted")})
+        return 200, agent
+
+    def _api_abilities(self, method, rest, body):
+        if not rest:
+            if method == "POST":
+                ability_id = body.get("ability_id") or str(uuid.uuid4())
+                ability = dict(body, ability_id=ability_id)
+                ability.setdefault("requirements", [])
+                self.abilities[ability_id] = ability
+                return 200, ability
+            return 200, list(self.abilities.values())
+
+        ability = self.abilities.get(rest[0])
+        if ability is None:
+            return 404, {"error": "ability not found"}
+        if method == "DELETE":
+            del self.abilities[rest[0]]
+            return 204, None
+        if method == "PATCH":
+            ability.update(body)
+        return 200, ability
+
+    def _api_adversaries(self, method, rest, body):
+        if not rest:
+            if method == "POST":
+                adversary_id = str(uuid.uuid4())
+                adversary = dict(body, adversary_id=adversary_id)
+                self.adversaries[adversary_id] = adversary
+                return 200, adversary
+            return 200, list(self.adversaries.values())
+        if rest[0] not in self.adversaries:
+            return 404, {"error": "adversary not found"}
+        if method == "DELETE":
+            del self.adversaries[rest[0]]
+            return 204, None
+        return 200, self.adversaries[rest[0]]
+
+    def _api_operations(self, method, rest, body):
+        if not rest:
+            if method == "POST":
+                return self._create_operation(body)
+            return 200, [self.operation_json(op) for op in self.operations.values()]
+
+        op = self.operations.get(rest[0])
+        if op is None:
+            return 404, {"error": "operation not found"}
+        if len(rest) == 1:
+            if method == "DELETE":
+                del self.operations[rest[0]]
+                return 204, None
+            return 200, self.operation_json(op)
+        if rest[1] != "links":
+            return 404, {"error": "not found"}
+        if len(rest) == 2:
+            return 200, self.links_json(op)
+
+        link = next((l for l in op.links if l.id == rest[2]), None)
+        now = self.now()
+        if link is None or self._link_json(link, now) is None:
+            return 404, {"error": "link not found"}
+        link_json = self._link_json(link, now)
+        if len(rest) == 4 and rest[3] == "result":
+            result = ""
+            if link_json["status"] >= 0:
+                result = base64.b64encode(json.dumps({
+                    "stdout": link.output if link.exit_code == 0 else "",
+                    "stderr": link.output if link.exit_code != 0 else "",
+                    "exit_code": str(link.exit_code),
+                }).encode()).decode()
+            return 200, {"link": link_json, "result": result}
+        return 200, link_json
+
+    def _create_operation(self, body: Dict) -> Tuple[int, Dict]:
+        adversary_id = (body.get("adversary") or {}).get("adversary_id")
+        adversary = self.adversaries.get(adversary_id)
+        if adversary is None:
+            return 404, {"error": "adversary not found"}
+        group = body.get("group", "")
+        host_group = [a for a in self.agents.values() if not group or a.get("group") == group]
+        op = _Operation(
+            id=str(uuid.uuid4()), name=body.get("name", "fake-op"),
+            adversary=adversary, group=group, created_at=self.now(),
+            host_group=[dict(a) for a in host_group],
+        )
+        self._schedule(op)
+        self.operations[op.id] = op
+        return 200, self.operation_json(op)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    caldera: FakeCaldera = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _dispatch(self, method: str):
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+
+        api_key = self.caldera.config.api_key
+        if api_key and self.headers.get("KEY") != api_key:
+            return self._reply(401, {"error": "unauthorized"})
+
+        path = self.path.split("?", 1)[0].strip("/").split("/")
+        if path[:2] != ["api", "v2"]:
+            return self._reply(404, {"error": "not found"})
+        try:
+            body = json.loads(raw) if raw else None
+        except json.JSONDecodeError:
+            return self._reply(400, {"error": "invalid json"})
+
+        status, payload = self.caldera.handle(method, path[2:], body)
+        self._reply(status, payload)
+
+    def _reply(self, status: int, payload):
+        data = b"" if payload is None else json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        if data:
+            self.wfile.write(data)
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_PATCH(self):
+        self._dispatch("PATCH")
+
+    def do_PUT(self):
+        self._dispatch("PUT")
+
+    def do_DELETE(self):
+        self._dispatch("DELETE")
+
+
+def serve(config: FakeConfig, host: str = "127.0.0.1", port: int = 8888,
+          background: bool = False) -> Tuple[ThreadingHTTPServer, FakeCaldera]:
+    """
+    Fake Caldera 서버 시작
+
+    Args:
+        background: True이면 daemon thread에서 실행하고 즉시 반환 (테스트/벤치마크용)
+
+    Returns:
+        (server, caldera) — server.server_address로 실제 포트 확인
+    """
+    caldera = FakeCaldera(config)
+    handler = type("FakeCalderaHandler", (_Handler,), {"caldera": caldera})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+
+    if background:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, caldera
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake Caldera v2 REST API for load/scale testing")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8888)
+    parser.add_argument("--agents", type=int, default=1, help="시뮬레이션 agent 수")
+    parser.add_argument("--abilities", type=int, default=500, help="초기 ability 수")
+    parser.add_argument("--platform", default="windows", choices=sorted(PLATFORM_EXECUTORS))
+    parser.add_argument("--sleep", type=float, nargs=2, default=[3, 5], metavar=("MIN", "MAX"),
+                        help="agent beacon 주기 (초)")
+    parser.add_argument("--link-latency", type=float, default=2.0, help="link 실행 시간 (초)")
+    parser.add_argument("--failure-rate", type=float, default=0.3, help="link 실패 확률 (0~1)")
+    parser.add_argument("--speed", type=float, default=1.0, help="시뮬레이션 시간 배속")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--api-key", default=None, help="지정 시 KEY 헤더 검사")
+    parser.add_argument("--error-outputs", metavar="FILE", default=None,
+                        help="실패 link 출력 corpus (JSON 문자열 배열 또는 줄 단위 텍스트, 기본: 내장 목록)")
+    args = parser.parse_args()
+
+    config = FakeConfig(
+        agents=args.agents, abilities=args.abilities, platform=args.platform,
+        sleep_min=args.sleep[0], sleep_max=args.sleep[1], link_latency=args.link_latency,
+        failure_rate=args.failure_rate, speed=args.speed, seed=args.seed, api_key=args.api_key,
+    )
+    if args.error_outputs:
+        config.error_outputs = load_error_outputs(args.error_outputs)
+    server, caldera = serve(config, args.host, args.port)
+    print(f"[*] Fake Caldera listening on http://{args.host}:{args.port} "
+          f"({len(caldera.agents)} agents, {len(caldera.abilities)} abilities, "
+          f"failure rate {args.failure_rate:.0%}, speed x{args.speed})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n[*] Shutting down")
+        server.shutdown()
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Fix Store
+세션 간 ReAct 수정 지식 저장소 (SQLite).
+07_react_summary.json의 수정 기록 중 재실행에서 성공한 command를
+(technique_id, platform, 정규화된 에러 signature, SVO verb/object) 단위로 저장해 두고,
+다음 세션의 ReactAgent.react_fix / AbilityGenerator가 LLM 호출 없이 먼저 재사용한다.
+
+  예: T1204.002 download — "?file=" 404 → "/file/download/<name>" 성공
+      T1564.001 hide     — icacls quoting 실패 → attrib 성공
+
+기존 세션 결과로 저장소 구축:
+    python -m core_v3.fix_store results/ [--platform windows]
+"""
+
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+
+DEFAULT_STORE_PATH = Path(__file__).parent.parent / ".cache" / "fix_store.sqlite"
+
+
+def error_signature(error: str) -> str:
+    """
+    에러 출력 → 세션/호스트와 무관한 signature
+
+    stdout/stderr JSON이면 stderr(없으면 stdout)만 사용하고 (잘린 JSON 포함), 첫 줄 200자에서
+    따옴표 문자열·경로·ID·숫자를 치환한다 — 호출 위치마다 에러를 자르는 길이가 달라도 같은 signature.
+    """
+    text = error or ""
+    try:
+        data = json.loads(text)
+        if isinstance(data, dict):
+            text = data.get("stderr") or data.get("stdout") or ""
+    except (ValueError, TypeError):
+        for key in ("stderr", "stdout"):
+            m = re.search(rf'"{key}"\s*:\s*"((?:\\.|[^"\\])+)', text)
+            if m:
+                text = m.group(1).replace("\\r", "").replace("\\n", "\n").replace('\\"', '"').replace("\\\\", "\\")
+                break
+    lines = [line for line in str(text).splitlines() if line.strip()]
+    text = (lines[0] if lines else "").strip().lower()[:200]
+    text = re.sub(r"'[^']*'|\"[^\"]*\"", "<s>", text)
+    text = re.sub(r"[a-z]:\\[^\s,;]*|\\\\[^\s,;]+|(?<![\w<])/[\w.\-/]+", "<path>", text)
+    text = re.sub(r"\b[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\b|\b0x[0-9a-f]+\b", "<id>", text)
+    text = re.sub(r"\d+", "<n>", text)
+    text = re.sub(r"\s+", " ", text)
+    return text[:160]
+
+
+class FixStore:
+    """
+    (technique, platform, error signature, verb, object) → 성공한 수정 command
+
+    - 같은 키에 여러 command가 있으면 (successes - failures), 최근 성공 순으로 선택
+    - bypass: True이면 조회/저장 모두 건너뜀 (SVO 비결정성 실험용)
+    """
+
+    def __init__(self, path: Optional[Path] = None, bypass: bool = False):
+        self.path = Path(path) if path else DEFAULT_STORE_PATH
+        self.bypass = bypass
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self.stats = {"hits": 0, "misses": 0, "recorded": 0}
+
+    # ==================== 연결 ====================
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS fixes (
+                    technique_id  TEXT NOT NULL,
+                    platform      TEXT NOT NULL,
+                    signature     TEXT NOT NULL,
+                    verb          TEXT NOT NULL,
+                    object        TEXT NOT NULL,
+                    command       TEXT NOT NULL,
+                    failure_type  TEXT,
+                    successes     INTEGER NOT NULL DEFAULT 0,
+                    failures      INTEGER NOT NULL DEFAULT 0,
+                    last_success  REAL,
+                    session       TEXT,
+                    PRIMARY KEY (technique_id, platform, signature, verb, object, command)
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_intent ON fixes(technique_id, platform, verb, object)")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    @staticmethod
+    def _norm(value: str) -> str:
+        return re.sub(r"\s+", " ", (value or "").strip().lower())
+
+    # ==================== 조회 ====================
+
+    def lookup(self, technique_id: str, platform: str, verb: str, obj: str,
+               error: Optional[str] = None, exclude: List[str] = None) -> Optional[Dict]:
+        """
+        Args:
+            error: 실패 출력 — 주어지면 같은 signature의 수정만, None이면 signature 무관 (신규 생성용)
+            exclude: 이미 시도한 command (반복 방지)
+
+        Returns:
+            {"command", "failure_type", "successes", "failures", "signature", "session"} or None
+        """
+        if self.bypass:
+            return None
+        query = ("SELECT command, failure_type, successes, failures, signature, session FROM fixes "
+                 "WHERE technique_id = ? AND platform = ? AND verb = ? AND object = ? AND successes > 0")
+        params = [technique_id, platform, self._norm(verb), self._norm(obj)]
+        if error is not None:
+            query += " AND signature = ?"
+            params.append(error_signature(error))
+        query += " ORDER BY successes - failures DESC, last_success DESC"
+
+        excluded = set(exclude or [])
+        with self._lock:
+            rows = self._connect().execute(query, params).fetchall()
+            for command, failure_type, successes, failures, signature, session in rows:
+                if command in excluded or successes <= failures:
+                    continue
+                self.stats["hits"] += 1
+                return {"command": command, "failure_type": failure_type, "successes": successes,
+                        "failures": failures, "signature": signature, "session": session}
+            self.stats["misses"] += 1
+        return None
+
+    # ==================== 기록 ====================
+
+    def record(self, technique_id: str, platform: str, verb: str, obj: str, error: str,
+               command: str, success: bool, failure_type: str = "unknown", session: str = ""):
+        if self.bypass or not command:
+            return
+        key = (technique_id, platform, error_signature(error), self._norm(verb), self._norm(obj), command)
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR IGNORE INTO fixes (technique_id, platform, signature, verb, object, command, "
+                "failure_type, session) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                key + (failure_type, session)
+            )
+            if success:
+                conn.execute(
+                    "UPDATE fixes SET successes = successes + 1, last_success = ?, failure_type = ?, session = ? "
+                    "WHERE technique_id = ? AND platform = ? AND signature = ? AND verb = ? AND object = ? "
+                    "AND command = ?",
+                    (time.time(), failure_type, session) + key
+                )
+            else:
+                conn.execute(
+                    "UPDATE fixes SET failures = failures + 1 "
+                    "WHERE technique_id = ? AND platform = ? AND signature = ? AND verb = ? AND object = ? "
+                    "AND command = ?",
+                    key
+                )
+            conn.commit()
+            self.stats["recorded"] += 1
+
+    def record_rounds(self, rounds: List[Dict], platform: str, session: str = "") -> int:
+        """
+        07_react_summary.json의 rounds → 저장
+
+        수정 기록의 "outcome"(success/failed)을 사용하고, outcome이 없는 이전 형식은
+        다음 라운드에 같은 technique가 다시 실패했는지로 추정한다.
+
+        Returns:
+            기록한 수정 수
+        """
+        recorded = 0
+        for i, rnd in enumerate(rounds):
+            executed = "result_stats" in rnd
+            next_failed = ({f.get("technique_id") for f in rounds[i + 1].get("fixes", [])}
+                           if i + 1 < len(rounds) else set())
+            for fix in rnd.get("fixes", []):
+                svo = fix.get("svo") or {}
+                if fix.get("status") != "patched" or not fix.get("fixed_command") or not svo:
+                    continue
+                outcome = fix.get("outcome")
+                if outcome is None and executed:
+                    outcome = "failed" if fix.get("technique_id") in next_failed else "success"
+                if outcome not in ("success", "failed"):
+                    continue
+                self.record(fix.get("technique_id", ""), platform, svo.get("verb", ""),
+                            svo.get("object", ""), fix.get("error", ""), fix["fixed_command"],
+                            outcome == "success", fix.get("failure_type", "unknown"), session)
+                recorded += 1
+        return recorded
+
+    # ==================== 통계 ====================
+
+    def snapshot(self) -> Dict:
+        info = dict(self.stats, bypass=self.bypass, path=str(self.path))
+        if not self.bypass:
+            with self._lock:
+                count, proven = self._connect().execute(
+                    "SELECT COUNT(*), COALESCE(SUM(successes > failures), 0) FROM fixes").fetchone()
+            info["entries"] = count
+            info["proven"] = proven
+        return info
+
+
+_default_store: Optional[FixStore] = None
+_default_lock = threading.Lock()
+
+
+def get_default_fix_store() -> FixStore:
+    """프로세스 전역 fix store (환경 변수로 설정)"""
+    global _default_store
+    with _default_lock:
+        if _default_store is None:
+            path = os.getenv("FIX_STORE_PATH")
+            _default_store = FixStore(
+                path=Path(path) if path else None,
+                bypass=os.getenv("FIX_STORE_BYPASS", "false").lower() == "true",
+            )
+        return _default_store
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build the fix store from recorded 07_react_summary.json files")
+    parser.add_argument("paths", nargs="+", help="세션 디렉토리 또는 07_react_summary.json")
+    parser.add_argument("--platform", default="windows")
+    parser.add_argument("--store", default=None, help="저장소 경로 (기본: FIX_STORE_PATH 또는 .cache/fix_store.sqlite)")
+    args = parser.parse_args()
+
+    store = FixStore(Path(args.store)) if args.store else get_default_fix_store()
+    files = []
+    for p in map(Path, args.paths):
+        files += sorted(p.rglob("07_react_summary.json")) if p.is_dir() else [p]
+
+    total = 0
+    for f in files:
+        try:
+            summary = json.loads(f.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            print(f"  [!] Skipping {f}: {e}")
+            continue
+        count = store.record_rounds(summary.get("rounds", []), summary.get("platform", args.platform),
+                                    session=f.parent.name)
+        total += count
+        print(f"  ✓ {f.parent.name}: {count} fixes")
+
+    info = store.snapshot()
+    print(f"[*] Fix store {info['path']}: {total} fixes recorded from {len(files)} sessions "
+          f"({info.get('entries', 0)} entries, {info.get('proven', 0)} proven)")
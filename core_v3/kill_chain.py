@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""
+Kill Chain Orderer
+technique 목록을 LLM 없이 결정적으로 정렬하는 공격 체인 순서 엔진 (LLMOrchestrator의 fast path).
+
+  정렬 = 제약 그래프의 위상 정렬
+    hard 제약: technique에 선언된 dependencies
+               + 알려진 선행 관계 PREREQUISITES (자격 증명 → 횡적 이동, 수집/스테이징 → 유출 …)
+    우선순위:  ATT&CK tactic 순서 (reconnaissance → … → impact), 같은 tactic이면 technique ID
+  → 입력 순서(LLM 파싱 결과의 technique 나열 순서)와 무관하게 항상 같은 체인
+  → 순환 의존은 우선순위가 가장 앞선 technique의 선행 제약을 무시하고 진행 (reason에 기록)
+
+번들 시나리오로 LLM 정렬과 비교:
+    python -m core_v3.kill_chain scenarios/*.md            # 결정적 정렬 시간 / 시나리오 서술 순서와 비교
+    python -m core_v3.kill_chain scenarios/*.md --llm      # + LLMOrchestrator 정렬 시간·제약 위반·순위 거리
+"""
+
+import heapq
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+
+# ATT&CK Enterprise tactic 순서 (kill chain)
+TACTIC_ORDER = [
+    "reconnaissance", "resource-development", "initial-access", "execution", "persistence",
+    "privilege-escalation", "defense-evasion", "credential-access", "discovery", "lateral-movement",
+    "collection", "command-and-control", "exfiltration", "impact",
+]
+_TACTIC_RANK = {t: i for i, t in enumerate(TACTIC_ORDER)}
+_TACTIC_ALIASES = {
+    "command-control": "command-and-control", "c2": "command-and-control", "c-c": "command-and-control",
+    "recon": "reconnaissance", "privesc": "privilege-escalation", "exfil": "exfiltration",
+}
+
+
+@dataclass(frozen=True)
+class Prerequisite:
+    """before가 after보다 먼저 실행되어야 함 (tactic shortname 또는 technique ID — sub-technique 포함)"""
+    before: str
+    after: str
+    reason: str
+
+
+# 알려진 선행 관계 — tactic 순서만으로는 LLM이 tactic을 다르게 붙였을 때 보장되지 않는 것들
+PREREQUISITES = [
+    Prerequisite("credential-access", "lateral-movement", "credentials before lateral movement"),
+    Prerequisite("discovery", "lateral-movement", "remote targets discovered before lateral movement"),
+    Prerequisite("privilege-escalation", "T1003", "elevation before credential dumping"),
+    Prerequisite("collection", "exfiltration", "data collected/staged before exfiltration"),
+    Prerequisite("T1074", "exfiltration", "data staged before exfiltration"),
+    Prerequisite("T1560", "exfiltration", "data archived before exfiltration"),
+    Prerequisite("command-and-control", "T1041", "C2 channel established before exfiltration over it"),
+    Prerequisite("exfiltration", "impact", "data exfiltrated before destructive impact"),
+    Prerequisite("collection", "impact", "data collected before destructive impact"),
+]
+
+
+def normalize_tactic(value: str) -> Optional[str]:
+    """'Credential Access' / 'command_and_control' / 'Command & Control' → ATT&CK shortname (모르면 None)"""
+    text = re.sub(r"[^a-z0-9]+", "-", str(value or "").lower()).strip("-")
+    text = _TACTIC_ALIASES.get(text, text)
+    return text if text in _TACTIC_RANK else None
+
+
+@dataclass
+class ChainStep:
+    technique: Dict
+    step: int
+    tactic: Optional[str]
+    dependencies: List[str] = field(default_factory=list)   # hard 선행 technique ID
+    reason: str = ""
+
+    @property
+    def technique_id(self) -> str:
+        return self.technique.get("technique_id", "")
+
+    def to_dict(self) -> Dict:
+        return {"step": self.step, "technique_id": self.technique_id, "tactic": self.tactic,
+                "dependencies": self.dependencies, "reason": self.reason}
+
+
+class KillChainOrderer:
+    """
+    Args:
+        attack_index: AttackIndex (있으면 tactic이 비었거나 자유 텍스트일 때 technique의 공식 tactic 사용)
+    """
+
+    def __init__(self, attack_index=None, prerequisites: List[Prerequisite] = PREREQUISITES):
+        self.attack_index = attack_index
+        self.prerequisites = prerequisites
+
+    def tactic_of(self, tech: Dict) -> Optional[str]:
+        """technique의 tactic shortname (여러 개면 kill chain상 가장 앞선 것)"""
+        given = tech.get("tactic", "")
+        values = [given] if isinstance(given, str) else list(given or [])
+        tactics = [t for t in (normalize_tactic(v) for v in values) if t]
+        if not tactics and self.attack_index is not None:
+            # TA0006 같은 tactic ID → 그래도 없으면 technique의 공식 tactic
+            tactics = [t for t in (self.attack_index.tactic(v) for v in values) if t in _TACTIC_RANK]
+            if not tactics:
+                entry = self.attack_index.get(tech.get("technique_id", "")) or {}
+                tactics = [t for t in entry.get("tactics", []) if t in _TACTIC_RANK]
+        return min(tactics, key=_TACTIC_RANK.get) if tactics else None
+
+    def _edges(self, techniques: List[Dict], tactics: List[Optional[str]]) -> Dict[int, Dict[int, str]]:
+        """after index → {before index: reason}"""
+        edges: Dict[int, Dict[int, str]] = {i: {} for i in range(len(techniques))}
+        by_id: Dict[str, List[int]] = {}
+        by_key: Dict[str, List[int]] = {}      # tactic / technique ID / 상위 technique ID → index
+        for i, tech in enumerate(techniques):
+            tid = tech.get("technique_id") or ""
+            by_id.setdefault(tid, []).append(i)
+            for key in {tactics[i], tid, tid.split(".")[0]}:
+                if key:
+                    by_key.setdefault(key, []).append(i)
+
+        for i, tech in enumerate(techniques):
+            for dep in tech.get("dependencies", []) or []:
+                for j in by_id.get(dep, []):
+                    if j != i:
+                        edges[i][j] = "declared dependency"
+
+        for rule in self.prerequisites:
+            befores = by_key.get(rule.before, [])
+            for a in by_key.get(rule.after, []) if befores else []:
+                for b in befores:
+                    if a != b:
+                        edges[a].setdefault(b, rule.reason)
+        return edges
+
+    # ==================== 정렬 ====================
+
+    def order(self, techniques: List[Dict]) -> List[ChainStep]:
+        tactics = [self.tactic_of(t) for t in techniques]
+        edges = self._edges(techniques, tactics)
+
+        def key(i: int) -> Tuple:
+            rank = _TACTIC_RANK.get(tactics[i], len(TACTIC_ORDER))
+            return rank, techniques[i].get("technique_id") or "", i
+
+        indegree = {i: len(before) for i, before in edges.items()}
+        successors: Dict[int, List[int]] = {i: [] for i in edges}
+        for after, before in edges.items():
+            for b in before:
+                successors[b].append(after)
+
+        ready = [key(i) for i, d in indegree.items() if d == 0]
+        heapq.heapify(ready)
+        remaining = set(edges)
+        placed: List[int] = []
+        broken: Dict[int, List[int]] = {}
+        while remaining:
+            if ready:
+                i = heapq.heappop(ready)[2]
+            else:
+                # 순환 — 우선순위가 가장 앞선 technique을 선행 제약을 무시하고 배치
+                i = min(remaining, key=key)
+                broken[i] = [b for b in edges[i] if b in remaining]
+            remaining.discard(i)
+            placed.append(i)
+            for s in successors[i]:
+                if s in remaining:
+                    indegree[s] -= 1
+                    if indegree[s] == 0:
+                        heapq.heappush(ready, key(s))
+
+        position = {i: n for n, i in enumerate(placed)}
+        steps = []
+        for n, i in enumerate(placed, 1):
+            before = [b for b in edges[i] if position[b] < position[i]]
+            reasons = [f"tactic {tactics[i] or 'unknown'}"]
+            reasons += [f"after {techniques[b].get('technique_id')} ({edges[i][b]})"
+                        for b in sorted(before, key=position.get)]
+            if i in broken:
+                reasons.append("dependency cycle broken with " +
+                               ", ".join(techniques[b].get("technique_id", "") for b in broken[i]))
+            steps.append(ChainStep(
+                technique=techniques[i], step=n, tactic=tactics[i],
+                dependencies=list(dict.fromkeys(techniques[b].get("technique_id", "")
+                                                for b in sorted(before, key=position.get))),
+                reason="; ".join(reasons),
+            ))
+        return steps
+
+    def violations(self, technique_ids: List[str], techniques: List[Dict]) -> List[str]:
+        """주어진 순서(예: LLM 정렬)가 어긴 hard 제약 목록"""
+        tactics = [self.tactic_of(t) for t in techniques]
+        edges = self._edges(techniques, tactics)
+        position = {tid: n for n, tid in reversed(list(enumerate(technique_ids)))}
+        found = []
+        for after, before in edges.items():
+            a_id = techniques[after].get("technique_id", "")
+            for b, reason in before.items():
+                b_id = techniques[b].get("technique_id", "")
+                if a_id in position and b_id in position and position[a_id] < position[b_id]:
+                    found.append(f"{a_id} before {b_id} ({reason})")
+        return found
+
+
+def rank_distance(a: List[str], b: List[str]) -> float:
+    """두 순서의 정규화 Kendall tau 거리 (0 = 같음, 1 = 역순, 공통 항목만)"""
+    common = [x for x in a if x in set(b)]
+    pos = {x: n for n, x in enumerate(b)}
+    pairs = discordant = 0
+    for i in range(len(common)):
+        for j in range(i + 1, len(common)):
+            pairs += 1
+            discordant += pos[common[i]] > pos[common[j]]
+    return discordant / pairs if pairs else 0.0
+
+
+# ==================== 벤치마크 ====================
+
+_ROW = re.compile(r"^\|\s*\*\*\s*\d+\s*[-–]\s*([^*|]+?)\s*\*\*\s*\|([^|]*)\|")
+_TID = re.compile(r"T\d{4}(?:\.\d{3})?")
+
+
+def load_scenario_techniques(path) -> List[Dict]:
+    """번들 시나리오 markdown의 Phase | Technique 표 → technique 목록 (서술 순서, LLM 파싱 없이)"""
+    import json
+    from pathlib import Path
+
+    path = Path(path)
+    if path.suffix == ".json":
+        return json.loads(path.read_text(encoding="utf-8")).get("techniques", [])
+    techniques = []
+    for line in path.read_text(encoding="utf-8").splitlines():
+        m = _ROW.match(line.strip())
+        if not m or not _TID.search(m.group(2)):
+            continue
+        cell = m.group(2)
+        tid = _TID.search(cell).group(0)
+        name = re.sub(r"[*]|" + re.escape(tid), "", cell).strip(" -–()")
+        techniques.append({"technique_id": tid, "technique_name": name, "tactic": m.group(1).strip()})
+    return techniques
+
+
+def benchmark(paths: List[str], use_llm: bool = False, repeat: int = 1000) -> List[Dict]:
+    import random
+    import time
+
+    from core_v3.attack_index import get_default_attack_index
+
+    orderer = KillChainOrderer(get_default_attack_index())
+    orchestrator = None
+    if use_llm:
+        from core_v3.llm_orchestrator import LLMOrchestrator
+        orchestrator = LLMOrchestrator()
+
+    results = []
+    for path in paths:
+        techniques = load_scenario_techniques(path)
+        if not techniques:
+            print(f"  [!] {path}: no technique table found")
+            continue
+        narrative = [t["technique_id"] for t in techniques]
+
+        samples = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            steps = orderer.order(techniques)
+            samples.append(time.perf_counter() - started)
+        samples.sort()
+        ordered = [s.technique_id for s in steps]
+
+        # 입력 순서 무관성 — 섞어서 넣어도 같은 체인
+        rng = random.Random(0)
+        stable = all([s.technique_id for s in orderer.order(rng.sample(techniques, len(techniques)))] == ordered
+                     for _ in range(50))
+
+        result = {
+            "scenario": str(path), "techniques": len(techniques),
+            "deterministic_us": round(samples[len(samples) // 2] * 1e6, 1),
+            "input_order_independent": stable,
+            "order": ordered,
+            "narrative_violations": orderer.violations(narrative, techniques),
+            "narrative_distance": round(rank_distance(ordered, narrative), 3),
+        }
+        if orchestrator is not None:
+            started = time.perf_counter()
+            llm_ids = orchestrator.llm_order(techniques)
+            result["llm_seconds"] = round(time.perf_counter() - started, 2)
+            result["llm_order"] = llm_ids
+            if llm_ids:
+                result["llm_violations"] = orderer.violations(llm_ids, techniques)
+                result["llm_distance"] = round(rank_distance(ordered, llm_ids), 3)
+                result["llm_missing"] = [t for t in narrative if t not in llm_ids]
+        results.append(result)
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    import sys
+    from pathlib import Path
+
+    sys.path.insert(0, str(Path(__file__).parent.parent))
+
+    parser = argparse.ArgumentParser(description="Benchmark deterministic kill-chain ordering against LLM ordering")
+    parser.add_argument("paths", nargs="+", help="시나리오 .md (Phase | Technique 표) 또는 01_parsed_scenario.json")
+    parser.add_argument("--llm", action="store_true", help="LLMOrchestrator 정렬도 실행해 비교 (Ollama 필요)")
+    parser.add_argument("--repeat", type=int, default=1000, help="결정적 정렬 반복 측정 횟수")
+    parser.add_argument("--json", action="store_true", help="결과를 JSON으로 출력")
+    args = parser.parse_args()
+
+    results = benchmark(args.paths, use_llm=args.llm, repeat=args.repeat)
+    if args.json:
+        print(json.dumps(results, indent=2, ensure_ascii=False))
+        raise SystemExit(0)
+
+    for r in results:
+        print(f"\n[*] {r['scenario']} ({r['techniques']} techniques)")
+        print(f"    deterministic: {r['deterministic_us']:.1f}µs (median of {args.repeat}), "
+              f"input-order independent: {'✓' if r['input_order_independent'] else '✗'}")
+        print(f"    order: {' → '.join(r['order'])}")
+        print(f"    narrative order: distance {r['narrative_distance']:.3f}, "
+              f"{len(r['narrative_violations'])} constraint violations")
+        for v in r["narrative_violations"]:
+            print(f"      ✗ {v}")
+        if "llm_seconds" in r:
+            if r["llm_order"]:
+                print(f"    LLM: {r['llm_seconds']:.2f}s, distance {r['llm_distance']:.3f}, "
+                      f"{len(r['llm_violations'])} constraint violations, {len(r['llm_missing'])} techniques dropped")
+                for v in r["llm_violations"]:
+                    print(f"      ✗ {v}")
+            else:
+                print(f"    LLM: {r['llm_seconds']:.2f}s — no usable ordering returned")
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+LLM Response Cache
+(model, options, messages) 내용 주소 기반의 SQLite 영구 캐시.
+temperature 0 + 결정적 프롬프트로 반복 실행되는 파싱/SVO/명령어 생성/ReAct/순서 결정 호출의 재비용을 없앤다.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+
+DEFAULT_CACHE_PATH = Path(__file__).parent.parent / ".cache" / "llm_cache.sqlite"
+
+
+class LLMCache:
+    """
+    SQLite 기반 LLM 응답 캐시
+
+    - key: sha256(model, options, format, messages)
+    - eviction: 총 크기가 max_bytes를 넘으면 last_access가 오래된 항목부터 삭제 (LRU)
+    - bypass: True이면 조회/저장 모두 건너뜀 (비결정성 실험용)
+    """
+
+    def __init__(self, path: Optional[Path] = None, max_bytes: int = 512 * 1024 * 1024,
+                 bypass: bool = False):
+        self.path = Path(path) if path else DEFAULT_CACHE_PATH
+        self.max_bytes = max_bytes
+        self.bypass = bypass
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0, "bypassed": 0}
+
+    # ==================== 연결 ====================
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key         TEXT PRIMARY KEY,
+                    model       TEXT,
+                    response    TEXT NOT NULL,
+                    size        INTEGER NOT NULL,
+                    created_at  REAL NOT NULL,
+                    last_access REAL NOT NULL,
+                    hits        INTEGER NOT NULL DEFAULT 0
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_last_access ON responses(last_access)")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    # ==================== Key ====================
+
+    @staticmethod
+    def make_key(model: str, messages: List[Dict], options: Optional[Dict] = None,
+                 format=None, early_stop: Optional[str] = None) -> str:
+        """
+        early_stop: 스트리밍 조기 종료로 잘릴 수 있는 응답이면 완성 조건 이름 (StopWhen.call_type)
+                    — 끝까지 받은 응답과 키를 분리해 다른 호출부/LLM_STREAMING=off에 잘린 응답이 재사용되지 않게 함
+        """
+        request = {
+            "model": model,
+            "options": options or {},
+            "format": format,
+            "messages": [{"role": m.get("role"), "content": m.get("content")} for m in messages],
+        }
+        if early_stop:
+            request["early_stop"] = early_stop
+        payload = json.dumps(request, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    # ==================== 조회 / 저장 ====================
+
+    def get(self, key: str) -> Optional[Dict]:
+        if self.bypass:
+            self.stats["bypassed"] += 1
+            return None
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute("SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+            conn.execute("UPDATE responses SET last_access = ?, hits = hits + 1 WHERE key = ?",
+                         (time.time(), key))
+            conn.commit()
+            self.stats["hits"] += 1
+        return json.loads(row[0])
+
+    def put(self, key: str, model: str, response: Dict):
+        if self.bypass:
+            return
+        data = json.dumps(response, ensure_ascii=False)
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, model, response, size, created_at, last_access, hits) "
+                "VALUES (?, ?, ?, ?, ?, ?, 0)",
+                (key, model, data, len(data), now, now)
+            )
+            conn.commit()
+            self.stats["stores"] += 1
+            self._evict(conn)
+
+    def _evict(self, conn: sqlite3.Connection):
+        """총 크기가 max_bytes를 넘으면 LRU 순으로 90%까지 삭제"""
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        target = int(self.max_bytes * 0.9)
+        evicted = 0
+        for key, size in conn.execute(
+                "SELECT key, size FROM responses ORDER BY last_access ASC").fetchall():
+            if total <= target:
+                break
+            conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+            evicted += 1
+        conn.commit()
+        self.stats["evictions"] += evicted
+
+    # ==================== 통계 ====================
+
+    def snapshot(self) -> Dict:
+        """현재 통계 + 저장소 크기"""
+        info = dict(self.stats)
+        info["bypass"] = self.bypass
+        info["path"] = str(self.path)
+        if not self.bypass:
+            with self._lock:
+                conn = self._connect()
+                count, size = conn.execute(
+                    "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+            info["entries"] = count
+            info["size_bytes"] = size
+        lookups = info["hits"] + info["misses"]
+        info["hit_rate"] = round(info["hits"] / lookups * 100, 1) if lookups else 0.0
+        return info
+
+    @staticmethod
+    def delta(before: Dict, after: Dict) -> Dict:
+        """두 snapshot 사이의 세션 단위 통계"""
+        result = dict(after)
+        for k in ("hits", "misses", "stores", "evictions", "bypassed"):
+            result[k] = after.get(k, 0) - before.get(k, 0)
+        lookups = result["hits"] + result["misses"]
+        result["hit_rate"] = round(result["hits"] / lookups * 100, 1) if lookups else 0.0
+        return result
+
+
+_default_cache: Optional[LLMCache] = None
+_default_lock = threading.Lock()
+
+
+def get_default_cache() -> LLMCache:
+    """프로세스 전역 캐시 (환경 변수로 설정)"""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            path = os.getenv("LLM_CACHE_PATH")
+            _default_cache = LLMCache(
+                path=Path(path) if path else None,
+                max_bytes=int(float(os.getenv("LLM_CACHE_MAX_MB", "512")) * 1024 * 1024),
+                bypass=os.getenv("LLM_CACHE_BYPASS", "false").lower() == "true",
+            )
+        return _default_cache
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+LLM Client
+Ollama chat 호출을 감싸는 공용 클라이언트. 모든 core_v3 LLM 호출이 이 경로를 거친다.
+  - 응답 캐시 (llm_cache.LLMCache)
+  - record/replay (recorder.Cassette)
+  - tracing span (tracing.Tracer, category "llm")
+  - 스트리밍 조기 종료 (streaming.StopWhen — 필요한 필드가 완성되면 생성 중단)
+"""
+
+import os
+import time
+from typing import Dict, List, Optional
+from ollama import Client as OllamaClient
+
+from core_v3.llm_cache import LLMCache, get_default_cache
+from core_v3.recorder import Cassette, get_recorder
+from core_v3.tracing import get_tracer
+from core_v3.streaming import StopWhen, get_stream_stats, streaming_mode
+
+
+class LLMClient:
+    """Ollama Client 호환 chat() + 영구 응답 캐시"""
+
+    def __init__(self, host: Optional[str] = None, cache: Optional[LLMCache] = None,
+                 recorder: Optional[Cassette] = None):
+        self.host = host or os.getenv("OLLAMA_HOST", "http://192.168.50.252:11434")
+        self._client = OllamaClient(host=self.host)
+        self.cache = cache if cache is not None else get_default_cache()
+        self.recorder = recorder if recorder is not None else get_recorder()
+        self.tracer = get_tracer()
+        self.streaming = streaming_mode()       # early_stop | measure | off
+        self.stream_stats = get_stream_stats()
+
+    @staticmethod
+    def _to_dict(response) -> Dict:
+        """ollama ChatResponse → JSON 직렬화 가능한 dict"""
+        if isinstance(response, dict):
+            return response
+        if hasattr(response, "model_dump"):
+            return response.model_dump(mode="json", exclude_none=True)
+        return dict(response)
+
+    def chat(self, model: str, messages: List[Dict], options: Optional[Dict] = None,
+             format=None, stop_when: Optional[StopWhen] = None, **kwargs) -> Dict:
+        """
+        ollama.Client.chat과 같은 시그니처. 캐시에 있으면 LLM 호출 없이 반환.
+        stop_when을 주면 (LLM_STREAMING != off) 스트리밍으로 받으면서 완성 즉시 생성 중단.
+
+        Returns:
+            {"message": {"role": ..., "content": ...}, "prompt_eval_count": ..., ...}
+        """
+        if kwargs.get("stream"):
+            # 스트리밍 응답은 캐시/기록하지 않음
+            return self._client.chat(model=model, messages=messages, options=options,
+                                     format=format, **kwargs)
+
+        with self.tracer.span("llm.chat", "llm", model=model) as span:
+            if self.recorder.replaying:
+                span["source"] = "replay"
+                return self.recorder.replay("llm", Cassette.llm_key(model, messages, options, format))
+
+            response = self._cached_chat(model, messages, options, format, span=span,
+                                         stop_when=stop_when, **kwargs)
+            span["prompt_tokens"] = response.get("prompt_eval_count")
+            span["completion_tokens"] = response.get("eval_count")
+
+        if self.recorder.recording:
+            self.recorder.record(
+                "llm", Cassette.llm_key(model, messages, options, format),
+                {"model": model, "options": options, "format": format, "messages": messages},
+                response,
+            )
+        return response
+
+    def _cached_chat(self, model: str, messages: List[Dict], options: Optional[Dict],
+                     format, span: Optional[Dict] = None, stop_when: Optional[StopWhen] = None,
+                     **kwargs) -> Dict:
+        span = span if span is not None else {}
+        early_stop = stop_when is not None and self.streaming == "early_stop"
+        key = LLMCache.make_key(model, messages, options, format,
+                                early_stop=stop_when.call_type if early_stop else None)
+        cached = self.cache.get(key)
+        if cached is not None:
+            span["source"] = "cache"
+            return cached
+
+        span["source"] = "ollama"
+        if stop_when is not None and self.streaming != "off":
+            response = self._stream_chat(model, messages, options, format, stop_when, span, **kwargs)
+        else:
+            response = self._to_dict(self._client.chat(
+                model=model, messages=messages, options=options, format=format, **kwargs
+            ))
+        # 조기 종료 응답은 완성 조건별 키로 저장 — 같은 조건의 early_stop 호출에서만 재사용
+        if response.get("message", {}).get("content"):
+            self.cache.put(key, model, response)
+        return response
+
+    def _stream_chat(self, model: str, messages: List[Dict], options: Optional[Dict],
+                     format, stop_when: StopWhen, span: Dict, **kwargs) -> Dict:
+        """
+        stream=True로 받으면서 content가 완성되면 스트림을 닫음 (early_stop)
+        measure 모드는 끝까지 받되 완성 시점만 기록
+        """
+        started = time.perf_counter()
+        stream = self._client.chat(model=model, messages=messages, options=options, format=format,
+                                   stream=True, **kwargs)
+        content, thinking = [], []
+        tokens = 0
+        first_token = answer_at = answer_tokens = None
+        last: Dict = {}
+        early_stopped = False
+        try:
+            for chunk in stream:
+                last = self._to_dict(chunk)
+                message = last.get("message") or {}
+                tokens += 1
+                if first_token is None:
+                    first_token = time.perf_counter() - started
+                if message.get("thinking"):
+                    thinking.append(message["thinking"])
+                if not message.get("content"):
+                    continue
+                content.append(message["content"])
+                if answer_at is not None:
+                    continue
+                text = "".join(content)
+                end = stop_when.answer_end(text)
+                if end is not None:
+                    answer_at = time.perf_counter() - started
+                    answer_tokens = tokens
+                    if self.streaming == "early_stop":
+                        early_stopped = True
+                        content = [text[:end]]
+                        break
+        finally:
+            if hasattr(stream, "close"):
+                stream.close()      # HTTP 연결 종료 → Ollama 생성 중단
+
+        elapsed = time.perf_counter() - started
+        if last.get("done"):
+            tokens = last.get("eval_count") or tokens
+        self.stream_stats.record(stop_when.call_type, tokens, answer_tokens, elapsed,
+                                 answer_at, first_token, early_stopped)
+        span["streamed"] = stop_when.call_type
+        span["early_stop"] = early_stopped
+
+        message = {"role": "assistant", "content": "".join(content)}
+        if thinking:
+            message["thinking"] = "".join(thinking)
+        return {
+            "model": model, "message": message, "done": bool(last.get("done")),
+            "early_stop": early_stopped,
+            "prompt_eval_count": last.get("prompt_eval_count"),
+            "eval_count": last.get("eval_count") or tokens,
+        }
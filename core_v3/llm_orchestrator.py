@@ -1,39 +1,45 @@
 #!/usr/bin/env python3
 """
 LLM Orchestrator
-검증 완료된 기법들을 LLM을 통해 논리적인 공격 순서로 정렬
+검증 완료된 기법들을 논리적인 공격 순서로 정렬
+  - 기본: KillChainOrderer (tactic 순서 + dependencies + 선행 관계, LLM 호출 없음)
+  - ATTACK_CHAIN_LLM_REFINE=true: LLM 정렬로 다듬되, hard 제약을 어기면 결정적 순서 유지
 """
 
+import os
 import sys
-import json
-import re
 from pathlib import Path
-from typing import Dict, List
-from ollama import Client as OllamaClient
+from typing import Dict, List, Optional
 
 # 상위 디렉토리를 path에 추가
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-import os
-from dotenv import load_dotenv
-
-load_dotenv()
+from core_v3.llm_client import LLMClient
+from core_v3.clients import get_llm_client, get_settings
+from core_v3.kill_chain import KillChainOrderer
+from core_v3.structured_output import ATTACK_CHAIN_SCHEMA, StructuredOutputError, get_structured_output
 
 
 
 class LLMOrchestrator:
     """
-    LLM을 활용한 공격 체인 순서 결정
+    공격 체인 순서 결정 (결정적 정렬 + 선택적 LLM 보정)
     (Caldera ability 조회는 ScenarioValidator에서 이미 완료됨)
     """
 
-    def __init__(self):
-        llm_host = os.getenv("OLLAMA_HOST", "http://192.168.50.252:11434")
-        self.client = OllamaClient(host=llm_host)
-        self.model = os.getenv("LLM_MODEL", "gpt-oss:120b")
+    def __init__(self, llm_client: Optional[LLMClient] = None, attack_index=None):
+        self.client = llm_client or get_llm_client()
+        self.model = get_settings().llm_model
+        self.structured = get_structured_output()
+        if attack_index is None:
+            from core_v3.attack_index import get_default_attack_index
+            attack_index = get_default_attack_index()
+        self.orderer = KillChainOrderer(attack_index)
+        self.llm_refine = os.getenv("ATTACK_CHAIN_LLM_REFINE", "false").lower() == "true"
 
     def plan_executable_attack_chain(self, validated_techniques: List[Dict],
-                                     scenario_context: Dict = None) -> List[Dict]:
+                                     scenario_context: Dict = None,
+                                     llm_refine: Optional[bool] = None) -> List[Dict]:
         """
         검증 완료된 techniques를 논리적인 공격 순서로 정렬
         
@@ -41,11 +47,12 @@ class LLMOrchestrator:
             validated_techniques: ScenarioValidator에서 검증 완료된 technique 목록
                 (각 technique에 caldera_validation.selected_ability가 포함됨)
             scenario_context: 시나리오 컨텍스트
+            llm_refine: KillChainOrderer 결과를 LLM 정렬로 다듬을지 (None = ATTACK_CHAIN_LLM_REFINE)
         
         Returns:
             공격 순서가 정해진 step 목록
         """
-        print("\n[*] Planning executable attack chain with LLM...")
+        print("\n[*] Planning executable attack chain...")
         
         # 실행 가능 + ability가 선택된 techniques만 필터링
         executable_techs = []
@@ -59,7 +66,56 @@ class LLMOrchestrator:
             return []
         
         print(f"  OK Using {len(executable_techs)} executable techniques")
-        
+
+        # 결정적 정렬 (tactic 순서 + dependencies + 선행 관계)
+        steps = self.orderer.order(executable_techs)
+        ordered = [(s.technique, s.reason, s.dependencies) for s in steps]
+
+        if self.llm_refine if llm_refine is None else llm_refine:
+            llm_ids = self.llm_order(executable_techs, scenario_context)
+            violations = self.orderer.violations(llm_ids, executable_techs) if llm_ids else []
+            if not llm_ids:
+                print("  [!] LLM ordering unavailable - keeping kill-chain order")
+            elif violations:
+                print(f"  [!] LLM ordering rejected ({len(violations)} constraint violations):")
+                for v in violations[:5]:
+                    print(f"      - {v}")
+            else:
+                # LLM이 빠뜨린 technique은 결정적 순서대로 뒤에 붙임
+                position = {tid: n for n, tid in reversed(list(enumerate(llm_ids)))}
+                refined = sorted(steps, key=lambda s: position.get(s.technique_id, len(llm_ids)))
+                ordered = [(s.technique, "LLM refinement; " + s.reason, s.dependencies) for s in refined]
+                print("  OK LLM refinement accepted")
+
+        plan = []
+        for n, (tech, reason, dependencies) in enumerate(ordered, 1):
+            selected = tech["caldera_validation"]["selected_ability"]
+            plan.append({
+                "step": n,
+                "technique_id": tech["technique_id"],
+                "technique_name": tech["technique_name"],
+                "tactic": tech["tactic"],
+                "ability_id": selected["ability_id"],
+                "ability_name": selected["name"],
+                "reason": reason,
+                "dependencies": dependencies
+            })
+
+        print(f"  OK Generated attack chain with {len(plan)} steps")
+
+        print(f"\n[*] Attack Chain Summary:")
+        for step in plan:
+            print(f"    {step['step']}. {step['technique_id']} ({step['tactic']})")
+            print(f"       → {step['ability_name']}")
+            print(f"       Reason: {step.get('reason', 'N/A')}")
+
+        return plan
+
+    def llm_order(self, techniques: List[Dict], scenario_context: Dict = None) -> List[str]:
+        """
+        LLM에게 technique 순서를 묻고 technique_id 순서 반환 (실패 시 빈 목록)
+        (caldera_validation.selected_ability가 있으면 ability 정보도 프롬프트에 포함)
+        """
         # LLM 프롬프트
         system_prompt = """You are a red team operations planner expert in MITRE ATT&CK.
 Your task is to create a logical, executable attack chain.
@@ -81,13 +137,15 @@ Output ONLY valid JSON array:
 ]"""
         
         # Techniques 요약
-        techniques_summary = "\n".join([
-            f"""  {i+1}. {t['technique_id']}: {t['technique_name']}
-     Tactic: {t['tactic']}
-     Ability: {t['caldera_validation']['selected_ability']['name']} (Privilege: {t['caldera_validation']['selected_ability']['privilege']})
-     Expected: {t.get('expected_action', 'N/A')[:100]}..."""
-            for i, t in enumerate(executable_techs)
-        ])
+        lines = []
+        for i, t in enumerate(techniques):
+            selected = t.get("caldera_validation", {}).get("selected_ability")
+            ability = (f"\n     Ability: {selected['name']} (Privilege: {selected.get('privilege')})"
+                       if selected else "")
+            lines.append(f"""  {i+1}. {t['technique_id']}: {t.get('technique_name', '')}
+     Tactic: {t.get('tactic', '')}{ability}
+     Expected: {(t.get('expected_action') or 'N/A')[:100]}...""")
+        techniques_summary = "\n".join(lines)
         
         # 시나리오 컨텍스트
         context_str = ""
@@ -114,59 +172,21 @@ IMPORTANT:
 Generate the execution plan as JSON array with step numbers and reasons."""
         
         try:
-            response = self.client.chat(
-                model=self.model,
+            plan = self.structured.chat(
+                self.client, self.model,
                 messages=[
                     {"role": "system", "content": system_prompt},
                     {"role": "user", "content": user_prompt}
                 ],
+                schema=ATTACK_CHAIN_SCHEMA, call_type="ordering",
                 options={"temperature": 0.0}
             )
-            
-            result_text = response["message"]["content"].strip()
-            
-            # JSON 추출
-            result_text = re.sub(r"```json\s*", "", result_text)
-            result_text = re.sub(r"```\s*", "", result_text)
-            
-            plan = json.loads(result_text)
-            
-            # LLM 결과에 ability 정보 병합
-            enriched_plan = []
-            for step in plan:
-                tech_id = step.get("technique_id")
-                
-                tech_info = next(
-                    (t for t in executable_techs if t["technique_id"] == tech_id),
-                    None
-                )
-                
-                if tech_info:
-                    selected = tech_info["caldera_validation"]["selected_ability"]
-                    enriched_plan.append({
-                        "step": int(step.get("step", 0)),
-                        "technique_id": tech_id,
-                        "technique_name": tech_info["technique_name"],
-                        "tactic": tech_info["tactic"],
-                        "ability_id": selected["ability_id"],
-                        "ability_name": selected["name"],
-                        "reason": step.get("reason", ""),
-                        "dependencies": step.get("dependencies", [])
-                    })
-            
-            print(f"  OK Generated attack chain with {len(enriched_plan)} steps")
-            
-            print(f"\n[*] Attack Chain Summary:")
-            for step in enriched_plan:
-                print(f"    {step['step']}. {step['technique_id']} ({step['tactic']})")
-                print(f"       → {step['ability_name']}")
-                print(f"       Reason: {step.get('reason', 'N/A')}")
-            
-            return enriched_plan
+            plan = sorted(plan, key=lambda step: int(step.get("step", 0)))
+            return [step.get("technique_id") for step in plan if step.get("technique_id")]
         
-        except json.JSONDecodeError as e:
+        except StructuredOutputError as e:
             print(f"  [!] JSON parsing failed: {e}")
-            print(f"  [!] Raw response: {result_text[:500]}")
+            print(f"  [!] Raw response: {e.raw[:500]}")
             return []
         except Exception as e:
             print(f"  [!] Error: {e}")
@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+"""
+Operation Watcher
+고정 간격 폴링 대신 agent sleep과 link 도착 속도에 맞춰 간격을 조절하며 operation 완료를 감지한다.
+adversary의 atomic_ordering에 있는 모든 ability가 terminal 상태가 되면 Caldera의 'finished' 전이를 기다리지 않고 반환.
+link는 LinkTracker가 per-operation links endpoint로 받아 (id, status) diff만 로컬 chain에 반영한다.
+"""
+
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+
+from core_v3.tracing import get_tracer
+
+
+# Caldera link status: 0=success, 1=error, 124=timeout, -2=discard
+#                      -1=pause, -3=execute(in-flight), -4=untrusted, -5=high-viz(approval 대기)
+def is_terminal_status(status) -> bool:
+    """더 이상 변하지 않는 link status 여부"""
+    if not isinstance(status, int):
+        return False
+    return status >= 0 or status == -2
+
+
+class LinkTracker:
+    """
+    Operation link 증분 추적기 (로컬 materialized chain)
+
+    매 poll마다 operation 문서 전체(host_group, adversary, source facts, chain)를 받는 대신
+    /operations/{id}/links만 받아 (link id, status)가 바뀐 link만 chain에 반영한다.
+    links endpoint가 없으면 operation 문서의 chain으로 fallback 후 같은 방식으로 diff.
+    """
+
+    def __init__(self, caldera, operation_id: str):
+        self.caldera = caldera
+        self.operation_id = operation_id
+        self.chain: Dict[str, Dict] = {}      # link id → link (도착 순서 유지)
+        self._status: Dict[str, object] = {}  # link id → 마지막으로 본 status
+        self.use_links_endpoint = True
+        self.last_operation: Optional[Dict] = None   # fallback 모드에서 받은 operation 문서
+        self.stats = {"fetches": 0, "op_doc_fetches": 0, "links_received": 0,
+                      "links_new": 0, "links_changed": 0}
+
+    @staticmethod
+    def _link_key(link: Dict) -> str:
+        return link.get("id") or link.get("unique") or ""
+
+    def _fetch(self) -> Optional[List[Dict]]:
+        if self.use_links_endpoint:
+            links = self.caldera.get_operation_link_list(self.operation_id)
+            if links is not None:
+                return links
+            # 구버전 Caldera — 이후로는 operation 문서 사용
+            self.use_links_endpoint = False
+
+        op = self.caldera.get_operation(self.operation_id)
+        self.stats["op_doc_fetches"] += 1
+        if not op:
+            return None
+        self.last_operation = op
+        return op.get("chain", [])
+
+    def refresh(self) -> Optional[Tuple[List[Dict], List[Dict]]]:
+        """
+        최신 link 목록을 받아 로컬 chain 갱신
+
+        Returns:
+            (new_links, changed_links) or None (조회 실패)
+        """
+        links = self._fetch()
+        self.stats["fetches"] += 1
+        if links is None:
+            return None
+        self.stats["links_received"] += len(links)
+
+        new, changed = [], []
+        for link in links:
+            key = self._link_key(link)
+            status = link.get("status")
+            if key not in self.chain:
+                new.append(link)
+            elif self._status.get(key) != status:
+                changed.append(link)
+            else:
+                continue
+            self.chain[key] = link
+            self._status[key] = status
+
+        self.stats["links_new"] += len(new)
+        self.stats["links_changed"] += len(changed)
+        return new, changed
+
+    def links(self) -> List[Dict]:
+        return list(self.chain.values())
+
+    def all_terminal(self) -> bool:
+        return bool(self.chain) and all(is_terminal_status(s) for s in self._status.values())
+
+
+class OperationWatcher:
+    """
+    적응형 operation 완료 감지기
+
+    폴링 간격:
+      - 기본값은 agent의 beacon 주기(sleep_min~sleep_max)의 중간값
+      - link가 도착하는 평균 간격(EWMA)의 절반보다 길어지지 않도록 조정
+      - 변화가 없으면 backoff 배수만큼 늘려 max_interval까지
+      - 남은 link가 1개 이하이면 fast_interval로 전환
+
+    operation 문서(state 확인용)는 시작 시, state_check_every poll마다,
+    그리고 in-flight link가 없을 때만 조회한다. 나머지 poll은 LinkTracker의 link 목록만 사용.
+    """
+
+    def __init__(self, caldera, min_interval: float = 1.0, max_interval: float = 15.0,
+                 fast_interval: float = 1.0, backoff: float = 1.5, state_check_every: int = 5,
+                 sleep: Callable[[float], None] = time.sleep,
+                 clock: Callable[[], float] = time.monotonic,
+                 wall_clock: Optional[Callable[[], float]] = time.time):
+        self.caldera = caldera
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.fast_interval = fast_interval
+        self.backoff = backoff
+        self.state_check_every = state_check_every   # N poll마다 operation state 확인
+        self._sleep = sleep
+        self._clock = clock
+        self._wall_clock = wall_clock     # link finish 타임스탬프와 비교할 시각 (None = completion lag 측정 안 함)
+        self.tracer = get_tracer()
+
+    # ==================== 폴링 ====================
+
+    def _fetch_operation(self, operation_id: str, tracker: LinkTracker) -> Optional[Dict]:
+        """state/adversary/host_group 확인용 operation 문서 조회"""
+        tracker.stats["op_doc_fetches"] += 1
+        return self.caldera.get_operation(operation_id)
+
+    def _wait(self, interval: float, used_intervals: List[float]):
+        """poll 사이 대기 (agent beacon 대기 구간으로 trace에 기록)"""
+        with self.tracer.span("agent_wait", "wait", interval=round(interval, 2)):
+            self._sleep(interval)
+        used_intervals.append(interval)
+
+    # ==================== 간격 계산 ====================
+
+    @staticmethod
+    def _agent_sleep(op: Dict, default: Tuple[float, float]) -> Tuple[float, float]:
+        """operation host_group에서 agent beacon 주기 추출"""
+        mins, maxs = [], []
+        for agent in op.get("host_group", []) or []:
+            if isinstance(agent.get("sleep_min"), (int, float)):
+                mins.append(agent["sleep_min"])
+            if isinstance(agent.get("sleep_max"), (int, float)):
+                maxs.append(agent["sleep_max"])
+        if mins and maxs:
+            return min(mins), max(maxs)
+        return default
+
+    def _clamp(self, value: float) -> float:
+        return max(self.min_interval, min(self.max_interval, value))
+
+    # ==================== 완료 판정 ====================
+
+    @staticmethod
+    def _expected_abilities(op: Dict) -> List[str]:
+        adversary = op.get("adversary") or {}
+        return list(adversary.get("atomic_ordering") or [])
+
+    @staticmethod
+    def _pending_count(links: List[Dict], expected: List[str]) -> Optional[int]:
+        """
+        아직 terminal 상태가 아닌 expected ability 개수 (expected를 모르면 None)
+        """
+        if not expected:
+            return None
+        done = set()
+        for link in links:
+            ability_id = (link.get("ability") or {}).get("ability_id")
+            if is_terminal_status(link.get("status")):
+                done.add(ability_id)
+        in_flight = sum(1 for l in links if not is_terminal_status(l.get("status")))
+        return max(len([a for a in expected if a not in done]), in_flight)
+
+    @staticmethod
+    def _parse_timestamp(value) -> Optional[float]:
+        """Caldera 타임스탬프 ('2024-01-01T00:00:00Z', 소수 초/오프셋 허용) → epoch 초"""
+        if not value or not isinstance(value, str):
+            return None
+        try:
+            parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        return parsed.timestamp()
+
+    def _completion_lag(self, links: List[Dict]) -> Optional[float]:
+        """
+        마지막 link가 실제로 끝난 시각(link 'finish') → 완료 감지까지.
+        Caldera 서버와 시계가 다르면 그만큼 오차 (Caldera 타임스탬프는 초 단위)
+        """
+        if self._wall_clock is None:
+            return None
+        finished = [self._parse_timestamp(l.get("finish")) for l in links
+                    if is_terminal_status(l.get("status"))]
+        finished = [t for t in finished if t is not None]
+        if not finished:
+            return None
+        return round(self._wall_clock() - max(finished), 2)
+
+    # ==================== 메인 루프 ====================
+
+    def watch(self, operation_id: str, timeout: float = 1800,
+              agent_sleep: Tuple[float, float] = (3, 5)) -> Dict:
+        """
+        Operation 완료까지 대기
+
+        Args:
+            operation_id: Operation ID
+            timeout: 최대 대기 시간 (초)
+            agent_sleep: host_group에 sleep 정보가 없을 때 사용할 (sleep_min, sleep_max)
+
+        Returns:
+            {
+                "reason": "all_links_terminal" | "finished" | "timeout",
+                "state": str,
+                "elapsed_s": float,
+                "polls": int,
+                "links": int,
+                "completion_lag_s": float | None,   # 마지막 link finish 시각 → 완료 감지까지
+                "link_tracking": {...},             # LinkTracker 전송/diff 통계
+                "intervals": {"min": float, "max": float, "avg": float}
+            }
+        """
+        start = self._clock()
+        interval = self._clamp(sum(agent_sleep) / 2)
+        arrival_gap = None          # link 상태 변화 간격 EWMA
+        last_change_at = None
+        last_link_count = 0
+        polls = 0
+        used_intervals = []
+        state = "unknown"
+        reason = "timeout"
+        tracker = LinkTracker(self.caldera, operation_id)
+        op: Optional[Dict] = None
+        last_op_fetch_at = start
+
+        print(f"[*] Watching operation (adaptive polling, timeout: {int(timeout)//60}min)")
+
+        while True:
+            now = self._clock()
+            elapsed = now - start
+            if elapsed > timeout:
+                print(f"\n[!] Timeout after {int(timeout)//60} minutes")
+                break
+
+            with self.tracer.span("poll", "poll", operation_id=operation_id, poll=polls + 1):
+                # ── operation 문서 (state / expected / agent sleep) ─────────
+                if tracker.use_links_endpoint and (op is None or (polls and polls % self.state_check_every == 0)):
+                    fetched = self._fetch_operation(operation_id, tracker)
+                    if fetched:
+                        op = fetched
+                        last_op_fetch_at = self._clock()
+
+                diff = tracker.refresh()
+            polls += 1
+            if tracker.last_operation is not None:
+                op = tracker.last_operation
+            if not op or diff is None:
+                print(f"  [!] Failed to fetch operation")
+                self._wait(interval, used_intervals)
+                continue
+
+            new_links, changed_links = diff
+            links = tracker.links()
+            sleep_min, sleep_max = self._agent_sleep(op, agent_sleep)
+            base_interval = self._clamp((sleep_min + sleep_max) / 2)
+
+            # ── link 상태 변화 반영 ─────────────────────────────────
+            now = self._clock()
+            if new_links or changed_links:
+                if last_change_at is not None:
+                    gap = now - last_change_at
+                    arrival_gap = gap if arrival_gap is None else 0.5 * arrival_gap + 0.5 * gap
+                last_change_at = now
+                interval = base_interval
+                if arrival_gap is not None:
+                    interval = self._clamp(min(base_interval, arrival_gap / 2))
+            else:
+                interval = self._clamp(interval * self.backoff)
+
+            if len(links) != last_link_count:
+                mins, secs = int(elapsed // 60), int(elapsed % 60)
+                print(f"  [{mins:02d}:{secs:02d}] state={op.get('state', 'unknown')}, links={len(links)}")
+                last_link_count = len(links)
+
+            # ── 완료 판정 ───────────────────────────────────────────
+            pending = self._pending_count(links, self._expected_abilities(op))
+            if pending == 0:
+                state = op.get("state", "unknown")
+                reason = "all_links_terminal"
+                break
+
+            # in-flight link 없이 agent beacon 2회 이상 변화 없음 → planner 종료 여부를 state로 확인
+            idle = now - last_change_at if last_change_at is not None else 0
+            if (tracker.all_terminal() and tracker.last_operation is None
+                    and idle >= 2 * sleep_max and now - last_op_fetch_at >= 2 * sleep_max):
+                fetched = self._fetch_operation(operation_id, tracker)
+                if fetched:
+                    op = fetched
+                    last_op_fetch_at = now
+
+            state = op.get("state", "unknown")
+            if state == "finished":
+                reason = "finished"
+                break
+
+            # 마지막 link 실행 중 → 빠른 폴링
+            if pending is not None and pending <= 1 and not tracker.all_terminal():
+                interval = min(interval, self.fast_interval)
+
+            self._wait(interval, used_intervals)
+
+        detected_at = self._clock()
+        elapsed = detected_at - start
+        completion_lag = self._completion_lag(tracker.links()) if reason != "timeout" else None
+
+        if reason != "timeout":
+            mins, secs = int(elapsed // 60), int(elapsed % 60)
+            label = "all expected links terminal" if reason == "all_links_terminal" else "Operation finished"
+            lag = f"{completion_lag}s" if completion_lag is not None else "n/a"
+            print(f"\n  ✓ {label} in {mins}m {secs}s ({polls} polls, completion lag: {lag})")
+
+        return {
+            "reason": reason,
+            "state": state,
+            "elapsed_s": round(elapsed, 2),
+            "polls": polls,
+            "links": len(tracker.chain),
+            "completion_lag_s": completion_lag,
+            "link_tracking": dict(tracker.stats, links_endpoint=tracker.use_links_endpoint),
+            "intervals": {
+                "min": round(min(used_intervals), 2) if used_intervals else None,
+                "max": round(max(used_intervals), 2) if used_intervals else None,
+                "avg": round(sum(used_intervals) / len(used_intervals), 2) if used_intervals else None,
+            },
+        }
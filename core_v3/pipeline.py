@@ -7,22 +7,30 @@ Pipeline v3
 import sys
 import json
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
 from typing import Dict, List, Optional, Tuple
 import os
-from dotenv import load_dotenv
 
 # 상위 디렉토리를 path에 추가
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from core_v3.scenario import ScenarioProcessor
 from core_v3.llm_orchestrator import LLMOrchestrator
-from core_v3.caldera_client import CalderaClient
-
+from core_v3.clients import get_caldera_client, get_settings
 from core_v3.svo_extractor import SVOExtractor, AttackSVO
 from core_v3.ability_generator import AbilityGenerator
 from core_v3.react_agent import ReactAgent, FixAttempt
+from core_v3.operation_watcher import OperationWatcher
+from core_v3.rerun_planner import RerunPlanner
+from core_v3.llm_cache import LLMCache, get_default_cache
+from core_v3.structured_output import StructuredOutput, get_structured_output
+from core_v3.streaming import StreamStats, get_stream_stats, streaming_mode
+from core_v3.fix_store import get_default_fix_store
+from core_v3.checkpoint import SessionCheckpoint, add_counters
+from core_v3.recorder import get_recorder, watcher_timing
+from core_v3.tracing import get_tracer
 
 
 class Pipeline:
@@ -31,20 +39,46 @@ class Pipeline:
     def __init__(self):
         self.scenario = ScenarioProcessor()
         self.orchestrator = LLMOrchestrator()
-        self.caldera = CalderaClient()
+        # 모든 컴포넌트가 같은 CalderaClient / LLMClient 사용 (connection pool, ability 카탈로그 공유)
+        self.caldera = get_caldera_client()
         self.svo_extractor = SVOExtractor()
         self.ability_generator = AbilityGenerator()
         self.react_agent = ReactAgent()
+        _sleep, _clock, _wall_clock = watcher_timing()
+        self.watcher = OperationWatcher(self.caldera, sleep=_sleep, clock=_clock, wall_clock=_wall_clock)
+        self.rerun_planner = RerunPlanner(self.caldera)
+        self.rerun_mode = os.getenv("REACT_RERUN_MODE", "full").lower()
+        self.chain_order = os.getenv("ATTACK_CHAIN_ORDER", "kill_chain").lower()   # kill_chain | scenario
+        self.use_svo = True
+        self.react_workers = int(os.getenv("REACT_MAX_WORKERS", "4"))
+        self.react_candidates = int(os.getenv("REACT_CANDIDATES", "1"))       # 실패당 생성할 수정 후보 수
+        self.react_execute_top_k = int(os.getenv("REACT_EXECUTE_TOP_K", "1"))  # 같은 라운드에 실행할 상위 후보 수
+        self._agent_sleep = (3, 5)
+        self.llm_cache = get_default_cache()
+        self.fix_store = get_default_fix_store()
+        self._llm_cache_start = self.llm_cache.snapshot()
+        self.structured = get_structured_output()
+        self._structured_start = self.structured.snapshot()
+        self.stream_stats = get_stream_stats()
+        self._stream_start = self.stream_stats.snapshot()
+        self.tracer = get_tracer()
+        self.session_dir: Optional[Path] = None     # 현재 세션 디렉토리 (중단 시 --resume 안내용)
+        self._run_index = 0                          # checkpoint "runs"에서 이번 run의 위치
+        self._prior_runs: List[Dict] = []            # 같은 세션의 이전 run 통계 (session_info에 합산)
 
         # Cleanup 추적용
         self._created_abilities = []
         self._created_adversaries = []
         self._created_operations = []
 
-    def _optimize_agent_sleep(self, sleep_min: int = 3, sleep_max: int = 5):
-        """연결된 모든 에이전트의 sleep interval을 단축하여 실행 속도 향상"""
+    def _optimize_agent_sleep(self, sleep_min: int = 3, sleep_max: int = 5,
+                              paws: Optional[List[str]] = None):
+        """연결된 에이전트(paws가 주어지면 해당 에이전트만)의 sleep interval을 단축하여 실행 속도 향상"""
         print(f"[*] Optimizing agent sleep interval ({sleep_min}~{sleep_max}s)...")
+        self._agent_sleep = (sleep_min, sleep_max)
         agents = self.caldera.get_agents()
+        if paws is not None:
+            agents = [a for a in agents if a.get('paw') in paws]
         if not agents:
             print("  [!] No agents found to optimize")
             return
@@ -76,7 +110,11 @@ class Pipeline:
 
     def run(self, scenario_file: str, output_dir: str = None,
              force_generate: bool = False,
-             use_svo: bool = True) -> Optional[Tuple[Path, str]]:
+             use_svo: bool = True,
+             rerun_mode: Optional[str] = None,
+             resume_dir: Optional[str] = None,
+             agent_paw: Optional[str] = None,
+             stop_after: Optional[str] = None) -> Optional[Tuple[Path, str]]:
         """
         전체 파이프라인 실행
 
@@ -85,35 +123,73 @@ class Pipeline:
             output_dir: 결과 저장 디렉토리 (기본: results/)
             force_generate: True이면 기존 Caldera ability를 무시하고 SVO로만 생성 (실험용)
             use_svo: False이면 ReAct 프롬프트에서 SVO 제약 제거 (ablation 실험용)
+            rerun_mode: ReAct 라운드 재실행 방식 "full" | "targeted" (기본: REACT_RERUN_MODE)
+            resume_dir: 중단된 세션 디렉토리 — checkpoint.json 기준으로 완료된 phase의 산출물을 다시 읽고
+                        첫 미완료 phase부터 이어서 실행 (scenario_file / force_generate / use_svo는 checkpoint 값 사용)
+            agent_paw: 대상 에이전트 (기본: 연결된 첫 번째 에이전트, 배치 실행 시 에이전트별 분배용)
+            stop_after: 해당 checkpoint phase("parsed" | "validated" | "abilities" | "operation" | "results")까지만
+                        실행하고 반환 — 나머지는 resume_dir로 이어서 실행 (StagedExecutor의 stage 분리용)
 
         Returns:
-            (session_dir, operation_id) 또는 None
+            (session_dir, operation_id) 또는 None (Phase 4 전에 stop_after로 중단하면 operation_id는 None)
         """
+        self._llm_cache_start = self.llm_cache.snapshot()
+        self._structured_start = self.structured.snapshot()
+        self._stream_start = self.stream_stats.snapshot()
+        self.tracer.reset()
+        self._prior_runs, self._run_index = [], 0
+
+        checkpoint = None
+        if resume_dir:
+            checkpoint = SessionCheckpoint.load(Path(resume_dir))
+            if checkpoint is None:
+                print(f"[!] No checkpoint found in {resume_dir}")
+                return None
+            scenario_file = checkpoint.get("scenario_file", scenario_file)
+            force_generate = checkpoint.get("force_generate", force_generate)
+            use_svo = checkpoint.get("use_svo", use_svo)
+            rerun_mode = rerun_mode or checkpoint.get("rerun_mode")
+            # 이전 run(stage)의 timing / 카운터 — 이번 run은 그 뒤에 기록
+            self._prior_runs = list(checkpoint.get("runs", []))
+            self._run_index = len(self._prior_runs)
+            created = checkpoint.get("created", {})
+            self._created_abilities = list(created.get("abilities", []))
+            self._created_adversaries = list(created.get("adversaries", []))
+            self._created_operations = list(created.get("operations", []))
+
         self.use_svo = use_svo
-        self._print_header("SCENARIO2CALDERA FULL PIPELINE EXECUTION")
+        rerun_mode = rerun_mode or self.rerun_mode
+        self._print_header("SCENARIO2CALDERA FULL PIPELINE EXECUTION" + (" (RESUME)" if checkpoint else ""))
 
         # 파일 경로 처리
         scenario_path = Path(scenario_file)
         if not scenario_path.is_absolute():
             scenario_path = Path(__file__).parent.parent / scenario_file
 
-        if not scenario_path.exists():
+        if not scenario_path.exists() and not (checkpoint and checkpoint.done("parsed")):
             print(f"[!] Scenario file not found: {scenario_path}")
             return None
 
         print(f"\n[*] Scenario: {scenario_path}")
 
-        # 출력 디렉토리 생성
-        if output_dir:
-            base_dir = Path(output_dir)
+        if checkpoint:
+            session_dir = checkpoint.session_dir
+            self._verify_checkpoint(checkpoint)
         else:
-            base_dir = Path(__file__).parent.parent / "results"
-        base_dir.mkdir(exist_ok=True)
+            # 출력 디렉토리 생성
+            if output_dir:
+                base_dir = Path(output_dir)
+            else:
+                base_dir = Path(__file__).parent.parent / "results"
+            base_dir.mkdir(exist_ok=True)
 
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        session_dir = base_dir / f"session_{timestamp}"
-        session_dir.mkdir(exist_ok=True)
+            session_dir = self._new_session_dir(base_dir)
 
+            checkpoint = SessionCheckpoint(session_dir)
+            self._checkpoint(checkpoint, "started", scenario_file=str(scenario_path),
+                             force_generate=force_generate, use_svo=use_svo, rerun_mode=rerun_mode)
+
+        self.session_dir = session_dir
         print(f"[*] Output directory: {session_dir}")
 
         # ==================================================================
@@ -121,36 +197,44 @@ class Pipeline:
         # ==================================================================
         self._print_header("PHASE 1: Scenario Parsing")
 
-        parsed_data = self.scenario.parse(scenario_path)
+        parsed_data = self._restored(checkpoint, "parsed", "01_parsed_scenario.json")
+        if parsed_data is None:
+            parsed_data = self.scenario.parse(scenario_path)
 
-        if not parsed_data:
-            print("[!] Failed to parse scenario")
-            return None
+            if not parsed_data:
+                print("[!] Failed to parse scenario")
+                return None
+
+            self._save_json(session_dir / "01_parsed_scenario.json", parsed_data)
+            self._checkpoint(checkpoint, "parsed")
+        if self._stopping(checkpoint, stop_after, "parsed"):
+            return session_dir, None
 
         print(f"  ✓ Scenario: {parsed_data.get('scenario_name')}")
         print(f"  ✓ Target: {parsed_data.get('target_org')}")
         print(f"  ✓ Threat Actor: {parsed_data.get('threat_actor')}")
         print(f"  ✓ Techniques: {len(parsed_data.get('techniques', []))}")
 
-        self._save_json(session_dir / "01_parsed_scenario.json", parsed_data)
-
         # ==================================================================
         # PHASE 2: Caldera 검증 + SVO 추출
         # ==================================================================
         self._print_header("PHASE 2: Caldera Validation")
 
-        if force_generate:
-            print("  ⚡ force_generate=True — skipping Caldera validation (all abilities will be SVO-generated)")
-            validated_data = dict(parsed_data)
-            for tech in validated_data.get("techniques", []):
-                tech.setdefault("caldera_validation", {})
-            _n = len(validated_data.get("techniques", []))
-            validated_data["validation"] = {
-                "total": _n, "executable": 0, "non_executable": _n,
-                "exact_match": 0, "parent_fallback": 0, "coverage_rate": 0.0,
-            }
-        else:
-            validated_data = self.scenario.validate(parsed_data)
+        validated_data = self._restored(checkpoint, "validated", "02_validated_scenario.json")
+        restored_validation = validated_data is not None
+        if not restored_validation:
+            if force_generate:
+                print("  ⚡ force_generate=True — skipping Caldera validation (all abilities will be SVO-generated)")
+                validated_data = dict(parsed_data)
+                for tech in validated_data.get("techniques", []):
+                    tech.setdefault("caldera_validation", {})
+                _n = len(validated_data.get("techniques", []))
+                validated_data["validation"] = {
+                    "total": _n, "executable": 0, "non_executable": _n,
+                    "exact_match": 0, "parent_fallback": 0, "coverage_rate": 0.0,
+                }
+            else:
+                validated_data = self.scenario.validate(parsed_data)
 
         validation = validated_data.get('validation', {})
         print(f"\n  ✓ Total Techniques:     {validation.get('total')}")
@@ -163,71 +247,92 @@ class Pipeline:
         self._print_header("PHASE 2.5: SVO Extraction")
 
         all_techniques = validated_data.get("techniques", [])
-        svos = self.svo_extractor.extract_all_svos(all_techniques)
+        if restored_validation:
+            print(f"  ✓ SVOs: {sum(1 for t in all_techniques if t.get('svo'))}/{len(all_techniques)}")
+        else:
+            svos = self.svo_extractor.extract_all_svos(all_techniques)
 
-        self._save_json(session_dir / "02_svo_extraction.json", {
-            "total_techniques": len(all_techniques),
-            "svo_extracted": len(svos),
-            "svos": [s.to_dict() for s in svos]
-        })
+            self._save_json(session_dir / "02_svo_extraction.json", {
+                "total_techniques": len(all_techniques),
+                "svo_extracted": len(svos),
+                "svos": [s.to_dict() for s in svos],
+                "timing": self.svo_extractor.last_run,
+            })
+            # technique마다 svo가 붙은 검증 결과 (resume 시 Phase 2~2.5 대체)
+            self._save_json(session_dir / "02_validated_scenario.json", validated_data)
+            self._checkpoint(checkpoint, "validated")
+        if self._stopping(checkpoint, stop_after, "validated"):
+            return session_dir, None
 
         # ------------------------------------------------------------------
         # PHASE 3: Ability 확보 (기존 선택 or SVO 기반 생성)
         # ------------------------------------------------------------------
         self._print_header("PHASE 3: Ability Acquisition")
 
-        # Agent 확인 (ability 생성 시 platform 파악 필요)
-        agents = self.caldera.list_agents()
-
-        if not agents:
-            print("\n" + "="*80)
-            print("⚠️  NO AGENTS AVAILABLE")
-            print("="*80)
-            print("\n📋 Deploy Caldera agent on target VM, then run again.")
-            return None
-
-        selected_agent = agents[0].get('paw')
-        agent = self.caldera.get_agent(selected_agent)
-        platform = agent.get('platform', 'windows') if agent else 'windows'
-        print(f"\n[*] Agent: {selected_agent} (platform: {platform})")
-
-        # 에이전트 sleep 단축 (속도 최적화)
-        self._optimize_agent_sleep(sleep_min=3, sleep_max=5)
-
-        # 환경 컨텍스트 수집 (LLM이 실제 주소를 커맨드에 넣도록)
-        
-        
-        load_dotenv()
-
-        agent_url = os.getenv("CALDERA_AGENT_URL", os.getenv("CALDERA_URL", "http://192.168.50.31:8888"))
-        agent_info = {
-            "c2_server_url": agent_url,
-            "host": agent.get('host', '') if agent else '',
-            "privilege": agent.get('privilege', 'User') if agent else 'User',
-            "payloads": self.caldera.list_payloads(),
-            "payload_download_url_format": "#{server}/file/download/<filename>",
-        }
-
-        # 모든 technique에 대해 ability 확보 (기존 or 생성)
-        ability_results = self.ability_generator.generate_abilities_for_plan(
-            all_techniques, platform=platform, force_generate=force_generate,
-            agent_info=agent_info
-        )
-
-        if ability_results:
-            for ab in ability_results:
-                if ab.get('source') == 'generated' and ab.get('ability_id'):
-                    self._created_abilities.append(ab.get('ability_id'))
-
-        if not ability_results:
-            print("\n[!] No abilities available for any technique!")
-            return None
+        acquisition = self._restored(checkpoint, "abilities", "03_ability_acquisition.json")
+        if acquisition is not None:
+            ability_results = acquisition.get("abilities", [])
+            selected_agent = checkpoint.get("selected_agent")
+            platform = checkpoint.get("platform", "windows")
+            agent_info = checkpoint.get("agent_info", {})
+            print(f"\n[*] Agent: {selected_agent} (platform: {platform})")
+        else:
+            # Agent 확인 (ability 생성 시 platform 파악 필요)
+            agents = self.caldera.list_agents()
+
+            if not agents:
+                print("\n" + "="*80)
+                print("⚠️  NO AGENTS AVAILABLE")
+                print("="*80)
+                print("\n📋 Deploy Caldera agent on target VM, then run again.")
+                return None
+
+            if agent_paw and agent_paw not in [a.get('paw') for a in agents]:
+                print(f"\n[!] Agent {agent_paw} is not connected")
+                return None
+
+            selected_agent = agent_paw or agents[0].get('paw')
+            agent = self.caldera.get_agent(selected_agent)
+            platform = agent.get('platform', 'windows') if agent else 'windows'
+            print(f"\n[*] Agent: {selected_agent} (platform: {platform})")
+
+            # 에이전트 sleep 단축 (속도 최적화 — 에이전트를 지정한 경우 다른 작업의 에이전트는 건드리지 않음)
+            self._optimize_agent_sleep(sleep_min=3, sleep_max=5,
+                                       paws=[selected_agent] if agent_paw else None)
+
+            # 환경 컨텍스트 수집 (LLM이 실제 주소를 커맨드에 넣도록)
+            agent_info = {
+                "c2_server_url": get_settings().caldera_agent_url,
+                "host": agent.get('host', '') if agent else '',
+                "privilege": agent.get('privilege', 'User') if agent else 'User',
+                "payloads": self.caldera.list_payloads(),
+                "payload_download_url_format": "#{server}/file/download/<filename>",
+            }
 
-        self._save_json(session_dir / "03_ability_acquisition.json", {
-            "total_techniques": len(all_techniques),
-            "abilities_acquired": len(ability_results),
-            "abilities": ability_results
-        })
+            # 모든 technique에 대해 ability 확보 (기존 or 생성)
+            ability_results = self.ability_generator.generate_abilities_for_plan(
+                all_techniques, platform=platform, force_generate=force_generate,
+                agent_info=agent_info
+            )
+
+            if ability_results:
+                for ab in ability_results:
+                    if ab.get('source') == 'generated' and ab.get('ability_id'):
+                        self._created_abilities.append(ab.get('ability_id'))
+
+            if not ability_results:
+                print("\n[!] No abilities available for any technique!")
+                return None
+
+            self._save_json(session_dir / "03_ability_acquisition.json", {
+                "total_techniques": len(all_techniques),
+                "abilities_acquired": len(ability_results),
+                "abilities": ability_results
+            })
+            self._checkpoint(checkpoint, "abilities", selected_agent=selected_agent,
+                             platform=platform, agent_info=agent_info)
+        if self._stopping(checkpoint, stop_after, "abilities"):
+            return session_dir, None
 
         # ------------------------------------------------------------------
         # PHASE 4: 공격 체인 계획 + Operation 생성
@@ -250,18 +355,13 @@ class Pipeline:
                 "ability_name": ab.get("ability_name", ab.get("name", "")),
                 "source": ab.get("source", "existing"),
             })
+        attack_chain = self._order_chain(attack_chain, all_techniques, scenario_context)
 
         print(f"\n  ✓ Attack chain: {len(attack_chain)} steps")
         for i, step in enumerate(attack_chain, 1):
             src = "🔵" if step['source'] == 'existing' else "🟢"
             print(f"    {i}. {src} {step['technique_id']}: {step['ability_name']} [{step['source']}]")
 
-        self._save_json(session_dir / "04_attack_chain.json", {
-            "scenario": scenario_context,
-            "validation": validation,
-            "attack_chain": attack_chain
-        })
-
         _svo_suffix = "" if self.use_svo else "_noSVO"
         operation_plan = {
             "name": f"S2C_{validated_data.get('threat_actor', 'Unknown').replace(' ', '_')}{_svo_suffix}",
@@ -269,243 +369,74 @@ class Pipeline:
             "steps": attack_chain
         }
 
-        # Operation 생성 및 실행
-        operation = self.caldera.create_operation_from_plan(
-            operation_plan,
-            agent_paw=selected_agent,
-            auto_start=True
-        )
-
-        if operation:
-            self._created_operations.append(operation.get('id'))
-            if operation.get('s2c_adversary_id'):
-                self._created_adversaries.append(operation.get('s2c_adversary_id'))
-
-        if not operation:
-            print("\n[!] Failed to create operation")
-            return None
+        created_operation = self._restored(checkpoint, "operation", "05_created_operation.json")
+        if created_operation is not None:
+            operation = created_operation.get("operation", {})
+        else:
+            self._save_json(session_dir / "04_attack_chain.json", {
+                "scenario": scenario_context,
+                "validation": validation,
+                "attack_chain": attack_chain
+            })
 
-        self._save_json(session_dir / "05_created_operation.json", {
-            "operation": operation,
-            "adversary_name": operation_plan.get('name'),
-            "attack_chain": attack_chain,
-            "selected_agent": selected_agent,
-        })
+            # Operation 생성 및 실행
+            operation = self.caldera.create_operation_from_plan(
+                operation_plan,
+                agent_paw=selected_agent,
+                auto_start=True
+            )
+
+            if operation:
+                self._created_operations.append(operation.get('id'))
+                if operation.get('s2c_adversary_id'):
+                    self._created_adversaries.append(operation.get('s2c_adversary_id'))
+
+            if not operation:
+                print("\n[!] Failed to create operation")
+                return None
+
+            self._save_json(session_dir / "05_created_operation.json", {
+                "operation": operation,
+                "adversary_name": operation_plan.get('name'),
+                "attack_chain": attack_chain,
+                "selected_agent": selected_agent,
+            })
+            self._checkpoint(checkpoint, "operation", operation_id=operation.get('id'))
 
         operation_id = operation.get('id')
+        if self._stopping(checkpoint, stop_after, "operation"):
+            return session_dir, operation_id
 
         # ==================================================================
         # PHASE 5: Operation 완료 대기 + 결과 수집
         # ==================================================================
         self._print_header("PHASE 5: Waiting for Operation to Complete")
 
-        results = self._wait_and_collect(operation_id, session_dir,
-                                         result_filename="06_operation_results.json")
+        collected = self._restored(checkpoint, "results", "06_operation_results.json")
+        if collected is not None:
+            results = {"stats": collected.get("summary", {}), "links": collected.get("links", []),
+                       "watch": collected.get("watch")}
+        else:
+            # resume 시에도 새 operation을 만들지 않고 기존(진행 중) operation에 다시 붙어 대기
+            results = self._wait_and_collect(operation_id, session_dir,
+                                             result_filename="06_operation_results.json")
+            if results:
+                self._checkpoint(checkpoint, "results")
+        if self._stopping(checkpoint, stop_after, "results"):
+            return session_dir, operation_id
 
         # ==================================================================
         # PHASE 6: ReAct Operation-Level Loop (최대 3라운드)
         # ==================================================================
-        MAX_REACT_ROUNDS = 3
-        react_history = []       # 라운드별 기록
-        current_results = results
-        current_op_id = operation_id
-
-        if current_results and current_results.get('stats', {}).get('failed', 0) > 0:
-            self._print_header("PHASE 6: ReAct Operation Loop")
-
-            for round_num in range(1, MAX_REACT_ROUNDS + 1):
-                # ── 실패한 link 추출 ────────────────────────────────
-                failed_links = [
-                    link for link in current_results.get('links', [])
-                    if link.get('status', -1) != 0
-                ]
-
-                if not failed_links:
-                    print(f"\n  ✅ All commands succeeded at round {round_num}!")
-                    break
-
-                print(f"\n{'─'*60}")
-                print(f"  ROUND {round_num}/{MAX_REACT_ROUNDS}: {len(failed_links)} failed commands")
-                print(f"{'─'*60}")
-
-                round_fixes = []
-
-                for i, link in enumerate(failed_links, 1):
-                    ability = link.get('ability', {})
-                    tech_id = ability.get('technique_id', 'Unknown')
-                    ability_id = ability.get('ability_id', '')
-                    link_id = link.get('id', '')
-
-                    # ── 실제 에러 메시지 추출 ─────────────────────────
-                    raw_output = link.get('output', '')
-                    if raw_output in ('True', 'False', 'true', 'false', ''):
-                        real_output = self.caldera.get_link_output(current_op_id, link_id)
-                        error = real_output if real_output else f"Exit code: {link.get('status', -1)}"
-                    else:
-                        error = raw_output
-
-                    # ── SVO 찾기 ─────────────────────────────────────
-                    svo_data = None
-                    for tech in all_techniques:
-                        if tech.get('technique_id') == tech_id and tech.get('svo'):
-                            svo_data = tech['svo']
-                            break
-
-                    if not svo_data:
-                        print(f"  [{i}] {tech_id}: No SVO — skip")
-                        round_fixes.append({
-                            "technique_id": tech_id,
-                            "ability_id": ability_id,
-                            "status": "skipped",
-                            "reason": "no_svo"
-                        })
-                        continue
-
-                    svo = AttackSVO(**svo_data)
-
-                    # ── 이전 시도 이력 구성 ──────────────────────────
-                    # original_command + fixed_command 모두 포함해 역행(oscillation) 방지
-                    prev_attempts = []
-                    seen_cmds = set()
-                    for prev_round in react_history:
-                        for prev_fix in prev_round.get('fixes', []):
-                            if prev_fix.get('technique_id') != tech_id:
-                                continue
-                            for cmd_key in ('original_command', 'fixed_command'):
-                                cmd = prev_fix.get(cmd_key, '')
-                                if cmd and cmd not in seen_cmds:
-                                    seen_cmds.add(cmd)
-                                    prev_attempts.append(FixAttempt(
-                                        attempt=prev_round['round'],
-                                        command=cmd,
-                                        error=prev_fix.get('error', '')[:300],
-                                        failure_type=prev_fix.get('failure_type', 'unknown'),
-                                        thought="", action=""
-                                    ))
-
-                    # ── 원래 command 추출 ─────────────────────────────
-                    executors = ability.get('executors', [])
-                    original_cmd = executors[0].get('command', '') if executors else ''
-
-                    print(f"  [{i}] {tech_id} ({svo.verb} → {svo.object})")
-                    print(f"      Error: {error[:120]}")
-
-                    # ── ReAct 수정 (1개 커맨드 생성) ──────────────────
-                    react_result = self.react_agent.react_fix(
-                        svo=svo,
-                        failed_command=original_cmd,
-                        error_output=error[:500],
-                        platform=platform,
-                        previous_attempts=prev_attempts,
-                        env_context=agent_info,
-                        use_svo=self.use_svo
-                    )
-
-                    fix_record = {
-                        "technique_id": tech_id,
-                        "ability_id": ability_id,
-                        "svo": svo.to_dict(),
-                        "original_command": original_cmd[:200],
-                        "error": error[:300],
-                        "failure_type": "unknown",
-                    }
-
-                    if react_result:
-                        fixed_cmd = react_result["command"]
-                        self.react_agent.update_ability_command(
-                            ability_id, fixed_cmd, svo, platform
-                        )
-                        fix_record["fixed_command"] = fixed_cmd
-                        fix_record["thought"] = react_result["thought"]
-                        fix_record["action"] = react_result["action"]
-                        fix_record["failure_type"] = react_result["failure_type"]
-                        fix_record["svo_focus"] = react_result["svo_focus"]
-                        fix_record["status"] = "patched"
-                    else:
-                        fix_record["status"] = "no_fix"
-                        print(f"      [!] ReAct could not fix — skipping")
-
-                    round_fixes.append(fix_record)
-
-                # ── 라운드 커맨드 변경 요약 출력 ─────────────────────
-                self._print_round_diff(round_num, round_fixes)
-
-                # ── 라운드 기록 저장 ─────────────────────────────────
-                patched_count = sum(1 for f in round_fixes if f.get('status') == 'patched')
-                round_record = {
-                    "round": round_num,
-                    "failed_count": len(failed_links),
-                    "patched_count": patched_count,
-                    "fixes": round_fixes
-                }
-                react_history.append(round_record)
-
-                if patched_count == 0:
-                    print(f"\n  [!] No fixes produced in round {round_num} — stopping")
-                    break
-
-                print(f"\n  ✓ Patched {patched_count}/{len(failed_links)} abilities")
-
-                # ── 전체 Operation 재실행 ────────────────────────────
-                print(f"\n  → Re-executing full operation (Round {round_num})...")
-
-                retry_op_plan = {
-                    "name": f"{operation_plan.get('name', 'S2C')}_R{round_num}",
-                    "description": f"ReAct round {round_num} — {patched_count} commands fixed",
-                    "steps": attack_chain
-                }
-
-                retry_op = self.caldera.create_operation_from_plan(
-                    retry_op_plan,
-                    agent_paw=selected_agent,
-                    auto_start=True
-                )
-
-                if retry_op:
-                    self._created_operations.append(retry_op.get('id'))
-                    if retry_op.get('s2c_adversary_id'):
-                        self._created_adversaries.append(retry_op.get('s2c_adversary_id'))
-
-                if not retry_op:
-                    print(f"  [!] Failed to create retry operation")
-                    break
-
-                retry_op_id = retry_op.get('id')
-                current_op_id = retry_op_id
-
-                round_results = self._wait_and_collect(
-                    retry_op_id, session_dir,
-                    result_filename=None
-                )
-
-                if not round_results:
-                    print(f"  [!] Failed to collect retry results")
-                    break
-
-                # ── 결과 비교 ────────────────────────────────────────
-                prev_success = current_results.get('stats', {}).get('success', 0)
-                new_success = round_results.get('stats', {}).get('success', 0)
-                new_failed = round_results.get('stats', {}).get('failed', 0)
-                print(f"\n  📊 Round {round_num} result: success {prev_success} → {new_success} (failed: {new_failed})")
-
-                round_record['result_stats'] = round_results.get('stats', {})
-                round_record['operation_id'] = retry_op_id
-
-                current_results = round_results
-
-                if new_failed == 0:
-                    print(f"\n  🎉 All commands succeeded after {round_num} rounds!")
-                    break
-
-            # ── 라운드 전체 기록 저장 ────────────────────────────────
-            self._save_json(session_dir / "07_react_summary.json", {
-                "total_rounds": len(react_history),
-                "rounds": react_history
-            })
-
+        if checkpoint.done("react"):
+            react_history = (checkpoint.artifact("07_react_summary.json") or {}).get("rounds", [])
+            print(f"\n  ↻ Restored from checkpoint: ReAct ({len(react_history)} rounds)")
         else:
-            if results:
-                print("\n[*] All steps succeeded! No retry needed.")
+            react_history = self._react_loop(
+                results, operation_id, attack_chain, all_techniques, operation_plan,
+                selected_agent, platform, agent_info, session_dir, rerun_mode=rerun_mode
+            )
+            self._checkpoint(checkpoint, "react")
 
         # ==================================================================
         # 최종 요약
@@ -551,6 +482,7 @@ class Pipeline:
         print(f"    ├── 06_operation_results.json")
         if react_history:
             print(f"    ├── 07_react_summary.json")
+        print(f"    ├── trace.json")
         print(f"    └── session_info.json")
 
         print(f"\n🔗 Caldera UI:")
@@ -560,21 +492,25 @@ class Pipeline:
         print("✅ DONE")
         print("="*80)
 
-        self._save_json(session_dir / "session_info.json", {
-            "session_dir": str(session_dir),
-            "operation_id": operation_id,
-            "timestamp": datetime.now().isoformat()
-        })
+        self._save_session_info(session_dir, operation_id)
+        self._checkpoint(checkpoint, "complete")
 
         return session_dir, operation_id
 
     def run_from_parsed(self, parsed_data: Dict, output_dir: str = None,
-                        force_generate: bool = True) -> Optional[Tuple[Path, str]]:
+                        force_generate: bool = True,
+                        rerun_mode: Optional[str] = None) -> Optional[Tuple[Path, str]]:
         """
         Phase 1(시나리오 파싱)을 건너뛰고 parsed_data를 직접 주입해 Phase 2부터 실행.
         Thief 같은 기존 adversary의 TTP(technique ID + tactic)만 뼈대로 사용하고
         ability는 SVO 기반으로 새로 생성. (force_generate=True 기본)
         """
+        rerun_mode = rerun_mode or self.rerun_mode
+        self._llm_cache_start = self.llm_cache.snapshot()
+        self._structured_start = self.structured.snapshot()
+        self._stream_start = self.stream_stats.snapshot()
+        self.tracer.reset()
+        self._prior_runs, self._run_index = [], 0
         self._print_header("SCENARIO2CALDERA PIPELINE (Phase 2+ — parsed data injected)")
 
         if output_dir:
@@ -583,9 +519,7 @@ class Pipeline:
             base_dir = Path(__file__).parent.parent / "results"
         base_dir.mkdir(exist_ok=True)
 
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        session_dir = base_dir / f"session_{timestamp}"
-        session_dir.mkdir(exist_ok=True)
+        session_dir = self._new_session_dir(base_dir)
 
         print(f"[*] Output directory: {session_dir}")
         print(f"  ✓ Scenario:    {parsed_data.get('scenario_name')}")
@@ -620,7 +554,8 @@ class Pipeline:
         self._save_json(session_dir / "02_5_svo_extraction.json", {
             "total_techniques": len(all_techniques),
             "svo_extracted": len(svos),
-            "svos": [s.to_dict() for s in svos]
+            "svos": [s.to_dict() for s in svos],
+            "timing": self.svo_extractor.last_run,
         })
 
         # PHASE 3
@@ -638,14 +573,8 @@ class Pipeline:
         # 에이전트 sleep 단축 (속도 최적화)
         self._optimize_agent_sleep(sleep_min=3, sleep_max=5)
 
-        import os
-        from dotenv import load_dotenv
-        
-        load_dotenv()
-
-        agent_url = os.getenv("CALDERA_AGENT_URL", os.getenv("CALDERA_URL", "http://192.168.50.31:8888"))
         agent_info = {
-            "c2_server_url": agent_url,
+            "c2_server_url": get_settings().caldera_agent_url,
             "host": agent.get('host', '') if agent else '',
             "privilege": agent.get('privilege', 'User') if agent else 'User',
             "payloads": self.caldera.list_payloads(),
@@ -683,6 +612,11 @@ class Pipeline:
                 "ability_name": ab.get("ability_name", ab.get("name", "")),
                 "source": ab.get("source", "existing"),
             })
+        attack_chain = self._order_chain(attack_chain, all_techniques, {
+            "scenario_name": validated_data.get("scenario_name"),
+            "target_org": validated_data.get("target_org"),
+            "threat_actor": validated_data.get("threat_actor")
+        })
 
         print(f"\n  ✓ Attack chain: {len(attack_chain)} steps")
         for i, step in enumerate(attack_chain, 1):
@@ -725,157 +659,10 @@ class Pipeline:
                                          result_filename="06_operation_results.json")
 
         # PHASE 6: ReAct Loop
-        MAX_REACT_ROUNDS = 3
-        react_history = []
-        current_results = results
-        current_op_id = operation_id
-
-        if current_results and current_results.get('stats', {}).get('failed', 0) > 0:
-            self._print_header("PHASE 6: ReAct Operation Loop")
-
-            for round_num in range(1, MAX_REACT_ROUNDS + 1):
-                failed_links = [l for l in current_results.get('links', [])
-                                if l.get('status', -1) != 0]
-
-                if not failed_links:
-                    print(f"\n  ✅ All commands succeeded at round {round_num}!")
-                    break
-
-                print(f"\n{'─'*60}")
-                print(f"  ROUND {round_num}/{MAX_REACT_ROUNDS}: {len(failed_links)} failed")
-                print(f"{'─'*60}")
-
-                round_fixes = []
-                for i, link in enumerate(failed_links, 1):
-                    ability = link.get('ability', {})
-                    tech_id = ability.get('technique_id', 'Unknown')
-                    ability_id = ability.get('ability_id', '')
-                    link_id = link.get('id', '')
-
-                    raw_output = link.get('output', '')
-                    if raw_output in ('True', 'False', 'true', 'false', ''):
-                        real_output = self.caldera.get_link_output(current_op_id, link_id)
-                        error = real_output if real_output else f"Exit code: {link.get('status', -1)}"
-                    else:
-                        error = raw_output
-
-                    svo_data = None
-                    for tech in all_techniques:
-                        if tech.get('technique_id') == tech_id and tech.get('svo'):
-                            svo_data = tech['svo']
-                            break
-
-                    if not svo_data:
-                        print(f"  [{i}] {tech_id}: No SVO — skip")
-                        round_fixes.append({"technique_id": tech_id, "ability_id": ability_id,
-                                            "status": "skipped", "reason": "no_svo"})
-                        continue
-
-                    svo = AttackSVO(**svo_data)
-                    prev_attempts = []
-                    seen_cmds = set()
-                    for prev_round in react_history:
-                        for prev_fix in prev_round.get('fixes', []):
-                            if prev_fix.get('technique_id') != tech_id:
-                                continue
-                            for cmd_key in ('original_command', 'fixed_command'):
-                                cmd = prev_fix.get(cmd_key, '')
-                                if cmd and cmd not in seen_cmds:
-                                    seen_cmds.add(cmd)
-                                    prev_attempts.append(FixAttempt(
-                                        attempt=prev_round['round'],
-                                        command=cmd,
-                                        error=prev_fix.get('error', '')[:300],
-                                        failure_type=prev_fix.get('failure_type', 'unknown'),
-                                        thought="", action=""
-                                    ))
-
-                    executors = ability.get('executors', [])
-                    original_cmd = executors[0].get('command', '') if executors else ''
-                    print(f"  [{i}] {tech_id} ({svo.verb} → {svo.object})")
-                    print(f"      Error: {error[:120]}")
-
-                    react_result = self.react_agent.react_fix(
-                        svo=svo, failed_command=original_cmd,
-                        error_output=error[:500], platform=platform,
-                        previous_attempts=prev_attempts, env_context=agent_info,
-                        use_svo=self.use_svo
-                    )
-
-                    fix_record = {
-                        "technique_id": tech_id, "ability_id": ability_id,
-                        "svo": svo.to_dict(),
-                        "original_command": original_cmd[:200], "error": error[:300],
-                        "failure_type": "unknown",
-                    }
-
-                    if react_result:
-                        fixed_cmd = react_result["command"]
-                        self.react_agent.update_ability_command(ability_id, fixed_cmd, svo, platform)
-                        fix_record["fixed_command"] = fixed_cmd
-                        fix_record["thought"] = react_result["thought"]
-                        fix_record["action"] = react_result["action"]
-                        fix_record["failure_type"] = react_result["failure_type"]
-                        fix_record["svo_focus"] = react_result["svo_focus"]
-                        fix_record["status"] = "patched"
-                    else:
-                        fix_record["status"] = "no_fix"
-                        print(f"      [!] ReAct could not fix — skipping")
-
-                    round_fixes.append(fix_record)
-
-                self._print_round_diff(round_num, round_fixes)
-
-                patched_count = sum(1 for f in round_fixes if f.get('status') == 'patched')
-                round_record = {"round": round_num, "failed_count": len(failed_links),
-                                "patched_count": patched_count, "fixes": round_fixes}
-                react_history.append(round_record)
-
-                if patched_count == 0:
-                    print(f"\n  [!] No fixes in round {round_num} — stopping")
-                    break
-
-                print(f"\n  ✓ Patched {patched_count}/{len(failed_links)} — re-executing...")
-
-                retry_op = self.caldera.create_operation_from_plan(
-                    {"name": f"{operation_plan['name']}_R{round_num}",
-                     "description": f"ReAct R{round_num}", "steps": attack_chain},
-                    agent_paw=selected_agent, auto_start=True
-                )
-
-                if retry_op:
-                    self._created_operations.append(retry_op.get('id'))
-                    if retry_op.get('s2c_adversary_id'):
-                        self._created_adversaries.append(retry_op.get('s2c_adversary_id'))
-
-                if not retry_op:
-                    break
-
-                current_op_id = retry_op.get('id')
-                round_results = self._wait_and_collect(
-                    current_op_id, session_dir,
-                    result_filename=None
-                )
-
-                if not round_results:
-                    break
-
-                new_failed = round_results.get('stats', {}).get('failed', 0)
-                print(f"\n  📊 Round {round_num}: failed {len(failed_links)} → {new_failed}")
-                round_record['result_stats'] = round_results.get('stats', {})
-                round_record['operation_id'] = current_op_id
-                current_results = round_results
-
-                if new_failed == 0:
-                    print(f"\n  🎉 All succeeded after {round_num} rounds!")
-                    break
-
-            self._save_json(session_dir / "07_react_summary.json", {
-                "total_rounds": len(react_history), "rounds": react_history
-            })
-        else:
-            if results:
-                print("\n[*] All steps succeeded! No retry needed.")
+        self._react_loop(
+            results, operation_id, attack_chain, all_techniques, operation_plan,
+            selected_agent, platform, agent_info, session_dir, rerun_mode=rerun_mode
+        )
 
         # 요약
         self._print_header("PIPELINE COMPLETE")
@@ -889,66 +676,27 @@ class Pipeline:
         print(f"\n🔗 Caldera UI: {self.caldera.base_url}/#/operations/{operation_id}")
         print("\n" + "="*80 + "\n✅ DONE\n" + "="*80)
 
-        self._save_json(session_dir / "session_info.json", {
-            "session_dir": str(session_dir),
-            "operation_id": operation_id,
-            "timestamp": datetime.now().isoformat()
-        })
+        self._save_session_info(session_dir, operation_id)
 
         return session_dir, operation_id
 
     def _wait_and_collect(self, operation_id: str, session_dir: Path,
-                          poll_interval: int = 3, timeout: int = 1800,
+                          timeout: int = 1800,
                           result_filename: Optional[str] = "05_operation_results.json") -> Optional[Dict]:
         """
-        Operation 완료까지 폴링 후 결과 수집
+        Operation 완료까지 적응형 폴링 후 결과 수집
 
         Args:
             operation_id: Operation ID
             session_dir: 결과 저장 디렉토리
-            poll_interval: 폴링 간격 (초, 기본 10)
             timeout: 최대 대기 시간 (초, 기본 1800 = 30분)
             result_filename: 결과 파일명
 
         Returns:
-            분석 결과 dict
+            분석 결과 dict ({"stats", "links", "watch"})
         """
-        start_time = time.time()
-        last_link_count = 0
-
-        print(f"[*] Polling every {poll_interval}s (timeout: {timeout//60}min)")
-
-        while True:
-            elapsed = time.time() - start_time
-
-            if elapsed > timeout:
-                print(f"\n[!] Timeout after {timeout//60} minutes")
-                break
-
-            op = self.caldera.get_operation(operation_id)
-            if not op:
-                print(f"  [!] Failed to fetch operation")
-                time.sleep(poll_interval)
-                continue
-
-            state = op.get('state', 'unknown')
-            links = op.get('chain', [])
-            link_count = len(links)
-
-            # 진행 상황 표시 (새 link가 추가될 때만)
-            if link_count != last_link_count:
-                mins = int(elapsed // 60)
-                secs = int(elapsed % 60)
-                print(f"  [{mins:02d}:{secs:02d}] state={state}, links={link_count}")
-                last_link_count = link_count
-
-            if state == 'finished':
-                mins = int(elapsed // 60)
-                secs = int(elapsed % 60)
-                print(f"\n  ✓ Operation finished in {mins}m {secs}s")
-                break
-
-            time.sleep(poll_interval)
+        watch = self.watcher.watch(operation_id, timeout=timeout,
+                                   agent_sleep=self._agent_sleep)
 
         # 결과 수집 및 분석
         result = self.caldera.get_operation_results(operation_id)
@@ -970,16 +718,559 @@ class Pipeline:
                 "operation_name": op.get('name'),
                 "state": op.get('state'),
                 "summary": stats,
+                "watch": watch,
                 "links": links,
                 "analyzed_at": datetime.now().isoformat()
             })
 
-        return {"stats": stats, "links": links}
+        return {"stats": stats, "links": links, "watch": watch}
 
-    # ==================== Helpers ====================
+    def _react_loop(self, results: Optional[Dict], operation_id: str,
+                    attack_chain: List[Dict], all_techniques: List[Dict],
+                    operation_plan: Dict, selected_agent: str, platform: str,
+                    agent_info: Dict, session_dir: Path,
+                    max_rounds: int = 3, rerun_mode: str = "full") -> List[Dict]:
+        """
+        Phase 6: 실패 link를 ReAct로 수정하고 재실행하는 라운드 루프
+
+        Args:
+            results: Phase 5 결과 ({"stats", "links", "watch"})
+            rerun_mode: "full" = 매 라운드 전체 attack chain 재실행
+                        "targeted" = 수정된 ability + 선언된 선행 ability만 재실행하고
+                                     나머지 link는 이전 결과를 carry forward
+
+        Returns:
+            라운드별 기록 리스트 (07_react_summary.json의 rounds)
+        """
+        react_history = []       # 라운드별 기록
+        current_results = results
+
+        if not (current_results and current_results.get('stats', {}).get('failed', 0) > 0):
+            if results:
+                print("\n[*] All steps succeeded! No retry needed.")
+            return react_history
+
+        self._print_header("PHASE 6: ReAct Operation Loop")
+        print(f"[*] Re-execution mode: {rerun_mode}")
+
+        # link id → link가 실행된 operation (targeted 모드에서는 라운드마다 섞임)
+        link_ops = {link.get('id', ''): operation_id for link in current_results.get('links', [])}
+
+        for round_num in range(1, max_rounds + 1):
+            # ── 실패한 link 추출 ────────────────────────────────
+            failed_links = [
+                link for link in current_results.get('links', [])
+                if link.get('status', -1) != 0
+            ]
+
+            if not failed_links:
+                print(f"\n  ✅ All commands succeeded at round {round_num}!")
+                break
+
+            print(f"\n{'─'*60}")
+            print(f"  ROUND {round_num}/{max_rounds}: {len(failed_links)} failed commands")
+            print(f"{'─'*60}")
+
+            # ── 실패 link별 ReAct 수정 생성 (bounded 병렬, 결과는 link 순서 유지) ──
+            workers = max(1, min(self.react_workers, len(failed_links)))
+            verbose = workers == 1 and self.react_candidates <= 1
+            if not verbose:
+                print(f"  [*] Generating fixes concurrently (concurrency: {workers})")
+
+            def generate(item):
+                i, link = item
+                return self._generate_fix(i, link, link_ops.get(link.get('id', ''), operation_id),
+                                          all_techniques, react_history, platform, agent_info,
+                                          verbose=verbose)
+
+            gen_start = time.perf_counter()
+            if verbose:
+                generated = [generate(item) for item in enumerate(failed_links, 1)]
+            else:
+                with ThreadPoolExecutor(max_workers=workers) as pool:
+                    # map()은 입력 순서대로 결과를 돌려줌 → fix 기록 순서 보장
+                    generated = list(pool.map(generate, enumerate(failed_links, 1)))
+            gen_wall = time.perf_counter() - gen_start
+
+            # ── ability 업데이트는 link 순서대로 순차 적용 (같은 ability 중복 수정 시 결과 결정적) ──
+            round_fixes = []
+            round_alternates = {}    # 원래 ability_id → 같은 라운드에 함께 실행할 후보 ability들
+            for fix in generated:
+                i, tech_id, ability_id = fix["index"], fix["technique_id"], fix["ability_id"]
+
+                if fix["svo"] is None:
+                    if not verbose:
+                        print(f"  [{i}] {tech_id}: No SVO — skip")
+                    round_fixes.append({
+                        "technique_id": tech_id,
+                        "ability_id": ability_id,
+                        "status": "skipped",
+                        "reason": "no_svo"
+                    })
+                    continue
+
+                svo = fix["svo"]
+                react_result = fix["react_result"]
+                if not verbose:
+                    self._print_fix(i, tech_id, svo, fix["error"], react_result, fix["latency_s"],
+                                    fix["candidates"])
+
+                fix_record = {
+                    "technique_id": tech_id,
+                    "ability_id": ability_id,
+                    "svo": svo.to_dict(),
+                    "original_command": fix["original_command"][:200],
+                    "error": fix["error"][:300],
+                    "failure_type": "unknown",
+                }
+                classification = fix["classification"]
+                if classification:
+                    fix_record["failure_type"] = classification.failure_type
+                    fix_record["classification"] = classification.to_dict()
+
+                if react_result:
+                    fixed_cmd = react_result["command"]
+                    self.react_agent.update_ability_command(
+                        ability_id, fixed_cmd, svo, platform, executor=fix["executor"]
+                    )
+                    fix_record["fixed_command"] = fixed_cmd
+                    fix_record["thought"] = react_result["thought"]
+                    fix_record["action"] = react_result["action"]
+                    fix_record["failure_type"] = react_result["failure_type"]
+                    fix_record["svo_focus"] = react_result["svo_focus"]
+                    fix_record["status"] = "patched"
+                    if react_result.get("source"):
+                        fix_record["source"] = react_result["source"]
+                    if fix["candidates"]:
+                        fix_record["candidates"] = [
+                            {k: c[k] for k in ("command", "score", "strategy", "rank_notes")}
+                            for c in fix["candidates"]
+                        ]
+                        alternates = self._create_alternates(
+                            fix["ability"], fix["candidates"][1:self.react_execute_top_k], platform,
+                            fix["executor"]
+                        )
+                        if alternates and ability_id not in round_alternates:
+                            round_alternates[ability_id] = alternates
+                            fix_record["alternates"] = alternates
+                elif classification and not classification.fixable:
+                    fix_record["status"] = "unfixable"
+                    fix_record["reason"] = classification.rule
+                else:
+                    fix_record["status"] = "no_fix"
+                    print(f"      [!] ReAct could not fix — skipping")
+
+                round_fixes.append(fix_record)
+
+            # ── 라운드 커맨드 변경 요약 출력 ─────────────────────
+            self._print_round_diff(round_num, round_fixes)
+
+            # ── 라운드 기록 저장 ─────────────────────────────────
+            patched_count = sum(1 for f in round_fixes if f.get('status') == 'patched')
+            round_record = {
+                "round": round_num,
+                "failed_count": len(failed_links),
+                "patched_count": patched_count,
+                "fix_generation": {
+                    "concurrency": workers,
+                    "wall_time_s": round(gen_wall, 3),
+                    "sum_latency_s": round(sum(f["latency_s"] for f in generated), 3),
+                },
+                "fixes": round_fixes
+            }
+            react_history.append(round_record)
+
+            if patched_count == 0:
+                print(f"\n  [!] No fixes produced in round {round_num} — stopping")
+                break
+
+            print(f"\n  ✓ Patched {patched_count}/{len(failed_links)} abilities")
+
+            # ── 재실행 대상 결정 ─────────────────────────────────
+            rerun_steps = attack_chain
+            if rerun_mode == "targeted":
+                patched_ids = {f['ability_id'] for f in round_fixes if f.get('status') == 'patched'}
+                rerun_steps, prerequisites = self.rerun_planner.plan(attack_chain, patched_ids)
+                round_record['rerun'] = {
+                    "mode": "targeted",
+                    "steps": len(rerun_steps),
+                    "chain_steps": len(attack_chain),
+                    "prerequisites": prerequisites,
+                }
+                print(f"\n  → Re-executing {len(rerun_steps)}/{len(attack_chain)} steps "
+                      f"({patched_count} patched + {len(prerequisites)} prerequisites, Round {round_num})...")
+            else:
+                round_record['rerun'] = {"mode": "full", "steps": len(attack_chain),
+                                         "chain_steps": len(attack_chain)}
+                print(f"\n  → Re-executing full operation (Round {round_num})...")
+
+            if round_alternates:
+                rerun_steps = self._with_alternates(rerun_steps, round_alternates)
+                round_record['rerun']['alternates'] = sum(len(a) for a in round_alternates.values())
+                print(f"  → + {round_record['rerun']['alternates']} alternate candidate abilities in the same operation")
+
+            retry_op_plan = {
+                "name": f"{operation_plan.get('name', 'S2C')}_R{round_num}",
+                "description": f"ReAct round {round_num} — {patched_count} commands fixed",
+                "steps": rerun_steps
+            }
+
+            retry_op = self.caldera.create_operation_from_plan(
+                retry_op_plan,
+                agent_paw=selected_agent,
+                auto_start=True
+            )
+
+            if retry_op:
+                self._created_operations.append(retry_op.get('id'))
+                if retry_op.get('s2c_adversary_id'):
+                    self._created_adversaries.append(retry_op.get('s2c_adversary_id'))
+
+            if not retry_op:
+                print(f"  [!] Failed to create retry operation")
+                break
+
+            retry_op_id = retry_op.get('id')
+
+            round_results = self._wait_and_collect(
+                retry_op_id, session_dir,
+                result_filename=None
+            )
+
+            if not round_results:
+                print(f"  [!] Failed to collect retry results")
+                break
+
+            for link in round_results.get('links', []):
+                link_ops[link.get('id', '')] = retry_op_id
+
+            # ── 후보 ability link를 원래 ability로 합침 (성공한 후보가 있으면 채택) ──
+            if round_alternates:
+                round_results = self._collapse_alternates(
+                    round_results, round_alternates, round_fixes, platform
+                )
+
+            # ── targeted: 재실행하지 않은 ability의 이전 link carry forward ──
+            if rerun_mode == "targeted":
+                rerun_ids = {s.get('ability_id') for s in rerun_steps}
+                merged_links, carried = self.rerun_planner.merge(
+                    attack_chain, current_results.get('links', []),
+                    round_results.get('links', []), rerun_ids
+                )
+                round_record['rerun']['carried_forward'] = carried
+                executed = round_results.get('stats', {})
+                round_record['rerun']['executed_stats'] = {
+                    k: executed.get(k, 0) for k in ("total", "success", "failed")
+                }
+                round_results = dict(round_results, links=merged_links,
+                                     stats=self.caldera.analyze_links(merged_links))
+
+            self._mark_outcomes(round_fixes, round_results.get('links', []))
+
+            # ── 결과 비교 ────────────────────────────────────────
+            prev_success = current_results.get('stats', {}).get('success', 0)
+            new_success = round_results.get('stats', {}).get('success', 0)
+            new_failed = round_results.get('stats', {}).get('failed', 0)
+            print(f"\n  📊 Round {round_num} result: success {prev_success} → {new_success} (failed: {new_failed})")
+
+            round_record['result_stats'] = round_results.get('stats', {})
+            round_record['operation_id'] = retry_op_id
+
+            current_results = round_results
+
+            if new_failed == 0:
+                print(f"\n  🎉 All commands succeeded after {round_num} rounds!")
+                break
+
+        # ── 라운드 전체 기록 저장 ────────────────────────────────
+        self._save_json(session_dir / "07_react_summary.json", {
+            "total_rounds": len(react_history),
+            "rerun_mode": rerun_mode,
+            "platform": platform,
+            "rounds": react_history
+        })
+
+        # ── 재실행에서 성공/실패가 확인된 수정을 세션 간 fix store에 반영 ──
+        recorded = self.fix_store.record_rounds(react_history, platform, session=session_dir.name)
+        if recorded:
+            print(f"  ✓ Fix store: {recorded} fix outcomes recorded")
+
+        return react_history
+
+    @staticmethod
+    def _mark_outcomes(round_fixes: List[Dict], links: List[Dict]):
+        """patched 수정마다 재실행 결과 기록 (outcome: success | failed | not_run)"""
+        statuses: Dict[str, List[int]] = {}
+        for link in links:
+            ability_id = (link.get('ability') or {}).get('ability_id')
+            statuses.setdefault(ability_id, []).append(link.get('status', -1))
+        for fix in round_fixes:
+            if fix.get('status') != 'patched':
+                continue
+            seen = statuses.get(fix['ability_id'])
+            fix['outcome'] = "not_run" if not seen else "success" if 0 in seen else "failed"
+
+    def _generate_fix(self, index: int, link: Dict, link_operation_id: str,
+                      all_techniques: List[Dict], react_history: List[Dict],
+                      platform: str, agent_info: Dict, verbose: bool = True) -> Dict:
+        """
+        실패 link 1개에 대한 에러 수집 + ReAct 수정 생성 (worker 스레드에서 실행 가능)
+
+        Caldera ability 업데이트는 하지 않는다 — 호출자가 link 순서대로 적용.
+
+        Returns:
+            {"index", "technique_id", "ability_id", "executor", "svo", "original_command",
+             "error", "classification", "react_result", "candidates", "latency_s"}
+        """
+        ability = link.get('ability', {})
+        tech_id = ability.get('technique_id', 'Unknown')
+        ability_id = ability.get('ability_id', '')
+        link_id = link.get('id', '')
+        fix = {"index": index, "technique_id": tech_id, "ability_id": ability_id,
+               "ability": ability, "executor": self._link_executor(link, platform), "svo": None, "original_command": "", "error": "",
+               "classification": None, "react_result": None, "candidates": [], "latency_s": 0.0}
+
+        # ── SVO 찾기 ─────────────────────────────────────
+        svo_data = None
+        for tech in all_techniques:
+            if tech.get('technique_id') == tech_id and tech.get('svo'):
+                svo_data = tech['svo']
+                break
+
+        if not svo_data:
+            if verbose:
+                print(f"  [{index}] {tech_id}: No SVO — skip")
+            return fix
+
+        start = time.perf_counter()
+
+        # ── 실제 에러 메시지 추출 ─────────────────────────
+        raw_output = link.get('output', '')
+        if raw_output in ('True', 'False', 'true', 'false', ''):
+            real_output = self.caldera.get_link_output(link_operation_id, link_id)
+            error = real_output if real_output else f"Exit code: {link.get('status', -1)}"
+        else:
+            error = raw_output
+
+        svo = AttackSVO(**svo_data)
+
+        # ── 이전 시도 이력 구성 ──────────────────────────
+        # original_command + fixed_command 모두 포함해 역행(oscillation) 방지
+        prev_attempts = []
+        seen_cmds = set()
+        for prev_round in react_history:
+            for prev_fix in prev_round.get('fixes', []):
+                if prev_fix.get('technique_id') != tech_id:
+                    continue
+                for cmd_key in ('original_command', 'fixed_command'):
+                    cmd = prev_fix.get(cmd_key, '')
+                    if cmd and cmd not in seen_cmds:
+                        seen_cmds.add(cmd)
+                        prev_attempts.append(FixAttempt(
+                            attempt=prev_round['round'],
+                            command=cmd,
+                            error=prev_fix.get('error', '')[:300],
+                            failure_type=prev_fix.get('failure_type', 'unknown'),
+                            thought="", action=""
+                        ))
+
+        # ── 원래 command 추출 ─────────────────────────────
+        executors = ability.get('executors', [])
+        original_cmd = executors[0].get('command', '') if executors else ''
+
+        if verbose:
+            print(f"  [{index}] {tech_id} ({svo.verb} → {svo.object})")
+            print(f"      Error: {error[:120]}")
+
+        # ── 규칙 기반 사전 분류 (수정 불가 유형이면 react_fix가 LLM 호출 생략) ──
+        classification = self.react_agent.classify_failure(error, prev_attempts)
+
+        # ── ReAct 수정 (1개 커맨드 생성, 또는 N개 후보 생성 후 로컬 순위화) ──
+        candidates = []
+        if self.react_candidates > 1:
+            candidates = self.react_agent.react_fix_candidates(
+                svo=svo,
+                failed_command=original_cmd,
+                error_output=error[:500],
+                platform=platform,
+                previous_attempts=prev_attempts,
+                env_context=agent_info,
+                use_svo=self.use_svo,
+                n=self.react_candidates,
+                classification=classification
+            )
+            react_result = candidates[0] if candidates else None
+        else:
+            react_result = self.react_agent.react_fix(
+                svo=svo,
+                failed_command=original_cmd,
+                error_output=error[:500],
+                platform=platform,
+                previous_attempts=prev_attempts,
+                env_context=agent_info,
+                use_svo=self.use_svo,
+                verbose=verbose,
+                classification=classification
+            )
+
+        fix.update(svo=svo, original_command=original_cmd, error=error,
+                   classification=classification, react_result=react_result, candidates=candidates,
+                   latency_s=time.perf_counter() - start)
+        return fix
 
     @staticmethod
-    def _print_header(title: str):
+    def _link_executor(link: Dict, platform: str) -> str:
+        """link가 실행된 executor (link.executor → ability의 같은 platform executor → platform 기본값)"""
+        executor = link.get('executor')
+        if isinstance(executor, dict):
+            executor = executor.get('name')
+        if executor:
+            return executor
+        for ex in (link.get('ability') or {}).get('executors', []):
+            if ex.get('platform') == platform and ex.get('name'):
+                return ex['name']
+        return "psh" if platform == "windows" else "sh"
+
+    def _create_alternates(self, ability: Dict, candidates: List[Dict], platform: str,
+                           executor: str) -> List[Dict]:
+        """
+        상위 후보 command를 임시 ability로 등록 (같은 라운드 operation에서 원래 ability와 함께 실행)
+        원래 ability와 같은 executor로 등록해야 후보 비교가 의미 있음 (cmd ability의 후보를 psh로 돌리지 않도록)
+
+        Returns:
+            [{"ability_id", "command", "rank", "executor"}]
+        """
+        alternates = []
+        for rank, candidate in enumerate(candidates, 2):
+            created = self.caldera.create_ability(
+                name=f"{ability.get('name', 'S2C')} (alt {rank})",
+                description=f"ReAct alternate candidate {rank} for {ability.get('ability_id', '')}",
+                tactic=ability.get('tactic', ''),
+                technique_id=ability.get('technique_id', ''),
+                technique_name=ability.get('technique_name', ''),
+                executor=executor,
+                platform=platform,
+                command=candidate["command"],
+                privilege=ability.get('privilege', ''),
+            )
+            if created and created.get('ability_id'):
+                self._created_abilities.append(created['ability_id'])
+                alternates.append({"ability_id": created['ability_id'], "command": candidate["command"],
+                                   "rank": rank, "executor": executor})
+        return alternates
+
+    @staticmethod
+    def _with_alternates(steps: List[Dict], round_alternates: Dict[str, List[Dict]]) -> List[Dict]:
+        """각 원래 step 바로 뒤에 후보 ability step 삽입"""
+        expanded = []
+        for step in steps:
+            expanded.append(step)
+            for alt in round_alternates.get(step.get('ability_id'), []):
+                expanded.append(dict(step, ability_id=alt['ability_id'],
+                                     ability_name=f"{step.get('ability_name', '')} (alt {alt['rank']})"))
+        return expanded
+
+    def _collapse_alternates(self, round_results: Dict, round_alternates: Dict[str, List[Dict]],
+                             round_fixes: List[Dict], platform: str) -> Dict:
+        """
+        원래 ability + 후보 ability link 중 하나만 남김 (성공 link 우선, 동률이면 원래 ability)
+        후보가 채택되면 원래 ability command를 후보 command로 교체해 다음 라운드에 이어지게 한다.
+        """
+        alt_to_orig = {alt['ability_id']: (orig, alt)
+                       for orig, alts in round_alternates.items() for alt in alts}
+        groups: Dict[str, List[Dict]] = {}
+        for link in round_results.get('links', []):
+            aid = (link.get('ability') or {}).get('ability_id')
+            orig = alt_to_orig[aid][0] if aid in alt_to_orig else aid
+            groups.setdefault(orig, []).append(link)
+
+        fixes_by_ability = {f['ability_id']: f for f in round_fixes if f.get('status') == 'patched'}
+        collapsed = []
+        for orig, links in groups.items():
+            if orig not in round_alternates:
+                collapsed.extend(links)
+                continue
+            own = [l for l in links if (l.get('ability') or {}).get('ability_id') == orig]
+            ordered = own + [l for l in links if l not in own]
+            winner = next((l for l in ordered if l.get('status') == 0), ordered[0])
+            winner_aid = (winner.get('ability') or {}).get('ability_id')
+            fix_record = fixes_by_ability.get(orig, {})
+
+            if winner_aid in alt_to_orig:
+                alt = alt_to_orig[winner_aid][1]
+                print(f"  ✓ Alternate candidate {alt['rank']} succeeded for {orig} — adopting its command")
+                svo = AttackSVO(**fix_record['svo']) if fix_record.get('svo') else None
+                self.react_agent.update_ability_command(orig, alt['command'], svo, platform,
+                                                        executor=alt['executor'])
+                fix_record['fixed_command'] = alt['command']
+                fix_record['selected_candidate'] = alt['rank']
+                ability = dict(winner.get('ability') or {}, ability_id=orig)
+                own_ability = (own[0].get('ability') if own else None) or {}
+                if own_ability.get('name'):
+                    ability['name'] = own_ability['name']
+                winner = dict(winner, ability=ability)
+            elif fix_record:
+                fix_record['selected_candidate'] = 1
+            collapsed.append(winner)
+
+        return dict(round_results, links=collapsed, stats=self.caldera.analyze_links(collapsed))
+
+    @staticmethod
+    def _print_fix(index: int, tech_id: str, svo: AttackSVO, error: str,
+                   react_result: Optional[Dict], latency: float,
+                   candidates: Optional[List[Dict]] = None):
+        """병렬 생성된 fix를 link 순서대로 출력"""
+        print(f"  [{index}] {tech_id} ({svo.verb} → {svo.object}) ({latency:.1f}s)")
+        print(f"      Error: {error[:120]}")
+        if react_result:
+            command = react_result["command"]
+            print(f"  💭 Thought: {react_result['thought'][:100]}")
+            print(f"  🎯 Action: {react_result['action'][:100]}")
+            print(f"  ⚠ FailureType: {react_result['failure_type']}")
+            print(f"  🔍 SVOFocus: {react_result['svo_focus']}")
+            print(f"  → Fixed: {command[:100]}{'...' if len(command) > 100 else ''}")
+        for rank, candidate in enumerate(candidates or [], 1):
+            print(f"      #{rank} score={candidate['score']:.2f} ({', '.join(candidate['rank_notes'])}): "
+                  f"{candidate['command'][:80]}")
+
+    # ==================== Attack Chain Ordering (Phase 4) ====================
+
+    def _order_chain(self, attack_chain: List[Dict], all_techniques: List[Dict],
+                     scenario_context: Optional[Dict] = None) -> List[Dict]:
+        """
+        LLMOrchestrator로 공격 체인 정렬 (기본: KillChainOrderer 결정적 정렬, ATTACK_CHAIN_LLM_REFINE=true면 LLM 보정)
+        ATTACK_CHAIN_ORDER=scenario이면 시나리오 서술 순서 유지
+        """
+        if self.chain_order != "kill_chain" or len(attack_chain) < 2:
+            return attack_chain
+        techniques = {t.get("technique_id"): t for t in all_techniques}
+        annotated = [
+            {"technique_id": step["technique_id"],
+             "technique_name": step.get("technique_name", ""),
+             "tactic": techniques.get(step["technique_id"], {}).get("tactic", ""),
+             "dependencies": techniques.get(step["technique_id"], {}).get("dependencies", []),
+             "expected_action": techniques.get(step["technique_id"], {}).get("expected_action", ""),
+             "caldera_validation": {"executable": True, "selected_ability": {
+                 "ability_id": step["ability_id"], "name": step.get("ability_name", "")}}}
+            for step in attack_chain
+        ]
+        plan = self.orchestrator.plan_executable_attack_chain(annotated, scenario_context)
+
+        # plan step → 원래 step (같은 technique/ability가 여러 번 나오면 앞에서부터 소비)
+        remaining: Dict[tuple, List[Dict]] = {}
+        for step in attack_chain:
+            remaining.setdefault((step["technique_id"], step["ability_id"]), []).append(step)
+        ordered = [remaining[(p["technique_id"], p["ability_id"])].pop(0) for p in plan]
+        ordered += [step for steps in remaining.values() for step in steps]
+        if ordered != attack_chain:
+            print(f"  ↻ Kill-chain order: {' → '.join(step['technique_id'] for step in ordered)}")
+        return ordered
+
+    # ==================== Helpers ====================
+
+    def _print_header(self, title: str):
+        """phase 배너 출력 — 배너 단위로 tracing phase도 전환"""
+        self.tracer.start_phase(title)
         print("\n" + "="*80)
         print(title)
         print("="*80)
@@ -1018,6 +1309,167 @@ class Pipeline:
             print(f"      AFTER  : {after[:L]}{'…' if len(after)>L else ''}")
         print(f"{'─'*W}")
 
+    def _connection_stats(self) -> Dict:
+        """공유 CalderaClient의 connection pool 재사용 + ability 카탈로그 통계 (프로세스 누적)"""
+        return dict(self.caldera.get_connection_stats(), catalog=dict(self.caldera.catalog.stats))
+
+    # ==================== Checkpoint / Resume ====================
+
+    @staticmethod
+    def _new_session_dir(base_dir: Path) -> Path:
+        """session_<timestamp> 디렉토리 생성 — 같은 초에 시작한 세션(배치 실행)은 _2, _3 … 접미사"""
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        suffix = 1
+        while True:
+            session_dir = base_dir / (f"session_{timestamp}" + (f"_{suffix}" if suffix > 1 else ""))
+            try:
+                session_dir.mkdir()
+                return session_dir
+            except FileExistsError:
+                suffix += 1
+
+    def _stopping(self, checkpoint: SessionCheckpoint, stop_after: Optional[str], phase: str) -> bool:
+        """stop_after phase면 안내 후 True (phase가 실패해 checkpoint에 기록되지 않았어도 중단)"""
+        if stop_after != phase:
+            return False
+        # 다음 run이 session_info / trace.json에 합칠 수 있도록 이번 run의 trace 저장
+        self._record_run(checkpoint, export_trace=True)
+        if checkpoint.done(phase):
+            print(f"\n[*] Stopping after phase '{phase}' — continue with resume_dir={checkpoint.session_dir}")
+        else:
+            print(f"\n[!] Phase '{phase}' did not complete — stopping")
+        return True
+
+    def _checkpoint(self, checkpoint: SessionCheckpoint, phase: str, **state):
+        """phase 완료 기록 (생성한 Caldera 객체 목록 + 이번 run 통계 포함 — resume 후 cleanup / 통계 합산용)"""
+        checkpoint.mark(phase, created={
+            "abilities": list(dict.fromkeys(self._created_abilities)),
+            "adversaries": list(dict.fromkeys(self._created_adversaries)),
+            "operations": list(dict.fromkeys(self._created_operations)),
+        }, runs=self._prior_runs + [self._run_stats()], **state)
+
+    def _run_stats(self, trace: Optional[str] = None) -> Dict:
+        """이번 run의 timing 요약 + 카운터 증분 (checkpoint "runs" 항목)"""
+        cache_now = self.llm_cache.snapshot()
+        return {
+            "timing": self.tracer.summary(),
+            "llm_cache": {k: cache_now.get(k, 0) - self._llm_cache_start.get(k, 0) for k in self.llm_cache.stats},
+            "structured_output": add_counters(self.structured.snapshot(), self._structured_start, -1),
+            "streaming": add_counters(self.stream_stats.snapshot(), self._stream_start, -1),
+            "trace": trace,
+        }
+
+    def _record_run(self, checkpoint: SessionCheckpoint, export_trace: bool = False):
+        """이번 run 통계를 checkpoint에 기록 (stage 종료 시 trace도 trace_run<N>.json으로 저장)"""
+        trace = None
+        if export_trace:
+            self.tracer.end_phase()
+            trace = f"trace_run{self._run_index + 1}.json"
+            self.tracer.export_chrome(checkpoint.session_dir / trace)
+        checkpoint.state["runs"] = self._prior_runs + [self._run_stats(trace)]
+        checkpoint.save()
+
+    @staticmethod
+    def _restored(checkpoint: SessionCheckpoint, phase: str, filename: str) -> Optional[Dict]:
+        """완료된 phase면 산출물 로드 (산출물이 없거나 손상되면 그 phase부터 다시 실행)"""
+        if not checkpoint.done(phase):
+            return None
+        data = checkpoint.artifact(filename)
+        if data is None:
+            print(f"  [!] {filename} missing — re-running this phase")
+            checkpoint.rollback(phase)
+            return None
+        print(f"  ↻ Restored from checkpoint: {filename}")
+        return data
+
+    def _verify_checkpoint(self, checkpoint: SessionCheckpoint):
+        """
+        checkpoint가 참조하는 Caldera 객체가 아직 있는지 확인
+        (agent / ability가 없으면 Phase 3부터, operation이 없으면 Phase 4부터 다시 실행)
+        """
+        print(f"\n[*] Resuming from checkpoint (last completed phase: {checkpoint.phase})")
+
+        if checkpoint.done("abilities"):
+            paw = checkpoint.get("selected_agent")
+            if not paw or not self.caldera.get_agent(paw):
+                print(f"  [!] Agent {paw} is no longer connected — re-running from Phase 3")
+                checkpoint.rollback("abilities")
+                return
+            # 같은 프로세스의 이전 run(배치 worker 재사용)이 받아 둔 카탈로그에는 다른 stage가 만든 ability가 없음
+            self.caldera.catalog.invalidate()
+            acquisition = checkpoint.artifact("03_ability_acquisition.json") or {}
+            ability_ids = [ab.get("ability_id") for ab in acquisition.get("abilities", []) if ab.get("ability_id")]
+            missing = [a for a in ability_ids if not self.caldera.get_ability(a)]
+            if missing:
+                print(f"  [!] {len(missing)}/{len(ability_ids)} abilities no longer exist in Caldera — "
+                      f"re-running from Phase 3")
+                checkpoint.rollback("abilities")
+                return
+            print(f"  ✓ Agent {paw} and {len(ability_ids)} abilities verified")
+
+        if checkpoint.done("operation") and not checkpoint.done("results"):
+            operation_id = checkpoint.get("operation_id")
+            operation = self.caldera.get_operation(operation_id) if operation_id else None
+            if not operation:
+                print(f"  [!] Operation {operation_id} not found — re-running from Phase 4")
+                checkpoint.rollback("operation")
+                return
+            print(f"  ✓ Operation {operation_id} found (state: {operation.get('state')}) — re-attaching")
+
+    def _save_session_info(self, session_dir: Path, operation_id: str):
+        """
+        session_info.json + trace.json 저장
+        (세션을 여러 run으로 나눠 실행했으면 checkpoint "runs"의 이전 run 통계/trace를 합쳐 세션 전체 기준으로)
+        """
+        self.tracer.end_phase()
+        prior = self._prior_runs
+        timing = self.tracer.summary()
+        if prior:
+            timing = self.tracer.merge_summaries([run["timing"] for run in prior] + [timing])
+        traces = [session_dir / run["trace"] for run in prior if run.get("trace")]
+        self.tracer.export_chrome(session_dir / "trace.json", previous=traces)
+        for path in traces:
+            path.unlink(missing_ok=True)
+        self.tracer.print_summary(timing)
+
+        cache_now, structured_now, stream_now = (self.llm_cache.snapshot(), self.structured.snapshot(),
+                                                 self.stream_stats.snapshot())
+        for run in prior:
+            cache_now = add_counters(cache_now, run.get("llm_cache", {}))
+            structured_now = add_counters(structured_now, run.get("structured_output", {}))
+            stream_now = add_counters(stream_now, run.get("streaming", {}))
+
+        structured = StructuredOutput.delta(self._structured_start, structured_now)
+        for call_type, stats in structured.items():
+            if stats["parse_errors"] or stats["schema_errors"]:
+                print(f"  [!] Structured output ({call_type}): {stats['failure_rate']}% invalid attempts, "
+                      f"{stats['repaired']} repaired, {stats['failed']} failed, "
+                      f"{stats['wasted_seconds']:.1f}s spent on invalid responses")
+        streaming = StreamStats.delta(self._stream_start, stream_now)
+        for call_type, stats in streaming.items():
+            saved = (f"~{stats['tokens_saved']:.0f} tokens saved" if stats["tokens_saved"] is not None
+                     else f"avg {stats['avg_tokens']} tokens generated")
+            print(f"  ✓ Streaming ({call_type}): {stats['early_stopped']}/{stats['calls']} stopped early, "
+                  f"avg {stats['avg_time_to_answer']}s to answer, {saved}")
+        self._save_json(session_dir / "session_info.json", {
+            "session_dir": str(session_dir),
+            "operation_id": operation_id,
+            "timestamp": datetime.now().isoformat(),
+            "caldera_connections": self._connection_stats(),
+            "llm_cache": LLMCache.delta(self._llm_cache_start, cache_now),
+            "cassette": dict(get_recorder().stats, mode=get_recorder().mode),
+            "timing": timing,
+            "command_validation": {
+                "ability_generator": dict(self.ability_generator.validator.stats),
+                "react_agent": dict(self.react_agent.validator.stats),
+            },
+            "failure_classifier": dict(self.react_agent.classifier.stats,
+                                       mode=self.react_agent.classifier_mode),
+            "fix_store": self.fix_store.snapshot(),
+            "structured_output": dict(structured, mode=self.structured.mode),
+            "streaming": dict(streaming, mode=streaming_mode()),
+        })
+
     @staticmethod
     def _save_json(path: Path, data: Dict):
         with open(path, 'w', encoding='utf-8') as f:
@@ -13,20 +13,26 @@ ReAct 패턴(Thought → Action → Observe)을 반복하여 성공률을 높인
 import sys
 import json
 import re
+import difflib
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Dict, List, Optional
 from dataclasses import dataclass, field
-from ollama import Client as OllamaClient
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 import os
-from dotenv import load_dotenv
-
-load_dotenv()
 
+from core_v3.llm_client import LLMClient
 from core_v3.svo_extractor import AttackSVO
 from core_v3.caldera_client import CalderaClient
+from core_v3.clients import get_caldera_client, get_llm_client, get_settings
+from core_v3.command_validator import CommandValidator
+from core_v3.failure_classifier import Classification, FailureClassifier
+from core_v3.fix_store import get_default_fix_store
+from core_v3.structured_output import REACT_SCHEMA, StructuredOutputError, get_structured_output
+from core_v3.streaming import StopWhen, json_complete, react_text_complete
 
 
 @dataclass
@@ -50,31 +56,79 @@ class ReactAgent:
       Observe: "수정 결과를 확인"
     """
 
-    # 권한 문제 감지 (조기 종료 전용 — LLM 호출 낭비 방지)
-    PERMISSION_PATTERNS = [
-        "access denied", "access is denied", "permission denied",
-        "operation not permitted", "requires elevation",
-        "not have enough privilege", "run as administrator",
-        "unauthorizedaccessexception"
-    ]
-
+    def __init__(self, llm_client: Optional[LLMClient] = None, caldera: Optional[CalderaClient] = None):
+        self.llm_client = llm_client or get_llm_client()
+        self.model = get_settings().llm_model
+        self.caldera = caldera or get_caldera_client()
+        self.validator = CommandValidator()
+        self.validation_mode = os.getenv("COMMAND_VALIDATION", "reprompt").lower()   # reprompt | strict | off
+        self.validation_retries = int(os.getenv("COMMAND_VALIDATION_RETRIES", "1"))
+        self.classifier = FailureClassifier()
+        self.classifier_mode = os.getenv("FAILURE_CLASSIFIER", "skip").lower()   # skip | seed | off
+        self.fix_store = get_default_fix_store()
+        self.structured = get_structured_output()    # off면 Thought/Action/Command 텍스트 형식
+        # 동시 ReAct LLM 요청 상한 — 링크별 병렬 × 후보별 병렬이 겹쳐도 REACT_MAX_WORKERS를 넘지 않음
+        self._llm_slots = threading.BoundedSemaphore(max(1, int(os.getenv("REACT_MAX_WORKERS", "4"))))
+        self._stop_text = StopWhen("react", react_text_complete)
+        self._stop_json = StopWhen("react", json_complete(REACT_SCHEMA))
+
+    # ==================== 규칙 기반 사전 분류 ====================
+
+    def classify_failure(self, error_output: str,
+                         attempts_history: List[FixAttempt] = None) -> Optional[Classification]:
+        """link 출력 → 규칙 기반 failure_type (LLM 호출 없음, 매칭 없으면 None)"""
+        return self.classifier.classify(error_output, attempts_history)
+
+    def _should_skip(self, classification: Optional[Classification]) -> bool:
+        """
+        수정 불가로 알려진 실패면 LLM 호출 생략
 
-    def __init__(self):
-        llm_host = os.getenv("OLLAMA_HOST", "http://192.168.50.252:11434")
-        self.llm_client = OllamaClient(host=llm_host)
-        self.model = os.getenv("LLM_MODEL", "gpt-oss:120b")
-        self.caldera = CalderaClient()
+        권한 에러 반복은 항상 중단하고, 나머지 수정 불가 유형(agent spawn 거부)은
+        FAILURE_CLASSIFIER=skip일 때만 중단한다.
+        """
+        if classification is None or classification.fixable:
+            return False
+        if classification.failure_type != "subject_failure" and self.classifier_mode != "skip":
+            return False
+        self.classifier.stats["skipped_llm"] += 1
+        print(f"  [!] {classification.failure_type} ({classification.rule}) — ReAct cannot resolve: "
+              f"{classification.hint}")
+        return True
+
+    # ==================== 세션 간 수정 지식 ====================
+
+    def known_fix(self, svo: AttackSVO, failed_command: str, error_output: str, platform: str,
+                  attempts_history: List[FixAttempt]) -> Optional[Dict]:
+        """
+        fix store에 같은 technique / 에러 signature / SVO로 성공한 수정이 있으면 LLM 없이 재사용
 
-    def _is_permission_error(self, error_output: str) -> bool:
-        """권한 문제 에러 여부 확인 (조기 종료용)"""
-        e = error_output.lower()
-        return any(p in e for p in self.PERMISSION_PATTERNS)
+        Returns:
+            react_fix 결과 형식 dict (+ "source": "fix_store") or None
+        """
+        known = self.fix_store.lookup(
+            svo.technique_id, platform, svo.verb, svo.object, error=error_output,
+            exclude=[failed_command] + [a.command for a in attempts_history]
+        )
+        if not known:
+            return None
+        print(f"  ✓ Known fix from fix store ({known['successes']} successes, session {known['session']})")
+        return {
+            "command": known["command"],
+            "thought": f"The same error signature was fixed before for {svo.technique_id} "
+                       f"({known['successes']} successful runs)",
+            "action": "Reuse the known-good fix from the fix store",
+            "failure_type": known["failure_type"] or "unknown",
+            "svo_focus": "",
+            "source": "fix_store",
+        }
 
     def react_fix(self, svo: AttackSVO, failed_command: str,
                   error_output: str, platform: str = "windows",
                   previous_attempts: List[FixAttempt] = None,
                   env_context: Dict = None,
-                  use_svo: bool = True) -> Optional[Dict]:
+                  use_svo: bool = True,
+                  verbose: bool = True,
+                  classification: Optional[Classification] = None) -> Optional[Dict]:
         """
         ReAct 패턴으로 실패한 command를 수정
 
@@ -85,6 +139,8 @@ class ReactAgent:
             platform: 타겟 플랫폼
             previous_attempts: 이전 시도 기록 (같은 수정 반복 방지)
             env_context: 환경 컨텍스트 (C2 서버 주소, Agent 권한 등)
+            verbose: False이면 Thought/Action 출력 생략 (병렬 호출 시 호출자가 순서대로 출력)
+            classification: 호출자가 미리 계산한 규칙 기반 분류 (없으면 여기서 분류)
 
         Returns:
             {
@@ -98,11 +154,160 @@ class ReactAgent:
         """
         attempts_history = previous_attempts or []
 
-        # 권한 문제: 이전에도 동일 에러면 포기 (LLM 낭비 방지)
-        if self._is_permission_error(error_output) and self._has_elevation_fix(attempts_history):
-            print(f"  [!] Permission issue — ReAct cannot resolve, needs ability-level change")
+        # 이전 세션에서 검증된 수정이 있으면 그대로 사용
+        known = self.known_fix(svo, failed_command, error_output, platform, attempts_history)
+        if known:
+            return known
+
+        # 수정 불가로 알려진 실패 유형은 LLM 호출 없이 포기
+        if classification is None:
+            classification = self.classify_failure(error_output, attempts_history)
+        if self._should_skip(classification):
             return None
 
+        system_prompt, user_prompt = self._build_prompts(
+            svo, failed_command, error_output, platform, attempts_history, env_context, use_svo,
+            classification
+        )
+        result = self._request_fix(system_prompt, user_prompt, failed_command,
+                                   attempts_history, verbose=verbose, platform=platform)
+        return self._with_classification(result, classification)
+
+    # ==================== 다중 후보 (speculative) ====================
+
+    # 후보별 전략 힌트 — 첫 후보는 힌트 없음 (단일 react_fix와 같은 프롬프트 → 캐시 재사용)
+    CANDIDATE_STRATEGIES = [
+        "",
+        "Use a DIFFERENT tool, cmdlet or binary than the failed command to perform the same verb.",
+        "Prefer the simplest possible command: built-in cmdlets only, minimal quoting, no nested quotes.",
+        "Do not require Administrator privileges: target user-writable locations ($env:TEMP, $env:USERPROFILE, /tmp, $HOME).",
+        "Create any missing prerequisite object (file, directory, registry key) inline before acting on it.",
+    ]
+
+    # User 권한 agent에서 실패 가능성이 높은 패턴 (순위 감점용)
+    ELEVATION_PATTERNS = [
+        r"HKLM:", r"HKEY_LOCAL_MACHINE", r"\\Windows\\System32\\config", r"-Verb\s+RunAs",
+        r"\bsc(\.exe)?\s+(create|config)\b", r"Set-MpPreference", r"\bnet\s+user\s+\S+\s+\S+\s+/add",
+        r"\bsudo\b", r"/etc/shadow", r"\bschtasks\b.*\s/ru\s+system", r"\bvssadmin\b",
+    ]
+
+    def react_fix_candidates(self, svo: AttackSVO, failed_command: str,
+                             error_output: str, platform: str = "windows",
+                             previous_attempts: List[FixAttempt] = None,
+                             env_context: Dict = None,
+                             use_svo: bool = True,
+                             n: int = 3,
+                             classification: Optional[Classification] = None) -> List[Dict]:
+        """
+        서로 다른 전략 힌트로 N개의 수정 후보를 동시에 생성한 뒤 로컬에서 순위화
+        (실제 LLM 요청은 _llm_slots로 제한 — 링크별 pool 안에서 호출돼도 동시 요청은 REACT_MAX_WORKERS 이하)
+
+        Returns:
+            react_fix 결과 dict에 "score", "rank_notes", "strategy"를 더한 리스트 (점수 내림차순,
+            중복/문법 이상 후보 제외). 빈 리스트면 수정 불가.
+        """
+        attempts_history = previous_attempts or []
+        known = self.known_fix(svo, failed_command, error_output, platform, attempts_history)
+        if known:
+            return [dict(known, score=1.0, rank_notes=["fix_store"], strategy=0)]
+
+        if classification is None:
+            classification = self.classify_failure(error_output, attempts_history)
+        if self._should_skip(classification):
+            return []
+
+        system_prompt, user_prompt = self._build_prompts(
+            svo, failed_command, error_output, platform, attempts_history, env_context, use_svo,
+            classification
+        )
+        strategies = self.CANDIDATE_STRATEGIES[:max(1, n)]
+
+        def request(item):
+            k, hint = item
+            prompt = user_prompt
+            if hint:
+                prompt += f"\n\nSTRATEGY (candidate {k + 1}/{len(strategies)}): {hint}"
+            result = self._with_classification(
+                self._request_fix(system_prompt, prompt, failed_command,
+                                  attempts_history, verbose=False, platform=platform),
+                classification)
+            if result:
+                result["strategy"] = k
+            return result
+
+        with ThreadPoolExecutor(max_workers=len(strategies)) as pool:
+            results = list(pool.map(request, enumerate(strategies)))
+
+        privilege = (env_context or {}).get("privilege", (env_context or {}).get("agent_privilege", "User"))
+        candidates, seen = [], set()
+        for result in results:
+            if not result or result["command"] in seen:
+                continue
+            seen.add(result["command"])
+            score, notes = self.score_candidate(result["command"], failed_command,
+                                                attempts_history, platform, privilege)
+            if score is None:
+                continue
+            result["score"] = score
+            result["rank_notes"] = notes
+            candidates.append(result)
+
+        # 점수 동률이면 전략 순서 유지 (결정적)
+        candidates.sort(key=lambda c: (-c["score"], c["strategy"]))
+        return candidates
+
+    def score_candidate(self, command: str, failed_command: str,
+                        attempts_history: List[FixAttempt], platform: str = "windows",
+                        privilege: str = "User") -> tuple:
+        """
+        후보 command 로컬 점수 (LLM/Caldera 호출 없음)
+
+        - 문법: CommandValidator 오류(따옴표/괄호 불균형, 여러 줄, 잘못된 #{변수} 등) → 제외 (None),
+          경고 1건당 0.1 감점
+        - 이전 시도와의 거리: 실패 command + 이전 시도와의 최소 difflib 거리 (0~1)
+        - 권한: User agent에서 관리자 전용 패턴 사용 시 감점
+
+        Returns:
+            (score or None, notes)
+        """
+        notes = []
+        check = self.validator.validate(command, self.validator.executor_for(platform))
+        if not check.ok:
+            return None, [i.code for i in check.errors]
+
+        previous = [failed_command] + [a.command for a in attempts_history]
+        distance = min(
+            (1 - difflib.SequenceMatcher(None, command, prev).ratio() for prev in previous if prev),
+            default=1.0,
+        )
+        score = distance
+        notes.append(f"distance={distance:.2f}")
+
+        if check.warnings:
+            score -= 0.1 * len(check.warnings)
+            notes.extend(i.code for i in check.warnings)
+
+        if str(privilege).lower() != "elevated":
+            hits = [p for p in self.ELEVATION_PATTERNS if re.search(p, command, re.IGNORECASE)]
+            if hits:
+                score -= 0.5
+                notes.append(f"elevation pattern ({len(hits)})")
+
+        return round(score, 3), notes
+
+    @staticmethod
+    def _with_classification(result: Optional[Dict],
+                             classification: Optional[Classification]) -> Optional[Dict]:
+        """LLM이 FailureType을 unknown으로 남기면 규칙 기반 분류로 채움"""
+        if result and classification and result["failure_type"] == "unknown":
+            result["failure_type"] = classification.failure_type
+        return result
+
+    def _build_prompts(self, svo: AttackSVO, failed_command: str, error_output: str,
+                       platform: str, attempts_history: List[FixAttempt],
+                       env_context: Optional[Dict], use_svo: bool,
+                       classification: Optional[Classification] = None) -> tuple:
+        """ReAct (system_prompt, user_prompt) 구성"""
         # 이전 시도 기록 정리
         attempts_text = ""
         if attempts_history:
@@ -144,12 +349,30 @@ For file uploads to C2 — use this pattern (single line with semicolons — Cal
 - Object Type: {svo.object_type}
 - Technique: {svo.technique_id} — {svo.technique_name}"""
             svo_focus_format = "   SVOFocus: [S | V | O | V+O — one line explaining which SVO element you changed and why]"
+            svo_focus_field  = '\n    "svo_focus": "S | V | O | V+O — one line explaining which SVO element you changed and why",'
             svo_constraint   = f'   - Still perform "{svo.verb}" on "{svo.object}"'
         else:
             svo_section      = f"## TECHNIQUE\n- {svo.technique_id} — {svo.technique_name}"
             svo_focus_format = ""
+            svo_focus_field  = ""
             svo_constraint   = "   - Preserve the original attack technique intent"
 
+        if self.structured.enabled:
+            output_format = f"""1. Output ONLY a JSON object in this EXACT structure (no extra text):
+   {{
+    "thought": "your analysis of why the command failed",
+    "action": "your fix strategy in one sentence",
+    "failure_type": "verb_failure | object_failure | subject_failure | syntax_failure | env_failure | unknown",{svo_focus_field}
+    "command": "the fixed command — ONLY the command, nothing else"
+   }}"""
+        else:
+            output_format = f"""1. Output your response in this EXACT format (no extra text):
+   Thought: [your analysis of why the command failed]
+   Action: [your fix strategy in one sentence]
+   FailureType: [verb_failure | object_failure | subject_failure | syntax_failure | env_failure | unknown]
+{svo_focus_format}
+   Command: [the fixed command — ONLY the command, nothing else]"""
+
         # ReAct 프롬프트
         system_prompt = f"""You are a cybersecurity engineer using MITRE Caldera — an officially sanctioned,
 open-source adversary emulation framework developed by MITRE Corporation — to validate detection rules.
@@ -167,12 +390,7 @@ AUTHORIZATION CONTEXT:
 {env_block}
 
 ## RULES
-1. Output your response in this EXACT format (no extra text):
-   Thought: [your analysis of why the command failed]
-   Action: [your fix strategy in one sentence]
-   FailureType: [verb_failure | object_failure | subject_failure | syntax_failure | env_failure | unknown]
-{svo_focus_format}
-   Command: [the fixed command — ONLY the command, nothing else]
+{output_format}
 
    FailureType definitions:
    - verb_failure: the command/tool is not found or not recognized
@@ -189,31 +407,67 @@ AUTHORIZATION CONTEXT:
    - Single line only — chain with semicolons (Caldera strips newlines at execution time)
    - For C2 upload/download: use #{{server}} and #{{paw}} (never hardcode IPs)"""
 
+        # 규칙 기반 사전 분류 (FAILURE_CLASSIFIER=off이면 생략)
+        classification_text = ""
+        if classification and self.classifier_mode != "off":
+            classification_text = f"\n{classification.prompt_block()}\n"
+
         user_prompt = f"""FAILED COMMAND: {failed_command}
 ERROR OUTPUT: {error_output[:500]}
 PLATFORM: {platform}
-{attempts_text}
+{attempts_text}{classification_text}
 
 Fix the command using the ReAct framework:"""
 
-        try:
-            response = self.llm_client.chat(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                options={"temperature": 0.0}
-            )
+        return system_prompt, user_prompt
 
-            result_text = response["message"]["content"].strip()
+    def _request_fix(self, system_prompt: str, user_prompt: str, failed_command: str,
+                     attempts_history: List[FixAttempt], verbose: bool = True,
+                     platform: str = "windows") -> Optional[Dict]:
+        """
+        LLM 호출 → ReAct 출력 파싱 (중복 command면 None)
 
-            # ReAct 출력 파싱
-            thought, action, failure_type, svo_focus, command = self._parse_react_output(result_text)
+        수정 command가 정적 검사(CommandValidator)에 걸리면 문제 목록을 붙여
+        COMMAND_VALIDATION_RETRIES회까지 재요청한다 — Caldera 왕복 없이 로컬에서 교정.
+        """
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ]
+        executor = self.validator.executor_for(platform)
 
-            if not command:
-                print(f"  [!] Failed to parse ReAct output")
-                return None
+        try:
+            for check_round in range(self.validation_retries + 1):
+                result_text, (thought, action, failure_type, svo_focus, command) = self._ask(messages)
+
+                if not command:
+                    print(f"  [!] Failed to parse ReAct output")
+                    return None
+                if self.validation_mode == "off":
+                    break
+
+                check = self.validator.validate(command, executor)
+                if check.ok:
+                    if check_round:
+                        self.validator.stats["repaired"] += 1
+                    break
+                if verbose:
+                    print(f"  [!] Static validation failed: {', '.join(i.code for i in check.errors)}")
+                if check_round < self.validation_retries:
+                    self.validator.stats["reprompted"] += 1
+                    messages = messages + [
+                        {"role": "assistant", "content": result_text},
+                        {"role": "user", "content": (
+                            f"The Command failed static validation:\n{check.feedback()}\n\n"
+                            f"Fix these problems and answer again in the same "
+                            f"{'JSON' if self.structured.enabled else 'Thought/Action/FailureType/SVOFocus/Command'} "
+                            f"format:")},
+                    ]
+            else:
+                if self.validation_mode == "strict":
+                    self.validator.stats["rejected"] += 1
+                    print(f"  [!] Fixed command failed static validation — discarded")
+                    return None
 
             # 이전과 동일한 command인지 체크
             previous_commands = [a.command for a in attempts_history]
@@ -221,11 +475,12 @@ Fix the command using the ReAct framework:"""
                 print(f"  [!] Duplicate command — skipping")
                 return None
 
-            print(f"  💭 Thought: {thought[:100]}")
-            print(f"  🎯 Action: {action[:100]}")
-            print(f"  ⚠ FailureType: {failure_type}")
-            print(f"  🔍 SVOFocus: {svo_focus}")
-            print(f"  → Fixed: {command[:100]}{'...' if len(command) > 100 else ''}")
+            if verbose:
+                print(f"  💭 Thought: {thought[:100]}")
+                print(f"  🎯 Action: {action[:100]}")
+                print(f"  ⚠ FailureType: {failure_type}")
+                print(f"  🔍 SVOFocus: {svo_focus}")
+                print(f"  → Fixed: {command[:100]}{'...' if len(command) > 100 else ''}")
 
             return {
                 "command": command,
@@ -235,13 +490,43 @@ Fix the command using the ReAct framework:"""
                 "svo_focus": svo_focus,
             }
 
+        except StructuredOutputError as e:
+            print(f"  [!] Failed to parse ReAct output ({e})")
+            return None
         except Exception as e:
             print(f"  [!] ReAct fix error: {e}")
             return None
 
+    def _ask(self, messages: List[Dict]) -> tuple:
+        """
+        ReAct LLM 호출 → (응답 원문, (thought, action, failure_type, svo_focus, command))
+        structured output이 켜져 있으면 REACT_SCHEMA JSON, 아니면 텍스트 형식 파싱
+        (command가 완성되면 스트리밍 조기 종료 — 뒤따르는 설명은 생성하지 않음)
+        """
+        with self._llm_slots:
+            return self._ask_unbounded(messages)
+
+    def _ask_unbounded(self, messages: List[Dict]) -> tuple:
+        if not self.structured.enabled:
+            response = self.llm_client.chat(model=self.model, messages=messages,
+                                            options={"temperature": 0.0},
+                                            stop_when=self._stop_text)
+            result_text = response["message"]["content"].strip()
+            return result_text, self._parse_react_output(result_text)
+
+        data = self.structured.chat(self.llm_client, self.model, messages=messages,
+                                    schema=REACT_SCHEMA, call_type="react",
+                                    options={"temperature": 0.0}, stop_when=self._stop_json)
+        command = self._clean_command(data["command"])
+        return json.dumps(data, ensure_ascii=False), (
+            data["thought"].strip(), data["action"].strip(), data["failure_type"],
+            data.get("svo_focus", "").strip(), command,
+        )
+
 
     def update_ability_command(self, ability_id: str, new_command: str,
-                                svo: AttackSVO, platform: str = "windows") -> Optional[Dict]:
+                                svo: AttackSVO, platform: str = "windows",
+                                executor: Optional[str] = None) -> Optional[Dict]:
         """
         기존 ability의 command를 수정된 command로 업데이트
 
@@ -250,11 +535,12 @@ Fix the command using the ReAct framework:"""
             new_command: 새 커맨드
             svo: SVO (능력 설명 업데이트용)
             platform: 플랫폼
+            executor: 실패 link가 실행된 executor (None이면 platform 기본값 — cmd ability를 psh로 바꾸지 않도록)
 
         Returns:
             업데이트된 ability 정보 or None
         """
-        executor = "psh" if platform == "windows" else "sh"
+        executor = executor or ("psh" if platform == "windows" else "sh")
 
         payload = {
             "executors": [{
@@ -265,7 +551,7 @@ Fix the command using the ReAct framework:"""
             }]
         }
 
-        result = self.caldera._request("PATCH", f"abilities/{ability_id}", json=payload)
+        result = self.caldera.update_ability(ability_id, payload)
 
         if result:
             print(f"  ✓ Ability {ability_id} command updated")
@@ -312,15 +598,16 @@ Fix the command using the ReAct framework:"""
 
         command_match = re.search(r"Command:\s*(.+?)$", text, re.DOTALL | re.IGNORECASE)
         if command_match:
-            command = command_match.group(1).strip()
-            command = re.sub(r"```(?:powershell|bash|sh|cmd)?\s*", "", command)
-            command = re.sub(r"```\s*$", "", command)
-            command = command.strip()
-            if "\n" in command:
-                command = command.split("\n")[0].strip()
+            command = self._clean_command(command_match.group(1))
 
         return thought, action, failure_type, svo_focus, command
 
-    def _has_elevation_fix(self, attempts: List[FixAttempt]) -> bool:
-        """이전에 권한 상승 수정을 시도했는지 확인"""
-        return any(a.failure_type == "subject_failure" for a in attempts)
+    @staticmethod
+    def _clean_command(command: str) -> str:
+        """코드 블록 제거 + 첫 줄만 (Caldera는 개행 제거)"""
+        command = re.sub(r"```(?:powershell|bash|sh|cmd)?\s*", "", command.strip())
+        command = re.sub(r"```\s*$", "", command)
+        command = command.strip()
+        if "\n" in command:
+            command = command.split("\n")[0].strip()
+        return command
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Session Recorder
+Ollama / Caldera 트래픽을 cassette 파일(JSONL)에 기록하고, replay 모드에서는 네트워크 없이 그대로 재생한다.
+실제 120B LLM 서버와 Caldera agent 없이도 전체 세션을 몇 초 만에 재현할 수 있어
+파이프라인 Python 측 프로파일링/회귀 테스트에 사용한다.
+
+  S2C_CASSETTE_MODE = off | record | replay
+  S2C_CASSETTE      = cassette 파일 경로
+  S2C_CASSETTE_LOOSE_LLM = true면 기록에 없는 LLM 프롬프트에 기록 순서상 다음 응답을 반환 (기본: CassetteMiss)
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+class CassetteMiss(Exception):
+    """replay 모드에서 대응하는 기록이 없음"""
+
+
+class Cassette:
+    """
+    요청/응답 기록기
+
+    - record: 모든 상호작용을 순서대로 JSONL에 append (중간에 중단돼도 앞부분은 보존)
+    - replay: kind + match key별 큐에서 순서대로 꺼내 반환
+        * llm:     (model, options, format, messages) 해시로 매칭, 없으면 CassetteMiss
+                   (loose_llm=True일 때만 기록 순서상 다음 응답 — 프롬프트를 바꾼 실험용)
+        * caldera: (method, endpoint)로 매칭 — body의 타임스탬프 등은 무시,
+                   GET은 큐가 비면 마지막 응답을 반복 (폴링 횟수 차이 흡수),
+                   POST/PATCH/DELETE는 반복하지 않음 (같은 객체 ID를 두 번 생성하지 않도록)
+    """
+
+    def __init__(self, path: Path, mode: str = "off", loose_llm: bool = False):
+        if mode not in ("off", "record", "replay"):
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        self.path = Path(path) if path else None
+        self.mode = mode if self.path else "off"
+        self.loose_llm = loose_llm
+        self._lock = threading.Lock()
+        self._queues: Dict[Tuple[str, str], List] = {}
+        self._last: Dict[Tuple[str, str], object] = {}
+        self._llm_order: List[Dict] = []
+        self.stats = {"recorded": 0, "replayed": 0, "repeated": 0, "out_of_order": 0}
+
+        if self.mode == "record":
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.path.write_text("", encoding="utf-8")
+        elif self.mode == "replay":
+            self._load()
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == "record"
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    # ==================== Key ====================
+
+    @staticmethod
+    def llm_key(model: str, messages: List[Dict], options: Optional[Dict], format=None) -> str:
+        payload = json.dumps({
+            "model": model, "options": options or {}, "format": format,
+            "messages": [{"role": m.get("role"), "content": m.get("content")} for m in messages],
+        }, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def caldera_key(method: str, endpoint: str) -> str:
+        return f"{method.upper()} {endpoint}"
+
+    # ==================== Record ====================
+
+    def record(self, kind: str, key: str, request: Dict, response):
+        entry = {"kind": kind, "key": key, "request": request,
+                 "response": response, "ts": time.time()}
+        line = json.dumps(entry, ensure_ascii=False, default=str)
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+            self.stats["recorded"] += 1
+
+    # ==================== Replay ====================
+
+    def _load(self):
+        if not self.path.exists():
+            raise FileNotFoundError(f"Cassette not found: {self.path}")
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                entry = json.loads(line)
+                self._queues.setdefault((entry["kind"], entry["key"]), []).append(entry)
+                if entry["kind"] == "llm":
+                    self._llm_order.append(entry)
+        print(f"[*] Replaying cassette: {self.path} "
+              f"({sum(len(q) for q in self._queues.values())} interactions)")
+
+    def replay(self, kind: str, key: str):
+        with self._lock:
+            queue = self._queues.get((kind, key))
+            if queue:
+                entry = queue.pop(0)
+                self._last[(kind, key)] = entry["response"]
+                if kind == "llm" and entry in self._llm_order:
+                    self._llm_order.remove(entry)
+                self.stats["replayed"] += 1
+                return entry["response"]
+
+            if kind == "caldera" and key.startswith("GET ") and (kind, key) in self._last:
+                self.stats["repeated"] += 1
+                return self._last[(kind, key)]
+
+            # 프롬프트가 달라진 LLM 호출 → (opt-in) 기록 순서상 다음 응답
+            if kind == "llm" and self.loose_llm and self._llm_order:
+                entry = self._llm_order.pop(0)
+                self._queues[(kind, entry["key"])].remove(entry)
+                self.stats["out_of_order"] += 1
+                return entry["response"]
+
+        if kind == "llm":
+            raise CassetteMiss(f"No recorded llm interaction for prompt hash {key[:16]} "
+                               f"(프롬프트 변경 — 다시 기록하거나 S2C_CASSETTE_LOOSE_LLM=true)")
+        raise CassetteMiss(f"No recorded {kind} interaction for: {key[:120]}")
+
+
+class VirtualClock:
+    """replay 모드용 시계 — sleep은 즉시 반환하고 가상 시간만 진행"""
+
+    def __init__(self):
+        self._offset = 0.0
+
+    def sleep(self, seconds: float):
+        self._offset += max(seconds, 0)
+
+    def monotonic(self) -> float:
+        return time.monotonic() + self._offset
+
+
+_recorder: Optional[Cassette] = None
+_recorder_lock = threading.Lock()
+
+
+def get_recorder() -> Cassette:
+    """프로세스 전역 cassette (환경 변수로 설정)"""
+    global _recorder
+    with _recorder_lock:
+        if _recorder is None:
+            path = os.getenv("S2C_CASSETTE")
+            mode = os.getenv("S2C_CASSETTE_MODE", "off").lower()
+            loose_llm = os.getenv("S2C_CASSETTE_LOOSE_LLM", "false").lower() == "true"
+            _recorder = Cassette(Path(path) if path else None, mode, loose_llm=loose_llm)
+        return _recorder
+
+
+def watcher_timing() -> Tuple[Callable[[float], None], Callable[[], float], Optional[Callable[[], float]]]:
+    """
+    OperationWatcher용 (sleep, clock, wall_clock) — replay 모드면 대기 없는 가상 시계,
+    wall_clock은 None (기록된 link finish 타임스탬프는 과거 시각이라 completion lag 측정 불가)
+    """
+    if get_recorder().replaying:
+        clock = VirtualClock()
+        return clock.sleep, clock.monotonic, None
+    return time.sleep, time.monotonic, time.time
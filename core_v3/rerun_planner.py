@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Rerun Planner
+ReAct 라운드에서 전체 attack chain 대신 수정된 ability와 그 선행 ability만 재실행하는 계획 수립,
+그리고 재실행 결과를 이전 라운드 link와 병합(carry forward)한다.
+
+선행 관계는 ability에 선언된 fact 의존성으로 판단:
+  - 생산: executor parser가 만드는 fact trait (parserconfigs의 source/target)
+  - 소비: command의 #{trait} 변수, requirements의 relationship_match source/target
+chain에서 앞선 ability가 생산하는 trait를 소비하면 선행 ability로 본다 (전이적으로 포함).
+"""
+
+import re
+from typing import Dict, List, Optional, Set, Tuple
+
+
+# Caldera가 link 생성 시 직접 채우는 전역 변수 — 다른 ability에 의존하지 않음
+GLOBAL_VARIABLES = {"server", "paw", "group", "location", "exe_name",
+                    "upstream_dest", "origin_link_id"}
+
+_VARIABLE_PATTERN = re.compile(r"#\{([\w.\-]+)\}")
+
+
+class RerunPlanner:
+    """수정된 ability + 선언된 선행 ability만 담은 최소 재실행 계획"""
+
+    def __init__(self, caldera):
+        self.caldera = caldera
+
+    # ==================== Fact 의존성 ====================
+
+    @staticmethod
+    def produced_traits(ability: Dict) -> Set[str]:
+        traits = set()
+        for executor in ability.get("executors", []) or []:
+            for parser in executor.get("parsers", []) or []:
+                for config in parser.get("parserconfigs", parser.get("relationships", [])) or []:
+                    for key in ("source", "target"):
+                        if config.get(key):
+                            traits.add(config[key])
+        return traits
+
+    @staticmethod
+    def consumed_traits(ability: Dict) -> Set[str]:
+        traits = set()
+        for executor in ability.get("executors", []) or []:
+            for field in ("command", "cleanup"):
+                value = executor.get(field) or ""
+                if isinstance(value, list):
+                    value = "\n".join(v for v in value if isinstance(v, str))
+                traits.update(_VARIABLE_PATTERN.findall(value))
+        for requirement in ability.get("requirements", []) or []:
+            for match in requirement.get("relationship_match", []) or []:
+                for key in ("source", "target"):
+                    if match.get(key):
+                        traits.add(match[key])
+        return {t for t in traits if t not in GLOBAL_VARIABLES}
+
+    def prerequisites(self, attack_chain: List[Dict]) -> Dict[str, Set[str]]:
+        """
+        ability_id → 직접 선행 ability_id 집합 (chain에서 앞선 ability만)
+        """
+        abilities = {}
+        for step in attack_chain:
+            ability_id = step.get("ability_id")
+            if ability_id and ability_id not in abilities:
+                abilities[ability_id] = self.caldera.get_ability(ability_id) or {}
+
+        deps: Dict[str, Set[str]] = {}
+        producers: Dict[str, List[str]] = {}   # trait → 앞서 생산한 ability들
+        for step in attack_chain:
+            ability_id = step.get("ability_id")
+            if not ability_id:
+                continue
+            ability = abilities.get(ability_id, {})
+            needed = self.consumed_traits(ability)
+            deps.setdefault(ability_id, set()).update(
+                p for trait in needed for p in producers.get(trait, []) if p != ability_id
+            )
+            for trait in self.produced_traits(ability):
+                producers.setdefault(trait, []).append(ability_id)
+        return deps
+
+    # ==================== 계획 / 병합 ====================
+
+    def plan(self, attack_chain: List[Dict], patched_ids: Set[str]) -> Tuple[List[Dict], List[str]]:
+        """
+        Args:
+            attack_chain: 전체 chain step 목록
+            patched_ids: 이번 라운드에 수정된 ability ID
+
+        Returns:
+            (재실행할 step 목록 — chain 순서 유지, 추가된 선행 ability ID 목록)
+        """
+        deps = self.prerequisites(attack_chain)
+        selected = set(patched_ids)
+        queue = list(patched_ids)
+        while queue:
+            for dep in deps.get(queue.pop(), ()):
+                if dep not in selected:
+                    selected.add(dep)
+                    queue.append(dep)
+
+        steps = [s for s in attack_chain if s.get("ability_id") in selected]
+        added = []
+        for step in steps:
+            ability_id = step.get("ability_id")
+            if ability_id not in patched_ids and ability_id not in added:
+                added.append(ability_id)
+        return steps, added
+
+    @staticmethod
+    def merge(attack_chain: List[Dict], previous_links: List[Dict], new_links: List[Dict],
+              rerun_ids: Set[str]) -> Tuple[List[Dict], int]:
+        """
+        재실행한 ability는 새 link로, 나머지는 이전 라운드 link를 그대로 유지
+
+        Returns:
+            (chain 순서로 정렬된 병합 link 목록, carry forward된 link 수)
+        """
+        def ability_id_of(link: Dict) -> Optional[str]:
+            return (link.get("ability") or {}).get("ability_id")
+
+        order = {}
+        for i, step in enumerate(attack_chain):
+            order.setdefault(step.get("ability_id"), i)
+
+        carried = [l for l in previous_links if ability_id_of(l) not in rerun_ids]
+        fresh = [l for l in new_links if ability_id_of(l) in rerun_ids or ability_id_of(l) not in order]
+        merged = sorted(carried + fresh, key=lambda l: order.get(ability_id_of(l), len(order)))
+        return merged, len(carried)
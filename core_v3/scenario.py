@@ -5,31 +5,31 @@ Scenario Processor
 """
 
 import sys
-import json
-import re
 from pathlib import Path
 from typing import Dict, List, Optional
-from ollama import Client as OllamaClient
 
 # 상위 디렉토리를 path에 추가
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 import os
-from dotenv import load_dotenv
-
-load_dotenv()
 
+from core_v3.llm_client import LLMClient
 from core_v3.caldera_client import CalderaClient
+from core_v3.clients import get_caldera_client, get_llm_client, get_settings
+from core_v3.attack_index import get_default_attack_index
+from core_v3.structured_output import SCENARIO_SCHEMA, StructuredOutputError, get_structured_output
 
 
 class ScenarioProcessor:
     """시나리오 파싱 + Caldera 검증 + Ability 선택"""
 
-    def __init__(self):
-        llm_host = os.getenv("OLLAMA_HOST", "http://192.168.50.252:11434")
-        self.llm_client = OllamaClient(host=llm_host)
-        self.model = os.getenv("LLM_MODEL", "gpt-oss:120b")
-        self.caldera_client = CalderaClient()
+    def __init__(self, llm_client: Optional[LLMClient] = None, caldera: Optional[CalderaClient] = None):
+        self.llm_client = llm_client or get_llm_client()
+        self.model = get_settings().llm_model
+        self.caldera_client = caldera or get_caldera_client()
+        self.attack_validation = os.getenv("ATTACK_VALIDATION", "repair").lower()   # repair | flag | off
+        self.attack_index = get_default_attack_index() if self.attack_validation != "off" else None
+        self.structured = get_structured_output()
 
     # =========================================================================
     # Phase 1: LLM 시나리오 파싱
@@ -116,35 +116,51 @@ IMPORTANT:
 Output the JSON structure."""
 
         try:
-            response = self.llm_client.chat(
-                model=self.model,
+            parsed_data = self.structured.chat(
+                self.llm_client, self.model,
                 messages=[
                     {"role": "system", "content": system_prompt},
                     {"role": "user", "content": user_prompt}
                 ],
+                schema=SCENARIO_SCHEMA, call_type="parse",
                 options={"temperature": float(os.getenv("LLM_TEMPERATURE", "0.0"))}
             )
 
-            result_text = response["message"]["content"].strip()
-            result_text = re.sub(r"```json\s*", "", result_text)
-            result_text = re.sub(r"```\s*", "", result_text)
-
-            parsed_data = json.loads(result_text)
-
             print(f"  OK Extracted {len(parsed_data.get('techniques', []))} techniques")
             print(f"  OK Target: {parsed_data.get('target_org', 'N/A')}")
             print(f"  OK Threat Actor: {parsed_data.get('threat_actor', 'N/A')}")
 
+            self._check_attack_ids(parsed_data)
             return parsed_data
 
-        except json.JSONDecodeError as e:
+        except StructuredOutputError as e:
             print(f"  [!] JSON parsing failed: {e}")
-            print(f"  [!] Raw response: {result_text[:500]}")
+            print(f"  [!] Raw response: {e.raw[:500]}")
             return None
         except Exception as e:
             print(f"  [!] Error: {e}")
             return None
 
+    def _check_attack_ids(self, parsed_data: Dict):
+        """로컬 ATT&CK 인덱스로 LLM이 뽑은 technique ID / 이름 / tactic 검증·보정 (Caldera·LLM 호출 없음)"""
+        if self.attack_index is None:
+            if self.attack_validation != "off":
+                print("  [!] ATT&CK index not available — skipping offline technique validation "
+                      "(python -m core_v3.attack_index build <enterprise-attack.json>)")
+            return
+
+        techniques = parsed_data.get("techniques", [])
+        stats = self.attack_index.repair_techniques(techniques, repair=self.attack_validation == "repair")
+        parsed_data["attack_validation"] = dict(stats, mode=self.attack_validation)
+        print(f"  OK ATT&CK check: {stats['valid']} valid, {stats['repaired']} repaired, "
+              f"{stats['invalid']} invalid, {stats['unknown']} unknown")
+        for tech in techniques:
+            result = tech["attack_validation"]
+            notes = result["changes"] + result["warnings"]
+            if notes:
+                marker = "→" if result["status"] in ("repaired", "valid") else "[!]"
+                print(f"    {marker} {tech.get('technique_id')}: {'; '.join(notes)}")
+
     # =========================================================================
     # Phase 2: Caldera 검증 + Best Ability 선택
     # =========================================================================
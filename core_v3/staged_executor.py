@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Staged Executor
+여러 세션을 stage 단위로 동시에 진행시키는 파이프라인 실행기.
+
+  parse → svo → ability ─┬→ [agent A queue] operation → watch → fix
+   (LLM 슬롯 공유)         └→ [agent B queue] operation → watch → fix
+
+  - LLM stage(parse / svo / ability)는 llm_workers개 슬롯을 공유한다. 슬롯이 비면 가장 뒤쪽 stage의
+    작업부터 꺼내므로, 이미 진행 중인 세션이 먼저 agent queue에 도달한다 (agent 유휴 시간 최소화).
+  - ability stage에 들어갈 때 진행 중 세션이 가장 적은 agent를 배정한다 (ability 생성에 platform 필요).
+  - agent stage(operation / watch / fix)는 agent별 스레드 하나가 순서대로 처리 — agent당 operation 1개.
+  - max_in_flight로 동시에 진행 중인 세션 수를 제한한다 (기본: agent당 2 = 실행 중 1 + 준비 1).
+
+stage 사이 상태 전달은 호출자(run_stage)가 담당한다. BatchRunner는 stage마다
+Pipeline.run(stop_after=<phase>) / resume_dir로 checkpoint.json을 이어 붙인다.
+fix stage(ReAct)의 LLM 호출은 agent 스레드 안에서 일어나므로 LLM 슬롯에 포함되지 않는다.
+"""
+
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+
+@dataclass(frozen=True)
+class Stage:
+    name: str
+    phase: Optional[str]        # stage 완료 시 도달하는 checkpoint phase (None = 끝까지)
+    resource: str               # llm | agent
+    assigns_agent: bool = False
+
+
+PIPELINE_STAGES = [
+    Stage("parse", "parsed", "llm"),
+    Stage("svo", "validated", "llm"),
+    Stage("ability", "abilities", "llm", assigns_agent=True),
+    Stage("operation", "operation", "agent"),
+    Stage("watch", "results", "agent"),
+    Stage("fix", None, "agent"),
+]
+
+
+class StagedExecutor:
+    """
+    Args:
+        run_stage: (stage, item) → bool. False면 해당 세션 중단 (다음 stage로 넘기지 않음)
+        agents: 사용할 agent paw 목록
+        on_finish: (item) → None. 세션이 끝나거나 중단될 때 호출
+    """
+
+    def __init__(self, run_stage: Callable[[Stage, Any], bool], agents: List[str],
+                 llm_workers: int = 2, max_in_flight: Optional[int] = None,
+                 stages: List[Stage] = PIPELINE_STAGES,
+                 on_finish: Optional[Callable[[Any], None]] = None):
+        if not agents:
+            raise ValueError("StagedExecutor needs at least one agent")
+        self.run_stage = run_stage
+        self.agents = list(agents)
+        self.llm_workers = max(1, llm_workers)
+        self.max_in_flight = max_in_flight or 2 * len(self.agents)
+        self.stages = stages
+        self.on_finish = on_finish
+
+        self._llm_stages = [s for s in stages if s.resource == "llm"]
+        self._agent_stages = [s for s in stages if s.resource == "agent"]
+        self._llm_queues: Dict[str, Deque] = {s.name: deque() for s in self._llm_stages}
+        self._agent_queues: Dict[str, Deque] = {paw: deque() for paw in self.agents}
+        self._agent_load: Dict[str, int] = {paw: 0 for paw in self.agents}
+
+        self._cond = threading.Condition()
+        self._pending: Deque = deque()
+        self._in_flight = 0
+        self._stopping = False
+        self._busy = {"llm": 0.0, "agent": 0.0}
+        self.stats: Dict[str, Dict] = {s.name: {"runs": 0, "failed": 0, "seconds": 0.0} for s in stages}
+        self.wall_seconds = 0.0
+
+    # ==================== 실행 ====================
+
+    def run(self, items: List[Any]):
+        """모든 세션이 끝나거나 stop()될 때까지 블록"""
+        started = time.perf_counter()
+        with self._cond:
+            self._pending = deque(items)
+            self._admit()
+
+        threads = [threading.Thread(target=self._llm_worker, name=f"stage-llm-{i}", daemon=True)
+                   for i in range(self.llm_workers)]
+        threads += [threading.Thread(target=self._agent_worker, args=(paw,), name=f"stage-{paw}", daemon=True)
+                    for paw in self.agents]
+        for t in threads:
+            t.start()
+        try:
+            with self._cond:
+                while not self._finished():
+                    self._cond.wait(timeout=1.0)
+        finally:
+            self.stop()
+            for t in threads:
+                t.join()
+            self.wall_seconds = time.perf_counter() - started
+
+    def stop(self):
+        """새 세션/stage 시작 중단 (진행 중인 stage는 끝까지 실행)"""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+
+    def _finished(self) -> bool:
+        return self._stopping or (not self._pending and self._in_flight == 0)
+
+    def _admit(self):
+        """(lock 보유 상태) 진행 중 세션이 max_in_flight 미만이면 다음 세션을 첫 stage queue에 투입"""
+        while self._pending and self._in_flight < self.max_in_flight and not self._stopping:
+            self._in_flight += 1
+            self._enqueue(self.stages[0], self._pending.popleft())
+        self._cond.notify_all()
+
+    def _enqueue(self, stage: Stage, item: Any):
+        if stage.resource == "llm":
+            self._llm_queues[stage.name].append(item)
+        else:
+            self._agent_queues[item.agent].append((stage, item))
+
+    def _finish(self, item: Any):
+        if self.on_finish:
+            self.on_finish(item)
+        with self._cond:
+            self._in_flight -= 1
+            if getattr(item, "agent", None) in self._agent_load:
+                self._agent_load[item.agent] -= 1
+            self._admit()
+
+    def _execute(self, stage: Stage, item: Any) -> bool:
+        started = time.perf_counter()
+        try:
+            ok = bool(self.run_stage(stage, item))
+        except Exception as e:
+            print(f"  [!] Stage {stage.name} raised: {e}")
+            ok = False
+        elapsed = time.perf_counter() - started
+        with self._cond:
+            stats = self.stats[stage.name]
+            stats["runs"] += 1
+            stats["failed"] += 0 if ok else 1
+            stats["seconds"] += elapsed
+            self._busy[stage.resource] += elapsed
+        return ok
+
+    def _next_stage(self, stage: Stage) -> Optional[Stage]:
+        index = self.stages.index(stage)
+        return self.stages[index + 1] if index + 1 < len(self.stages) else None
+
+    # ==================== Worker ====================
+
+    def _llm_worker(self):
+        while True:
+            with self._cond:
+                task = None
+                while task is None:
+                    if self._stopping:
+                        return
+                    # 뒤쪽 stage 우선 — 진행 중인 세션을 먼저 agent에 넘김
+                    for stage in reversed(self._llm_stages):
+                        if self._llm_queues[stage.name]:
+                            task = (stage, self._llm_queues[stage.name].popleft())
+                            break
+                    else:
+                        self._cond.wait(timeout=1.0)
+                stage, item = task
+                if stage.assigns_agent and getattr(item, "agent", None) not in self._agent_load:
+                    item.agent = min(self.agents, key=lambda paw: self._agent_load[paw])
+                    self._agent_load[item.agent] += 1
+
+            if not self._execute(stage, item):
+                self._finish(item)
+                continue
+            next_stage = self._next_stage(stage)
+            if next_stage is None:
+                self._finish(item)
+                continue
+            with self._cond:
+                if next_stage.resource == "agent" and getattr(item, "agent", None) not in self._agent_queues:
+                    item.agent = min(self.agents, key=lambda paw: self._agent_load[paw])
+                    self._agent_load[item.agent] += 1
+                self._enqueue(next_stage, item)
+                self._cond.notify_all()
+
+    def _agent_worker(self, paw: str):
+        """agent 하나 — 세션의 agent stage를 끝까지 연속 실행 (operation이 겹치지 않음)"""
+        queue = self._agent_queues[paw]
+        while True:
+            with self._cond:
+                while not queue:
+                    if self._stopping:
+                        return
+                    self._cond.wait(timeout=1.0)
+                if self._stopping:
+                    return
+                stage, item = queue.popleft()
+
+            while stage is not None:
+                if not self._execute(stage, item):
+                    break
+                stage = self._next_stage(stage)
+                with self._cond:
+                    if self._stopping:
+                        return
+            self._finish(item)
+
+    # ==================== 통계 ====================
+
+    def utilization(self) -> Dict[str, float]:
+        """자원별 가동률 (stage 실행 시간 합 / (경과 시간 × 슬롯 수))"""
+        wall = self.wall_seconds or 1e-9
+        return {
+            "llm": round(self._busy["llm"] / (wall * self.llm_workers), 3),
+            "agent": round(self._busy["agent"] / (wall * len(self.agents)), 3),
+        }
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Streaming
+LLM 응답을 스트리밍으로 받으면서 필요한 필드가 완성되는 즉시 생성을 끊는 조기 종료 조건 + 통계.
+
+  ReAct 수정과 ability command 생성은 한 줄짜리 command만 쓰는데, 모델은 그 뒤에도 설명/코드 펜스를
+  계속 생성한다. LLMClient.chat(stop_when=...)은 Ollama chat을 stream=True로 호출하고, content가
+  쌓일 때마다 완성 여부를 검사해 완성되면 스트림을 닫는다 (연결 종료 → Ollama가 생성 중단).
+  잘린 응답도 기존 파서(_parse_react_output / _clean_command / extract_json)가 그대로 해석할 수
+  있는 지점에서만 끊는다.
+
+LLM_STREAMING:
+  early_stop = 스트리밍 + 조기 종료 (기본)
+  measure    = 스트리밍하되 끝까지 받음 — 답이 완성된 시점과 이후 낭비된 토큰/시간을 측정 (절감 기준치)
+  off        = 기존 단일 응답 호출
+
+호출 유형별 통계 (session_info.json "streaming"):
+  time_to_answer_seconds (요청 → 필요한 필드 완성), first_token_seconds, tokens (스트림 chunk 수 ≈ 생성 토큰),
+  early_stopped, tokens_saved (measure: 실측 / early_stop: 같은 프로세스의 끝까지 받은 호출 평균 기준 추정)
+"""
+
+import json
+import os
+import re
+import threading
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional
+
+
+@dataclass(frozen=True)
+class StopWhen:
+    """
+    조기 종료 조건 — answer_end(지금까지 받은 content) → 쓸 수 있는 답이 끝나는 위치 (미완성이면 None).
+    조기 종료 시 content는 그 위치까지로 자른다 (chunk가 완성 지점을 넘어 설명 일부를 포함할 수 있음)
+    """
+    call_type: str
+    answer_end: Callable[[str], Optional[int]]
+
+
+# ==================== 완성 조건 ====================
+
+_FENCE_LINE = re.compile(r"^\s*```")
+
+
+def command_complete(text: str) -> Optional[int]:
+    """
+    raw command 응답: command 줄 뒤에 닫는 코드 펜스나 빈 줄(설명 문단 시작)이 오면 완성.
+    개행 없이 이어지는 여러 줄 command는 끊지 않음 (정적 검사의 single-line 재요청 흐름 유지)
+    """
+    offset = 0
+    seen_command = False
+    for line in text.split("\n")[:-1]:         # 마지막 줄은 아직 생성 중
+        if _FENCE_LINE.match(line):
+            if seen_command:
+                return offset
+        elif line.strip():
+            seen_command = True
+        elif seen_command:
+            return offset
+        offset += len(line) + 1
+    return None
+
+
+_REACT_COMMAND = re.compile(r"Command:\s*(?:```[a-z]*(?![a-z])\s*)?(\S[^\n]*)\n", re.IGNORECASE)
+
+
+def react_text_complete(text: str) -> Optional[int]:
+    """ReAct 텍스트 형식: 'Command:' 줄이 개행으로 끝나면 완성 (_parse_react_output은 첫 줄만 사용)"""
+    match = _REACT_COMMAND.search(text)
+    if match and not match.group(1).startswith("```"):
+        return match.end()
+    return None
+
+
+def json_complete(schema: Dict) -> Callable[[str], Optional[int]]:
+    """JSON 응답: 첫 JSON 값이 닫히고 스키마 검증을 통과하면 완성"""
+    from core_v3.structured_output import validate
+
+    decoder = json.JSONDecoder()
+
+    def answer_end(text: str) -> Optional[int]:
+        starts = [i for i in (text.find("{"), text.find("[")) if i >= 0]
+        if not starts or ("}" not in text and "]" not in text):
+            return None
+        try:
+            value, end = decoder.raw_decode(text, min(starts))
+        except ValueError:
+            return None
+        return None if validate(value, schema) else end
+    return answer_end
+
+
+# ==================== 통계 ====================
+
+class StreamStats:
+    _COUNTERS = ("calls", "early_stopped", "incomplete", "tokens", "answer_tokens", "tokens_saved",
+                 "seconds", "time_to_answer_seconds", "first_token_seconds", "seconds_saved",
+                 "full_calls", "full_tokens")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stats: Dict[str, Dict] = {}
+
+    def record(self, call_type: str, tokens: int, answer_tokens: Optional[int], seconds: float,
+               time_to_answer: Optional[float], first_token: Optional[float], early_stopped: bool):
+        """
+        Args:
+            tokens: 받은 chunk 수 (thinking 포함 ≈ 생성 토큰)
+            answer_tokens / time_to_answer: 필요한 필드가 완성된 시점 (완성되지 않았으면 None)
+        """
+        with self._lock:
+            entry = self.stats.setdefault(call_type, {k: 0 for k in self._COUNTERS})
+            entry["calls"] += 1
+            entry["tokens"] += tokens
+            entry["seconds"] += seconds
+            entry["first_token_seconds"] += first_token or 0.0
+            if answer_tokens is None:
+                entry["incomplete"] += 1
+                return
+            entry["answer_tokens"] += answer_tokens
+            entry["time_to_answer_seconds"] += time_to_answer
+            if early_stopped:
+                entry["early_stopped"] += 1
+                # 끝까지 받은 호출의 평균 길이 기준 추정
+                if entry["full_calls"]:
+                    entry["tokens_saved"] += max(0, entry["full_tokens"] / entry["full_calls"] - tokens)
+            else:
+                entry["full_calls"] += 1
+                entry["full_tokens"] += tokens
+                entry["tokens_saved"] += tokens - answer_tokens
+                entry["seconds_saved"] += seconds - time_to_answer
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {k: dict(v) for k, v in self.stats.items()}
+
+    @staticmethod
+    def delta(before: Dict, after: Dict) -> Dict:
+        """두 snapshot 사이의 호출 유형별 통계 (+ 평균)"""
+        result = {}
+        for call_type, stats in after.items():
+            prev = before.get(call_type, {})
+            entry = {k: stats[k] - prev.get(k, 0) for k in StreamStats._COUNTERS}
+            calls = entry["calls"]
+            if not calls:
+                continue
+            answered = calls - entry["incomplete"]
+            entry["avg_time_to_answer"] = round(entry["time_to_answer_seconds"] / answered, 2) if answered else None
+            entry["avg_first_token"] = round(entry["first_token_seconds"] / calls, 2)
+            entry["avg_tokens"] = round(entry["tokens"] / calls, 1)
+            for k in ("tokens_saved", "seconds", "time_to_answer_seconds", "first_token_seconds", "seconds_saved"):
+                entry[k] = round(entry[k], 2)
+            if entry["early_stopped"] and not stats["full_calls"]:
+                entry["tokens_saved"] = None     # 끝까지 받은 호출이 없어 추정 기준 없음 (LLM_STREAMING=measure로 측정)
+            result[call_type] = entry
+        return result
+
+
+_default_stats: Optional[StreamStats] = None
+_default_lock = threading.Lock()
+
+
+def get_stream_stats() -> StreamStats:
+    """프로세스 전역 스트리밍 통계"""
+    global _default_stats
+    with _default_lock:
+        if _default_stats is None:
+            _default_stats = StreamStats()
+        return _default_stats
+
+
+def streaming_mode() -> str:
+    return os.getenv("LLM_STREAMING", "early_stop").lower()
@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+Structured Output
+LLM JSON 응답을 스키마로 제약·검증하고, 깨진 응답은 repair 프롬프트로 한 번 더 받는 공용 계층.
+
+  parse / svo / svo_batch / ordering / react 호출이 모두 이 경로를 거친다.
+    1. Ollama에 format=<JSON schema> 전달 (모델 디코딩 단계에서 구조 강제)
+    2. 로컬에서 JSON 추출(코드 펜스 / 앞뒤 잡담 제거) + 스키마 검증
+    3. 실패하면 오류 목록을 붙여 같은 대화에 재요청 (LLM_REPAIR_RETRIES회)
+  호출 유형별로 파싱/스키마 실패율과 실패한 시도에 쓴 시간을 집계 → session_info.json "structured_output"
+
+LLM_STRUCTURED_OUTPUT:
+  schema   = format에 스키마 전달 + 검증 + repair (기본)
+  json     = format="json"만 전달 (스키마 미지원 Ollama) + 검증 + repair
+  validate = format 미전달, 검증 + repair만
+  off      = 기존 동작 (JSON 추출만, 검증/재요청 없음 — ReAct는 Thought/Action/Command 텍스트 형식)
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+
+# ==================== 스키마 ====================
+
+REACT_FAILURE_TYPES = ["verb_failure", "object_failure", "subject_failure",
+                       "syntax_failure", "env_failure", "unknown"]
+SVO_OBJECT_TYPES = ["file", "process", "network", "registry", "service", "memory"]
+
+_TEXT = {"type": "string"}
+_NONEMPTY = {"type": "string", "minLength": 1}
+
+SCENARIO_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "scenario_name": _TEXT,
+        "target_org": _TEXT,
+        "threat_actor": _TEXT,
+        "techniques": {
+            "type": "array",
+            "minItems": 1,
+            "items": {
+                "type": "object",
+                "properties": {
+                    "technique_id": _NONEMPTY,      # 형식 오류는 attack_index가 오프라인 보정
+                    "technique_name": _NONEMPTY,
+                    "tactic": _NONEMPTY,
+                    "phase": _TEXT,
+                    "description": _TEXT,
+                    "expected_action": _TEXT,
+                },
+                "required": ["technique_id", "technique_name", "tactic"],
+            },
+        },
+        "environment": {
+            "type": "object",
+            "properties": {k: {"type": "array", "items": _TEXT}
+                           for k in ("os_requirements", "software", "network_segments", "required_services")},
+        },
+        "vm_requirements": {"type": "array", "items": {"type": "object"}},
+    },
+    "required": ["scenario_name", "target_org", "threat_actor", "techniques"],
+}
+
+SVO_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "subject": _NONEMPTY,
+        "verb": _NONEMPTY,
+        "object": _NONEMPTY,
+        "object_type": {"type": "string", "enum": SVO_OBJECT_TYPES},
+    },
+    "required": ["subject", "verb", "object", "object_type"],
+}
+
+SVO_BATCH_SCHEMA = {
+    "type": "array",
+    "minItems": 1,
+    "items": {
+        "type": "object",
+        "properties": dict(SVO_SCHEMA["properties"], technique_id=_NONEMPTY, index={"type": "integer"}),
+        "required": ["technique_id"] + SVO_SCHEMA["required"],
+    },
+}
+
+ATTACK_CHAIN_SCHEMA = {
+    "type": "array",
+    "minItems": 1,
+    "items": {
+        "type": "object",
+        "properties": {
+            "step": {"type": "integer"},
+            "technique_id": _NONEMPTY,
+            "reason": _TEXT,
+            "dependencies": {"type": "array", "items": _TEXT},
+        },
+        "required": ["step", "technique_id"],
+    },
+}
+
+REACT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "thought": _NONEMPTY,
+        "action": _NONEMPTY,
+        "failure_type": {"type": "string", "enum": REACT_FAILURE_TYPES},
+        "svo_focus": _TEXT,
+        "command": _NONEMPTY,
+    },
+    "required": ["thought", "action", "failure_type", "command"],
+}
+
+
+# ==================== 파싱 / 검증 ====================
+
+class StructuredOutputError(Exception):
+    """repair 재요청까지 실패한 응답"""
+
+    def __init__(self, call_type: str, errors: List[str], raw: str):
+        super().__init__(f"{call_type}: {'; '.join(errors[:3])}")
+        self.call_type = call_type
+        self.errors = errors
+        self.raw = raw
+
+
+_FENCE = re.compile(r"```(?:json)?\s*")
+
+
+def extract_json(text: str) -> Any:
+    """LLM 응답 → JSON 값 (코드 펜스 제거, 앞뒤 설명문이 붙어 있으면 첫 JSON 값만)"""
+    text = _FENCE.sub("", text or "").strip()
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        starts = [i for i in (text.find("{"), text.find("[")) if i >= 0]
+        if not starts:
+            raise
+        value, _ = json.JSONDecoder().raw_decode(text[min(starts):])
+        return value
+
+
+_TYPES = {"object": dict, "array": list, "string": str, "boolean": bool, "null": type(None)}
+
+
+def _type_ok(value: Any, expected: str) -> bool:
+    if expected == "integer":
+        return isinstance(value, int) and not isinstance(value, bool)
+    if expected == "number":
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
+    return isinstance(value, _TYPES.get(expected, object))
+
+
+def validate(value: Any, schema: Dict, path: str = "$") -> List[str]:
+    """JSON schema 부분집합(type / enum / required / properties / items / minItems / minLength / pattern) 검증"""
+    expected = schema.get("type")
+    if expected:
+        types = expected if isinstance(expected, list) else [expected]
+        if not any(_type_ok(value, t) for t in types):
+            return [f"{path}: expected {' or '.join(types)}, got {type(value).__name__}"]
+
+    errors = []
+    if "enum" in schema and value not in schema["enum"]:
+        errors.append(f"{path}: {value!r} is not one of {schema['enum']}")
+    if isinstance(value, str):
+        if len(value.strip()) < schema.get("minLength", 0):
+            errors.append(f"{path}: must not be empty")
+        if "pattern" in schema and not re.search(schema["pattern"], value):
+            errors.append(f"{path}: {value!r} does not match {schema['pattern']}")
+    elif isinstance(value, dict):
+        for key in schema.get("required", []):
+            if key not in value:
+                errors.append(f"{path}: missing required field '{key}'")
+        for key, sub in schema.get("properties", {}).items():
+            if key in value:
+                errors += validate(value[key], sub, f"{path}.{key}")
+    elif isinstance(value, list):
+        if len(value) < schema.get("minItems", 0):
+            errors.append(f"{path}: expected at least {schema['minItems']} items")
+        if "items" in schema:
+            for i, item in enumerate(value):
+                errors += validate(item, schema["items"], f"{path}[{i}]")
+    return errors
+
+
+# ==================== 호출 ====================
+
+class StructuredOutput:
+    """
+    Args:
+        mode: schema | json | validate | off (None = LLM_STRUCTURED_OUTPUT)
+        retries: 검증 실패 시 repair 재요청 횟수 (None = LLM_REPAIR_RETRIES)
+    """
+
+    _COUNTERS = ("calls", "attempts", "first_try", "repaired", "failed",
+                 "parse_errors", "schema_errors", "seconds", "wasted_seconds")
+
+    def __init__(self, mode: Optional[str] = None, retries: Optional[int] = None):
+        self.mode = (mode or os.getenv("LLM_STRUCTURED_OUTPUT", "schema")).lower()
+        self.retries = retries if retries is not None else int(os.getenv("LLM_REPAIR_RETRIES", "1"))
+        self._lock = threading.Lock()
+        self.stats: Dict[str, Dict] = {}
+
+    @property
+    def enabled(self) -> bool:
+        """스키마 검증 + repair 사용 여부 (off면 각 호출부가 기존 형식/파싱 유지)"""
+        return self.mode != "off"
+
+    def _format(self, schema: Dict):
+        return {"schema": schema, "json": "json"}.get(self.mode)
+
+    def chat(self, client, model: str, messages: List[Dict], schema: Dict, call_type: str,
+             options: Optional[Dict] = None, lenient: bool = False,
+             usage: Optional[Dict] = None, stop_when=None) -> Any:
+        """
+        LLM 호출 → 검증된 JSON 값
+
+        Args:
+            client: LLMClient (chat(model, messages, options, format))
+            call_type: 통계 분류 (parse | svo | svo_batch | ordering | react …)
+            lenient: True면 재요청 후에도 스키마 오류가 남은 JSON을 그대로 반환
+                     (svo_batch처럼 호출부가 항목 단위로 걸러내는 경우)
+            usage: 주면 첫 시도의 prompt_eval_count를 usage["prompt_tokens"]에 기록
+            stop_when: streaming.StopWhen — LLMClient가 스트리밍으로 받으며 완성 즉시 생성 중단
+
+        Raises:
+            StructuredOutputError: JSON이 아니거나(lenient여도) 스키마 검증을 끝내 통과하지 못함
+        """
+        retries = self.retries if self.enabled else 0
+        messages = list(messages)
+        started = time.perf_counter()
+        value, errors, raw = None, [], ""
+
+        for attempt in range(retries + 1):
+            attempt_started = time.perf_counter()
+            extra = {"stop_when": stop_when} if stop_when is not None else {}
+            response = client.chat(model=model, messages=messages, options=options,
+                                   format=self._format(schema), **extra)
+            raw = response["message"]["content"]
+            if usage is not None and attempt == 0:
+                usage["prompt_tokens"] = response.get("prompt_eval_count")
+            try:
+                value = extract_json(raw)
+                errors = validate(value, schema) if self.enabled else []
+                kind = "schema_errors"
+            except (json.JSONDecodeError, ValueError) as e:
+                value, errors, kind = None, [f"$: invalid JSON ({e})"], "parse_errors"
+
+            if not errors:
+                self._record(call_type, attempt + 1, time.perf_counter() - started, ok=True)
+                return value
+            self._count(call_type, kind, time.perf_counter() - attempt_started)
+
+            if attempt < retries:
+                shape = "object" if schema.get("type") == "object" else "array"
+                messages = messages + [
+                    {"role": "assistant", "content": raw},
+                    {"role": "user", "content": (
+                        "Your previous response did not match the required JSON structure:\n"
+                        + "\n".join(f"- {e}" for e in errors[:10])
+                        + f"\n\nRespond again with ONLY the corrected JSON {shape} — "
+                          "no markdown, no explanation.")},
+                ]
+
+        self._record(call_type, retries + 1, time.perf_counter() - started, ok=False)
+        if lenient and value is not None:
+            return value
+        raise StructuredOutputError(call_type, errors, raw)
+
+    # ==================== 통계 ====================
+
+    def _entry(self, call_type: str) -> Dict:
+        return self.stats.setdefault(call_type, {k: 0 for k in self._COUNTERS})
+
+    def _count(self, call_type: str, kind: str, seconds: float):
+        with self._lock:
+            entry = self._entry(call_type)
+            entry[kind] += 1
+            entry["wasted_seconds"] += seconds
+
+    def _record(self, call_type: str, attempts: int, seconds: float, ok: bool):
+        with self._lock:
+            entry = self._entry(call_type)
+            entry["calls"] += 1
+            entry["attempts"] += attempts
+            entry["seconds"] += seconds
+            if not ok:
+                entry["failed"] += 1
+            elif attempts == 1:
+                entry["first_try"] += 1
+            else:
+                entry["repaired"] += 1
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {k: dict(v) for k, v in self.stats.items()}
+
+    @staticmethod
+    def delta(before: Dict, after: Dict) -> Dict:
+        """두 snapshot 사이의 호출 유형별 통계 (+ 실패율)"""
+        result = {}
+        for call_type, stats in after.items():
+            prev = before.get(call_type, {})
+            entry = {k: stats[k] - prev.get(k, 0) for k in StructuredOutput._COUNTERS}
+            if not entry["calls"]:
+                continue
+            entry["seconds"] = round(entry["seconds"], 2)
+            entry["wasted_seconds"] = round(entry["wasted_seconds"], 2)
+            # 시도 중 파싱/스키마 실패 비율 (repair로 복구된 것 포함)
+            entry["failure_rate"] = round((entry["parse_errors"] + entry["schema_errors"])
+                                          / entry["attempts"] * 100, 1)
+            result[call_type] = entry
+        return result
+
+
+_default_structured: Optional[StructuredOutput] = None
+_default_lock = threading.Lock()
+
+
+def get_structured_output() -> StructuredOutput:
+    """프로세스 전역 StructuredOutput (환경 변수로 설정)"""
+    global _default_structured
+    with _default_lock:
+        if _default_structured is None:
+            _default_structured = StructuredOutput()
+        return _default_structured
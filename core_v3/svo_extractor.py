@@ -6,17 +6,19 @@ KnowHow 논문의 gIoC 개념을 LLM 기반으로 구현.
 """
 
 import sys
-import json
-import re
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Dict, List, Optional
 from dataclasses import dataclass, asdict
-from ollama import Client as OllamaClient
 import os
-from dotenv import load_dotenv
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
-load_dotenv()
+
+from core_v3.llm_client import LLMClient
+from core_v3.clients import get_llm_client, get_settings
+from core_v3.structured_output import (SVO_BATCH_SCHEMA, SVO_SCHEMA, StructuredOutputError,
+                                       get_structured_output)
 
 
 @dataclass
@@ -57,12 +59,50 @@ class SVOExtractor:
                    "password", "cache", "dump"]
     }
 
-    def __init__(self):
-        llm_host = os.getenv("OLLAMA_HOST", "http://192.168.50.252:11434")
-        self.llm_client = OllamaClient(host=llm_host)
-        self.model = os.getenv("LLM_MODEL", "gpt-oss:120b")
+    SYSTEM_PROMPT = """You are an expert in cybersecurity attack behavior analysis.
+Your task is to extract a structured SVO (Subject-Verb-Object) triplet from an attack technique description.
+
+Output ONLY valid JSON with this exact structure:
+{
+    "subject": "the tool, process, or actor performing the action",
+    "verb": "the core action verb (one word, lowercase, e.g. dump, copy, download, enumerate, create, modify, delete, execute, inject, scan)",
+    "object": "the target of the action (concise, e.g. credential, registry key, network share)",
+    "object_type": "one of: file | process | network | registry | service | memory"
+}
+
+Rules:
+1. subject should be the TOOL or PROCESS name if mentioned (e.g. mimikatz, powershell, certutil), otherwise use "agent"
+2. verb should be a single ABSTRACT action word — not a full phrase
+3. object should be the SPECIFIC target, not a general category
+4. object_type must be exactly one of: file, process, network, registry, service, memory
+5. Output ONLY the JSON, no explanation"""
 
-    def extract_svo(self, technique: Dict) -> Optional[AttackSVO]:
+    # 배치 모드: K개 technique을 한 프롬프트로 보내고 JSON 배열로 받음
+    BATCH_SYSTEM_PROMPT = SYSTEM_PROMPT.replace(
+        "Output ONLY valid JSON with this exact structure:\n{",
+        "You will receive SEVERAL techniques. Output ONLY a valid JSON array with one object per\n"
+        "technique, in the same order, each with this exact structure:\n{\n"
+        "    \"index\": the [n] number of the technique,\n"
+        "    \"technique_id\": \"the technique ID exactly as given\","
+    ).replace(
+        "5. Output ONLY the JSON, no explanation",
+        "5. Output ONLY the JSON array, no explanation"
+    )
+
+    def __init__(self, max_workers: Optional[int] = None, batch_size: Optional[int] = None,
+                 llm_client: Optional[LLMClient] = None):
+        self.llm_client = llm_client or get_llm_client()
+        self.model = get_settings().llm_model
+        self.structured = get_structured_output()
+        # 동시에 Ollama로 보낼 최대 요청 수 (1이면 순차 실행)
+        self.max_workers = max_workers or int(os.getenv("SVO_MAX_WORKERS", "4"))
+        # 배치 크기 K (1 이하면 technique별 개별 호출)
+        self.batch_size = batch_size or int(os.getenv("SVO_BATCH_SIZE", "1"))
+        # 마지막 extract_all_svos의 technique별 요청 지연 기록
+        self.latencies: List[Dict] = []
+        self.last_run: Dict = {}
+
+    def extract_svo(self, technique: Dict, verbose: bool = True) -> Optional[AttackSVO]:
         """
         단일 technique에서 SVO를 추출
 
@@ -74,104 +114,284 @@ class SVOExtractor:
                 "description": "...",
                 "expected_action": "The attacker dumps credentials from LSASS memory"
             }
+            verbose: False이면 성공 로그 생략 (병렬 실행 시 호출자가 순서대로 출력)
 
         Returns:
             AttackSVO or None
         """
         tech_id = technique.get("technique_id", "")
-        tech_name = technique.get("technique_name", "")
-        tactic = technique.get("tactic", "")
-        description = technique.get("description", "")
-        expected_action = technique.get("expected_action", "")
 
         # LLM에게 SVO 추출 요청
-        system_prompt = """You are an expert in cybersecurity attack behavior analysis.
-Your task is to extract a structured SVO (Subject-Verb-Object) triplet from an attack technique description.
-
-Output ONLY valid JSON with this exact structure:
-{
-    "subject": "the tool, process, or actor performing the action",
-    "verb": "the core action verb (one word, lowercase, e.g. dump, copy, download, enumerate, create, modify, delete, execute, inject, scan)",
-    "object": "the target of the action (concise, e.g. credential, registry key, network share)",
-    "object_type": "one of: file | process | network | registry | service | memory"
-}
-
-Rules:
-1. subject should be the TOOL or PROCESS name if mentioned (e.g. mimikatz, powershell, certutil), otherwise use "agent"
-2. verb should be a single ABSTRACT action word — not a full phrase
-3. object should be the SPECIFIC target, not a general category
-4. object_type must be exactly one of: file, process, network, registry, service, memory
-5. Output ONLY the JSON, no explanation"""
-
-        user_prompt = f"""Extract SVO from this attack technique:
+        system_prompt = self.SYSTEM_PROMPT
 
-Technique ID: {tech_id}
-Technique Name: {tech_name}
-Tactic: {tactic}
-Description: {description}
-Expected Action: {expected_action}
-
-Output the JSON structure."""
+        user_prompt = self._single_user_prompt(technique)
 
         try:
-            response = self.llm_client.chat(
-                model=self.model,
+            svo_data = self.structured.chat(
+                self.llm_client, self.model,
                 messages=[
                     {"role": "system", "content": system_prompt},
                     {"role": "user", "content": user_prompt}
                 ],
+                schema=SVO_SCHEMA, call_type="svo",
                 options={"temperature": 0.0}
             )
 
-            result_text = response["message"]["content"].strip()
-            result_text = re.sub(r"```json\s*", "", result_text)
-            result_text = re.sub(r"```\s*", "", result_text)
-
-            svo_data = json.loads(result_text)
-
-            # object_type 검증/보정
-            object_type = svo_data.get("object_type", "file")
-            if object_type not in self.OBJECT_TYPE_HINTS:
-                object_type = self._infer_object_type(svo_data.get("object", ""))
-
-            svo = AttackSVO(
-                subject=svo_data.get("subject", "agent").lower().strip(),
-                verb=svo_data.get("verb", "execute").lower().strip(),
-                object=svo_data.get("object", "target").lower().strip(),
-                object_type=object_type,
-                technique_id=tech_id,
-                technique_name=tech_name,
-                tactic=tactic,
-            )
+            svo = self._build_svo(svo_data, technique)
 
-            print(f"  ✓ SVO: {svo.intent_summary()}")
+            if verbose:
+                print(f"  ✓ SVO: {svo.intent_summary()}")
             return svo
 
-        except json.JSONDecodeError as e:
+        except StructuredOutputError as e:
             print(f"  [!] SVO extraction JSON error for {tech_id}: {e}")
             return None
         except Exception as e:
             print(f"  [!] SVO extraction error for {tech_id}: {e}")
             return None
 
-    def extract_all_svos(self, techniques: List[Dict]) -> List[AttackSVO]:
+    def _build_svo(self, svo_data: Dict, technique: Dict) -> AttackSVO:
+        """LLM 출력 dict → AttackSVO (object_type 검증/보정 포함)"""
+        object_type = svo_data.get("object_type", "file")
+        if object_type not in self.OBJECT_TYPE_HINTS:
+            object_type = self._infer_object_type(svo_data.get("object", ""))
+
+        return AttackSVO(
+            subject=svo_data.get("subject", "agent").lower().strip(),
+            verb=svo_data.get("verb", "execute").lower().strip(),
+            object=svo_data.get("object", "target").lower().strip(),
+            object_type=object_type,
+            technique_id=technique.get("technique_id", ""),
+            technique_name=technique.get("technique_name", ""),
+            tactic=technique.get("tactic", ""),
+        )
+
+    @staticmethod
+    def _is_valid_entry(entry) -> bool:
+        """배치 응답 항목이 AttackSVO로 변환 가능한지 검사"""
+        if not isinstance(entry, dict):
+            return False
+        for key in ("subject", "verb", "object", "object_type"):
+            value = entry.get(key)
+            if not isinstance(value, str) or not value.strip():
+                return False
+        return True
+
+    @staticmethod
+    def _match_entry(entries: List, techniques: List[Dict], i: int) -> Optional[Dict]:
+        """
+        배치 응답에서 techniques[i]에 해당하는 항목 찾기
+          1. 프롬프트의 [n] 번호(index) — 중복되지 않은 경우만
+          2. 항목 수가 technique 수와 같으면 순서
+          3. 배치 안에서 유일한 technique_id
+        같은 technique이 여러 번 있는 등 애매하면 None (→ 개별 호출 fallback)
+        """
+        tech_id = str(techniques[i].get("technique_id", "")).strip().upper()
+        dicts = [e for e in entries if isinstance(e, dict)]
+        indexed = [e for e in dicts if isinstance(e.get("index"), int) and not isinstance(e.get("index"), bool)]
+
+        entry = None
+        matches = [e for e in indexed if e["index"] == i + 1]
+        if len(matches) == 1:
+            entry = matches[0]
+        elif not matches and len(entries) == len(techniques):
+            entry = entries[i] if isinstance(entries[i], dict) else None
+        elif not matches:
+            same_tech = [t for t in techniques if str(t.get("technique_id", "")).strip().upper() == tech_id]
+            same_entry = [e for e in dicts if str(e.get("technique_id", "")).strip().upper() == tech_id]
+            if len(same_tech) == 1 and len(same_entry) == 1:
+                entry = same_entry[0]
+
+        # technique_id가 다르면 다른 technique의 SVO — 버림
+        if entry is not None and entry.get("technique_id"):
+            if str(entry["technique_id"]).strip().upper() != tech_id:
+                return None
+        return entry
+
+    @staticmethod
+    def _technique_block(technique: Dict) -> str:
+        return f"""Technique ID: {technique.get("technique_id", "")}
+Technique Name: {technique.get("technique_name", "")}
+Tactic: {technique.get("tactic", "")}
+Description: {technique.get("description", "")}
+Expected Action: {technique.get("expected_action", "")}"""
+
+    def extract_svo_batch(self, techniques: List[Dict]) -> tuple:
+        """
+        K개 technique의 SVO를 한 번의 LLM 호출로 추출
+
+        Args:
+            techniques: technique 목록 (배치 1개 분량)
+
+        Returns:
+            (svos, usage)
+              svos:  techniques와 같은 길이의 리스트 (검증 실패 항목은 None)
+              usage: {"prompt_tokens": int | None, "prompt_chars": int, "single_prompt_chars": int}
+        """
+        blocks = "\n\n".join(
+            f"[{i}]\n{self._technique_block(t)}" for i, t in enumerate(techniques, 1)
+        )
+        user_prompt = f"""Extract SVO from each of these {len(techniques)} attack techniques:
+
+{blocks}
+
+Output the JSON array ({len(techniques)} objects, same order)."""
+
+        # 같은 technique들을 개별 호출했을 때의 프롬프트 길이 (토큰 절감 추정용)
+        single_chars = sum(
+            len(self.SYSTEM_PROMPT) + len(self._single_user_prompt(t)) for t in techniques
+        )
+        usage = {
+            "prompt_tokens": None,
+            "prompt_chars": len(self.BATCH_SYSTEM_PROMPT) + len(user_prompt),
+            "single_prompt_chars": single_chars,
+        }
+        svos: List[Optional[AttackSVO]] = [None] * len(techniques)
+
+        try:
+            # 일부 항목만 깨진 응답은 그대로 받아 항목 단위로 걸러냄 (실패 항목만 개별 호출 fallback)
+            entries = self.structured.chat(
+                self.llm_client, self.model,
+                messages=[
+                    {"role": "system", "content": self.BATCH_SYSTEM_PROMPT},
+                    {"role": "user", "content": user_prompt}
+                ],
+                schema=SVO_BATCH_SCHEMA, call_type="svo_batch",
+                options={"temperature": 0.0}, lenient=True, usage=usage
+            )
+        except Exception as e:
+            print(f"  [!] Batch SVO extraction error ({len(techniques)} techniques): {e}")
+            return svos, usage
+
+        if not isinstance(entries, list):
+            print(f"  [!] Batch SVO response is not a JSON array")
+            return svos, usage
+
+        for i, tech in enumerate(techniques):
+            entry = self._match_entry(entries, techniques, i)
+            if self._is_valid_entry(entry):
+                svos[i] = self._build_svo(entry, tech)
+
+        return svos, usage
+
+    def _single_user_prompt(self, technique: Dict) -> str:
+        return f"""Extract SVO from this attack technique:
+
+{self._technique_block(technique)}
+
+Output the JSON structure."""
+
+    def _timed_extract(self, technique: Dict, verbose: bool) -> tuple:
+        """extract_svo + 요청 지연 측정"""
+        started = time.perf_counter()
+        svo = self.extract_svo(technique, verbose=verbose)
+        return svo, time.perf_counter() - started
+
+    def _timed_batch(self, techniques: List[Dict]) -> tuple:
+        """extract_svo_batch + 요청 지연 측정"""
+        started = time.perf_counter()
+        svos, usage = self.extract_svo_batch(techniques)
+        return svos, usage, time.perf_counter() - started
+
+    def _run_batches(self, techniques: List[Dict], batch_size: int,
+                     pool: ThreadPoolExecutor) -> tuple:
+        """
+        배치 모드 실행: K개씩 묶어 호출 후, 검증 실패 technique만 개별 호출로 fallback
+
+        Returns:
+            (outcomes, batch_report) — outcomes는 technique 순서의 (svo, latency, mode)
+        """
+        chunks = [techniques[i:i + batch_size] for i in range(0, len(techniques), batch_size)]
+        batch_results = list(pool.map(self._timed_batch, chunks))
+
+        outcomes = []
+        fallback_idx = []
+        prompt_tokens = 0
+        est_single_tokens = 0.0
+        tokens_per_char = None
+        for chunk, (svos, usage, latency) in zip(chunks, batch_results):
+            if usage["prompt_tokens"]:
+                tokens_per_char = usage["prompt_tokens"] / usage["prompt_chars"]
+                prompt_tokens += usage["prompt_tokens"]
+                est_single_tokens += tokens_per_char * usage["single_prompt_chars"]
+            for svo in svos:
+                if svo is None:
+                    fallback_idx.append(len(outcomes))
+                outcomes.append((svo, latency, "batch"))
+
+        # 검증 실패 항목 → technique별 개별 호출
+        if fallback_idx:
+            print(f"  [!] {len(fallback_idx)} technique(s) failed batch validation — falling back to per-technique extraction")
+            retried = list(pool.map(lambda i: self._timed_extract(techniques[i], verbose=False), fallback_idx))
+            for i, (svo, latency) in zip(fallback_idx, retried):
+                outcomes[i] = (svo, outcomes[i][1] + latency, "fallback")
+
+        fallback_tokens = 0.0
+        if tokens_per_char:
+            fallback_tokens = tokens_per_char * sum(
+                len(self.SYSTEM_PROMPT) + len(self._single_user_prompt(techniques[i])) for i in fallback_idx
+            )
+
+        report = {
+            "batch_size": batch_size,
+            "batches": len(chunks),
+            "fallbacks": len(fallback_idx),
+            "prompt_tokens": prompt_tokens or None,
+            "prompt_tokens_single_estimate": round(est_single_tokens) if tokens_per_char else None,
+            "prompt_tokens_saved": round(est_single_tokens - prompt_tokens - fallback_tokens) if tokens_per_char else None,
+        }
+        return outcomes, report
+
+    def extract_all_svos(self, techniques: List[Dict],
+                         max_workers: Optional[int] = None,
+                         batch_size: Optional[int] = None) -> List[AttackSVO]:
         """
-        모든 technique에서 SVO를 일괄 추출
+        모든 technique에서 SVO를 일괄 추출 (bounded 병렬 LLM 호출, 선택적 배치 모드)
 
         Args:
             techniques: scenario.parse()의 techniques 목록
+            max_workers: 동시 LLM 요청 수 (기본: self.max_workers, 1이면 순차)
+            batch_size: 한 프롬프트에 묶을 technique 수 (기본: self.batch_size, 1 이하면 개별 호출)
 
         Returns:
-            AttackSVO 리스트 (추출 실패한 것은 제외)
+            AttackSVO 리스트 (technique 순서 유지, 추출 실패한 것은 제외)
         """
-        print(f"\n[*] Extracting SVOs from {len(techniques)} techniques...")
+        batch_size = batch_size or self.batch_size
+        workers = max(1, min(max_workers or self.max_workers, len(techniques) or 1))
+        mode = f"batch of {batch_size}" if batch_size > 1 else f"concurrency: {workers}"
+        print(f"\n[*] Extracting SVOs from {len(techniques)} techniques ({mode})...")
+
+        wall_start = time.perf_counter()
+        batch_report = None
+        if batch_size > 1:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                outcomes, batch_report = self._run_batches(techniques, batch_size, pool)
+        elif workers == 1:
+            outcomes = []
+            for i, tech in enumerate(techniques, 1):
+                print(f"\n  [{i}/{len(techniques)}] {tech.get('technique_id', '?')}: {tech.get('technique_name', 'N/A')}")
+                outcomes.append(self._timed_extract(tech, verbose=True) + ("single",))
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                # map()은 입력 순서대로 결과를 돌려줌 → technique 순서 보장
+                outcomes = list(pool.map(lambda t: self._timed_extract(t, verbose=False) + ("single",), techniques))
+        wall_time = time.perf_counter() - wall_start
 
         svos = []
-        for i, tech in enumerate(techniques, 1):
+        self.latencies = []
+        for i, (tech, (svo, latency, call_mode)) in enumerate(zip(techniques, outcomes), 1):
             tech_id = tech.get("technique_id", "?")
-            print(f"\n  [{i}/{len(techniques)}] {tech_id}: {tech.get('technique_name', 'N/A')}")
+            self.latencies.append({
+                "technique_id": tech_id,
+                "latency_s": round(latency, 3),
+                "mode": call_mode,
+                "ok": svo is not None,
+            })
+            if workers > 1 or batch_size > 1:
+                print(f"\n  [{i}/{len(techniques)}] {tech_id}: {tech.get('technique_name', 'N/A')} ({latency:.1f}s, {call_mode})")
+                if svo:
+                    print(f"  ✓ SVO: {svo.intent_summary()}")
 
-            svo = self.extract_svo(tech)
             if svo:
                 svos.append(svo)
                 # SVO를 technique dict에도 보존 (downstream에서 참조)
@@ -179,7 +399,20 @@ Output the JSON structure."""
             else:
                 print(f"  [!] Skipped — SVO extraction failed")
 
-        print(f"\n[*] SVO extraction complete: {len(svos)}/{len(techniques)} extracted")
+        self.last_run = {
+            "concurrency": workers,
+            "wall_time_s": round(wall_time, 3),
+            "sum_latency_s": round(sum(l["latency_s"] for l in self.latencies), 3),
+            "requests": self.latencies,
+        }
+        if batch_report:
+            self.last_run["batch"] = batch_report
+
+        print(f"\n[*] SVO extraction complete: {len(svos)}/{len(techniques)} extracted "
+              f"in {wall_time:.1f}s (Σ latency {self.last_run['sum_latency_s']:.1f}s)")
+        if batch_report and batch_report["prompt_tokens_saved"] is not None:
+            print(f"    Batch mode: {batch_report['batches']} call(s), {batch_report['fallbacks']} fallback(s), "
+                  f"~{batch_report['prompt_tokens_saved']} prompt tokens saved")
         return svos
 
     def _infer_object_type(self, object_str: str) -> str:
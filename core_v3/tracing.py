@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Tracing
+Phase / LLM 호출 / Caldera 요청 / operation poll 단위의 경량 span 기록기.
+세션 종료 시 Chrome trace-event JSON(chrome://tracing, Perfetto에서 열람)과
+phase별 요약(session_info.json의 "timing")을 만든다.
+
+  phase  : _print_header 배너 단위 (다음 배너가 나오면 이전 phase 종료)
+  llm    : LLMClient.chat
+  http   : CalderaClient._request
+  poll   : OperationWatcher poll (link/operation 조회)
+  wait   : OperationWatcher poll 사이 대기 (agent beacon 대기)
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional
+
+
+SUMMARY_CATEGORIES = ("llm", "http", "poll", "wait")
+
+
+class Tracer:
+    """
+    Span 기록기 (스레드 안전)
+
+    - span은 Chrome trace의 complete event("X")로 기록되어 같은 스레드 안에서 시간 구간으로 중첩되고,
+      시작 시점의 phase 이름을 기록한다.
+      (SVO 추출 worker 스레드의 LLM 호출도 해당 phase로 집계됨)
+    - max_events를 넘으면 이후 span은 요약 집계만 하고 trace event는 버린다.
+    """
+
+    def __init__(self, max_events: int = 100000):
+        self.max_events = max_events
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """새 세션 시작 — 기존 span 모두 폐기"""
+        with self._lock:
+            self._origin = time.perf_counter()
+            self.wall_origin = time.time()      # 여러 run(stage)의 trace를 한 timeline으로 합칠 때 기준
+            self._events: List[Dict] = []
+            self._threads: Dict[int, str] = {}
+            self._phases: List[Dict] = []
+            self._phase: Optional[Dict] = None
+            self.dropped = 0
+
+    def _now_us(self) -> float:
+        return (time.perf_counter() - self._origin) * 1e6
+
+    def _tid(self) -> int:
+        ident = threading.get_ident()
+        if ident not in self._threads:
+            self._threads[ident] = threading.current_thread().name
+        return ident
+
+    def _emit(self, name: str, cat: str, start_us: float, end_us: float,
+              tid: int, args: Dict):
+        with self._lock:
+            phase = self._phase
+            if phase is not None and cat in SUMMARY_CATEGORIES:
+                totals = phase["categories"].setdefault(cat, {"count": 0, "us": 0.0})
+                totals["count"] += 1
+                totals["us"] += end_us - start_us
+            if len(self._events) >= self.max_events:
+                self.dropped += 1
+                return
+            self._events.append({
+                "name": name, "cat": cat, "ph": "X",
+                "ts": round(start_us, 1), "dur": round(end_us - start_us, 1),
+                "pid": os.getpid(), "tid": tid, "args": args,
+            })
+
+    # ==================== Span ====================
+
+    @contextmanager
+    def span(self, name: str, cat: str, **args):
+        """
+        with tracer.span("GET operations/..", "http", status=...) as info:
+            info["extra"] = ...   # 종료 시 args에 반영
+        """
+        info = dict(args)
+        if self._phase is not None:
+            info.setdefault("phase", self._phase["name"])
+        tid = self._tid()
+        start = self._now_us()
+        try:
+            yield info
+        finally:
+            self._emit(name, cat, start, self._now_us(), tid, info)
+
+    # ==================== Phase ====================
+
+    def start_phase(self, name: str):
+        """이전 phase를 닫고 새 phase 시작"""
+        self.end_phase()
+        with self._lock:
+            self._phase = {"name": name, "start_us": self._now_us(),
+                           "tid": self._tid(), "categories": {}}
+
+    def end_phase(self):
+        with self._lock:
+            phase, self._phase = self._phase, None
+        if phase is None:
+            return
+        end = self._now_us()
+        phase["end_us"] = end
+        self._phases.append(phase)
+        self._emit(phase["name"], "phase", phase["start_us"], end, phase["tid"], {})
+
+    # ==================== 출력 ====================
+
+    def summary(self) -> Dict:
+        """
+        phase별 wall time과 카테고리별 누적 시간
+
+        llm/http 누적 시간은 worker 스레드 병렬 실행분을 합산하므로 phase wall time보다 클 수 있다.
+        """
+        phases = list(self._phases)
+        if self._phase is not None:
+            phases.append(dict(self._phase, end_us=self._now_us()))
+
+        rows = []
+        totals = {cat: {"count": 0, "s": 0.0} for cat in SUMMARY_CATEGORIES}
+        for phase in phases:
+            row = {"phase": phase["name"],
+                   "wall_s": round((phase["end_us"] - phase["start_us"]) / 1e6, 3)}
+            for cat in SUMMARY_CATEGORIES:
+                data = phase["categories"].get(cat, {"count": 0, "us": 0.0})
+                row[f"{cat}_s"] = round(data["us"] / 1e6, 3)
+                row[f"{cat}_count"] = data["count"]
+                totals[cat]["count"] += data["count"]
+                totals[cat]["s"] += data["us"] / 1e6
+            rows.append(row)
+
+        wall = sum(r["wall_s"] for r in rows)
+        return {
+            "wall_s": round(wall, 3),
+            "phases": rows,
+            "totals": {cat: {"count": v["count"], "s": round(v["s"], 3)} for cat, v in totals.items()},
+            "dropped_events": self.dropped,
+        }
+
+    @staticmethod
+    def merge_summaries(summaries: List[Dict]) -> Dict:
+        """
+        같은 세션을 여러 run(배치 stage / --resume)으로 나눠 실행했을 때 run별 summary() 합치기
+        (phase 행은 run 번호를 붙여 실행 순서대로 이어 붙이고 wall/카테고리 누적은 합산)
+        """
+        rows = [dict(row, run=n) for n, summary in enumerate(summaries, 1) for row in summary.get("phases", [])]
+        totals = {cat: {"count": 0, "s": 0.0} for cat in SUMMARY_CATEGORIES}
+        for summary in summaries:
+            for cat, data in summary.get("totals", {}).items():
+                if cat in totals:
+                    totals[cat]["count"] += data["count"]
+                    totals[cat]["s"] += data["s"]
+        return {
+            "wall_s": round(sum(summary.get("wall_s", 0.0) for summary in summaries), 3),
+            "phases": rows,
+            "totals": {cat: {"count": v["count"], "s": round(v["s"], 3)} for cat, v in totals.items()},
+            "dropped_events": sum(summary.get("dropped_events", 0) for summary in summaries),
+            "runs": len(summaries),
+        }
+
+    def export_chrome(self, path: Path, previous: Optional[List[Path]] = None):
+        """
+        Chrome trace-event 형식으로 저장
+
+        previous: 같은 세션의 이전 run이 저장한 trace 파일 — wall-clock 기준으로 ts를 맞춰 한 timeline에 합침
+        """
+        with self._lock:
+            events = list(self._events)
+            threads = dict(self._threads)
+        pid = os.getpid()
+        meta = [{"name": "process_name", "ph": "M", "pid": pid, "tid": 0,
+                 "args": {"name": "Scenario2Caldera"}}]
+        for tid, name in threads.items():
+            meta.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid,
+                         "args": {"name": name}})
+
+        parts = []
+        for part_path in previous or []:
+            try:
+                with open(part_path, encoding="utf-8") as f:
+                    parts.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        parts.append({"traceEvents": meta + events, "otherData": {"wall_origin": self.wall_origin}})
+
+        base = min(part.get("otherData", {}).get("wall_origin", self.wall_origin) for part in parts)
+        merged, seen_meta = [], set()
+        for part in parts:
+            shift = (part.get("otherData", {}).get("wall_origin", self.wall_origin) - base) * 1e6
+            for event in part.get("traceEvents", []):
+                if event.get("ph") == "M":
+                    key = (event.get("name"), event.get("pid"), event.get("tid"))
+                    if key in seen_meta:
+                        continue
+                    seen_meta.add(key)
+                elif shift:
+                    event = dict(event, ts=round(event["ts"] + shift, 1))
+                merged.append(event)
+
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": merged, "displayTimeUnit": "ms",
+                       "otherData": {"wall_origin": base}},
+                      f, ensure_ascii=False, default=str)
+
+    def print_summary(self, summary: Optional[Dict] = None):
+        summary = summary or self.summary()
+        print(f"\n⏱  Timing (wall {summary['wall_s']:.1f}s):")
+        print(f"    {'phase':<52} {'wall':>8} {'llm':>8} {'http':>8} {'wait':>8}")
+        for row in summary["phases"]:
+            print(f"    {row['phase'][:52]:<52} {row['wall_s']:>7.1f}s {row['llm_s']:>7.1f}s "
+                  f"{row['http_s']:>7.1f}s {row['wait_s']:>7.1f}s")
+
+
+_tracer: Optional[Tracer] = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer() -> Tracer:
+    """프로세스 전역 tracer"""
+    global _tracer
+    with _tracer_lock:
+        if _tracer is None:
+            _tracer = Tracer(max_events=int(os.getenv("S2C_TRACE_MAX_EVENTS", "100000")))
+        return _tracer
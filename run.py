@@ -6,6 +6,7 @@ Usage:
     python run.py scenario.md        # 기본 실행 (기존 ability 우선)
     python run.py --force-generate   # SVO-only 실험 (기존 ability 무시)
 """
+import os
 import sys
 import argparse
 from pathlib import Path
@@ -45,8 +46,35 @@ if __name__ == "__main__":
                         help="실행 중 생성된 Caldera 객체(ability/adversary/operation)를 지우지 않고 남김")
     parser.add_argument("--no-svo", action="store_true",
                         help="ReAct 프롬프트에서 SVO 제약 제거 (ablation 실험용)")
+    parser.add_argument("--rerun-mode", choices=["full", "targeted"], default=None,
+                        help="ReAct 라운드 재실행 방식: full=전체 chain, targeted=수정된 ability+선행 ability만 (기본: REACT_RERUN_MODE)")
+    parser.add_argument("--resume", metavar="SESSION_DIR",
+                        help="중단된 세션(results/session_*)을 checkpoint.json 기준으로 이어서 실행")
+    parser.add_argument("--no-llm-cache", action="store_true",
+                        help="LLM 응답 캐시를 사용하지 않음 (SVO 비결정성 실험용)")
+    parser.add_argument("--no-fix-store", action="store_true",
+                        help="이전 세션의 검증된 수정(fix store)을 조회/기록하지 않음 (SVO 비결정성 실험용)")
+    parser.add_argument("--record", metavar="CASSETTE",
+                        help="Ollama/Caldera 요청·응답을 cassette 파일(JSONL)로 기록")
+    parser.add_argument("--replay", metavar="CASSETTE",
+                        help="기록된 cassette로 오프라인 재생 (LLM/Caldera 서버 불필요)")
+    parser.add_argument("--replay-loose-llm", action="store_true",
+                        help="replay 시 기록에 없는 LLM 프롬프트에 기록 순서상 다음 응답 사용 (기본: 재생 실패)")
     args = parser.parse_args()
 
+    if args.no_llm_cache:
+        os.environ["LLM_CACHE_BYPASS"] = "true"
+    if args.record and args.replay:
+        parser.error("--record와 --replay는 함께 사용할 수 없습니다")
+    if args.record or args.replay:
+        os.environ["S2C_CASSETTE"] = args.record or args.replay
+        os.environ["S2C_CASSETTE_MODE"] = "record" if args.record else "replay"
+    if args.replay_loose_llm:
+        os.environ["S2C_CASSETTE_LOOSE_LLM"] = "true"
+    if args.no_fix_store or args.record or args.replay:
+        # cassette는 LLM 호출 순서를 그대로 재생해야 하므로 fix store 상태에 의존하지 않게 함
+        os.environ["FIX_STORE_BYPASS"] = "true"
+
     # 로그 파일 설정 (logs/run_YYYYMMDD_HHMMSS.log)
     log_dir = Path(__file__).parent / "logs"
     log_dir.mkdir(exist_ok=True)
@@ -59,12 +87,21 @@ if __name__ == "__main__":
 
     pipeline = Pipeline()
     result = None
+    interrupted = False
     try:
         result = pipeline.run(args.scenario, force_generate=args.force_generate,
-                              use_svo=not args.no_svo)
+                              use_svo=not args.no_svo, rerun_mode=args.rerun_mode,
+                              resume_dir=args.resume)
+    except BaseException:
+        # Ctrl-C / 예외: 생성한 Caldera 객체를 남겨 두어야 --resume으로 이어서 실행 가능
+        interrupted = pipeline.session_dir is not None
+        raise
     finally:
-        # 정상 종료든 에러 발생(키보드 인터럽트 등)이든 마지막에 삭제
-        if not args.keep_objects:
+        if interrupted:
+            print(f"\n[!] Interrupted — Caldera objects kept. Resume with:")
+            print(f"    python run.py --resume {pipeline.session_dir}")
+        elif not args.keep_objects:
+            # 정상 종료든 실패든 마지막에 삭제
             pipeline.cleanup()
 
     if result: